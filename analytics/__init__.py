@@ -0,0 +1,7 @@
+"""
+余票历史统计分析模块
+"""
+
+from .history_analytics import HistoryAnalytics, SEAT_CLASSES
+
+__all__ = ['HistoryAnalytics', 'SEAT_CLASSES']
@@ -0,0 +1,97 @@
+"""
+余票历史统计报告
+
+用法:
+    python -m analytics [历史文件] [--train G1234] [--seat 二等座] [--route 北京->上海]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from .history_analytics import HistoryAnalytics, SEAT_CLASSES
+
+
+WEEKDAY_NAMES = ["一", "二", "三", "四", "五", "六", "日"]
+
+
+def _default_history_file() -> str:
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "logs", "query_history.jsonl")
+
+
+def _fmt_prob(p: float) -> str:
+    return "  . " if np.isnan(p) else f"{p * 100:3.0f}%"
+
+
+def print_report(analytics: HistoryAnalytics, train=None, seat=None, route=None, top=20, max_days=30):
+    """打印统计报告"""
+    # 先计算一次，非法的车次/线路/坐席在输出前即报错
+    heatmap = analytics.availability_heatmap(train, seat, route)
+    print(f"查询记录: {analytics.query_count}  有票观测: {analytics.observation_count}  "
+          f"线路: {len(analytics.routes)}  车次: {len(analytics.trains)}")
+
+    scope = " ".join(x for x in [route, train, seat] if x) or "全部"
+    print(f"\n=== 统计范围: {scope} ===")
+
+    print(f"\n[车次有票命中率 Top {top}]")
+    for r, t, hits, queries, rate in analytics.hit_rates(route=route)[:top]:
+        print(f"  {r:<20} {t:<8} {hits:>6}/{queries:<6} {rate * 100:6.1f}%")
+
+    print("\n[有票概率热力图 星期×小时]")
+    print("     " + "".join(f"{h:>4}" for h in range(24)))
+    for wd, row in enumerate(heatmap):
+        print(f"  周{WEEKDAY_NAMES[wd]} " + "".join(_fmt_prob(p) for p in row))
+
+    print("\n[回票事件小时分布]")
+    hours = analytics.reappearance_hours(train, seat, route)
+    if hours.sum():
+        peak = int(np.argmax(hours))
+        print("  " + " ".join(f"{h}:{c}" for h, c in enumerate(hours) if c))
+        print(f"  最常回票时段: {peak:02d}:00-{peak:02d}:59 （{hours[peak]} 次）")
+    else:
+        print("  暂无回票事件")
+
+    pct = analytics.latency_percentiles(train, seat, route)
+    if pct:
+        print("  回票延迟: " + "  ".join(f"p{p}={v / 60:.1f}分钟" for p, v in pct.items()))
+
+    print(f"\n[距出发天数 有票概率 (0-{max_days}天)]")
+    days, total, prob = analytics.days_before_profile(train, seat, route, max_days)
+    for d, n, p in zip(days, total, prob):
+        if n:
+            print(f"  提前{d:>3}天  查询{n:>6}次  有票概率 {_fmt_prob(p)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRTicketMonitor 余票历史统计报告")
+    parser.add_argument("history_file", nargs="?", default=_default_history_file(), help="query_history.jsonl 路径")
+    parser.add_argument("--train", help="车次号，如 G1234")
+    parser.add_argument("--seat", choices=SEAT_CLASSES, help="坐席类型")
+    parser.add_argument("--route", help="线路，如 北京->上海")
+    parser.add_argument("--top", type=int, default=20, help="命中率排行数量")
+    parser.add_argument("--max-days", type=int, default=30, help="距出发天数统计上限")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.history_file):
+        print(f"[!] 历史文件不存在: {args.history_file}")
+        return 1
+
+    t0 = time.perf_counter()
+    analytics = HistoryAnalytics.from_jsonl(args.history_file)
+    t1 = time.perf_counter()
+    try:
+        print_report(analytics, args.train, args.seat, args.route, args.top, args.max_days)
+    except KeyError as e:
+        print(f"[!] {e.args[0]}")
+        return 1
+    t2 = time.perf_counter()
+    print(f"\n载入 {t1 - t0:.2f}s，统计 {t2 - t1:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+查询历史的列式统计分析
+
+将 query_history.jsonl 载入为 NumPy 列式数组：
+- 查询表（每条历史记录一行）：时间戳、线路ID、出发日期距查询的天数
+- 观测表（每个有票车次一行）：所属查询、车次ID、坐席有票矩阵
+所有统计均以向量化方式计算，不在 Python 层逐条循环。
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# 坐席顺序与主程序表格列保持一致
+SEAT_CLASSES = ["商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座"]
+
+HOURS_PER_DAY = 24
+DAYS_PER_WEEK = 7
+
+
+def _to_datetime64(values: List[str], unit: str) -> np.ndarray:
+    """
+    批量转换时间字符串，遇到非法值时逐条转换并以 NaT 代替
+    :param values: ISO 格式时间字符串列表
+    :param unit: numpy 时间单位（如 's'、'D'）
+    :return: datetime64 数组
+    """
+    dtype = f"datetime64[{unit}]"
+    try:
+        return np.array(values, dtype="datetime64[us]").astype(dtype)
+    except ValueError:
+        out = np.empty(len(values), dtype=dtype)
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(v, "us")
+            except ValueError:
+                out[i] = np.datetime64("NaT")
+        return out
+
+
+class HistoryAnalytics:
+    """查询历史列式分析器"""
+
+    def __init__(self, timestamps: np.ndarray, route_ids: np.ndarray, dates: np.ndarray,
+                 obs_query: np.ndarray, obs_train: np.ndarray, obs_seats: np.ndarray,
+                 routes: List[str], trains: List[str]):
+        """
+        初始化分析器（通常通过 from_jsonl / from_records 构造）
+        :param timestamps: 每次查询的时间戳 datetime64[s]
+        :param route_ids: 每次查询的线路ID
+        :param dates: 每次查询的出发日期 datetime64[D]
+        :param obs_query: 每条有票观测所属的查询下标
+        :param obs_train: 每条有票观测的车次ID
+        :param obs_seats: 有票观测的坐席矩阵 (观测数, len(SEAT_CLASSES))
+        :param routes: 线路ID -> 线路名（"始发->到达"）
+        :param trains: 车次ID -> 车次号
+        """
+        self.timestamps = timestamps
+        self.route_ids = route_ids
+        self.dates = dates
+        self.obs_query = obs_query
+        self.obs_train = obs_train
+        self.obs_seats = obs_seats
+        self.routes = routes
+        self.trains = trains
+        self._route_index = {name: i for i, name in enumerate(routes)}
+        self._train_index = {name: i for i, name in enumerate(trains)}
+
+        # 派生列（时间戳非法的查询小时/星期记为 -1）
+        self.obs_route = route_ids[obs_query]
+        self.valid_ts = ~np.isnat(timestamps)
+        ts_day = timestamps.astype("datetime64[D]")
+        self.hours = (timestamps.astype("datetime64[h]") - ts_day).astype(np.int64)
+        # 1970-01-01 为周四，换算为 周一=0
+        self.weekdays = (ts_day.astype(np.int64) + 3) % DAYS_PER_WEEK
+        self.hours[~self.valid_ts] = -1
+        self.weekdays[~self.valid_ts] = -1
+        days_before = (dates - ts_day).astype(np.int64)
+        days_before[np.isnat(dates) | np.isnat(ts_day)] = -1
+        self.days_before = days_before
+        # 回票事件按 (线路, 出发日期) 分组：扫描模式每轮为每个日期各写一条记录，不同日期互不相干
+        series_key = np.stack([route_ids.astype(np.int64), dates.astype(np.int64)], axis=1)
+        if len(series_key):
+            _, inverse = np.unique(series_key, axis=0, return_inverse=True)
+            self.series_ids = inverse.reshape(-1).astype(np.int64)
+        else:
+            self.series_ids = np.zeros(0, dtype=np.int64)
+        self._query_pos = None
+        self._route_order = None
+        self._route_start = None
+
+    # ------------------------------------------------------------------ 载入
+
+    @classmethod
+    def from_jsonl(cls, history_file: str) -> "HistoryAnalytics":
+        """
+        从 query_history.jsonl 载入
+        :param history_file: 历史文件路径
+        :return: 分析器实例
+        """
+        def iter_records():
+            with open(history_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+
+        return cls.from_records(iter_records())
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "HistoryAnalytics":
+        """
+        从历史记录字典构建列式数组
+        :param records: QueryHistory 写入的记录
+        :return: 分析器实例
+        """
+        route_index: Dict[str, int] = {}
+        train_index: Dict[str, int] = {}
+        seat_pos = {name: i for i, name in enumerate(SEAT_CLASSES)}
+
+        timestamps, route_ids, dates = [], [], []
+        obs_query, obs_train = [], []
+        seat_obs, seat_col = [], []
+
+        for i, r in enumerate(records):
+            route = f"{r.get('from', '')}->{r.get('to', '')}"
+            timestamps.append(r.get("timestamp", ""))
+            route_ids.append(route_index.setdefault(route, len(route_index)))
+            dates.append(r.get("date", ""))
+
+            seats = r.get("available_seats") or {}
+            for train in r.get("available_trains", ()):
+                obs_query.append(i)
+                obs_train.append(train_index.setdefault(train, len(train_index)))
+                for seat in seats.get(train, ()):
+                    if seat in seat_pos:
+                        seat_obs.append(len(obs_query) - 1)
+                        seat_col.append(seat_pos[seat])
+
+        obs_seats = np.zeros((len(obs_query), len(SEAT_CLASSES)), dtype=bool)
+        if seat_obs:
+            obs_seats[np.array(seat_obs), np.array(seat_col)] = True
+
+        return cls(
+            timestamps=_to_datetime64(timestamps, "s"),
+            route_ids=np.array(route_ids, dtype=np.int32),
+            dates=_to_datetime64(dates, "D"),
+            obs_query=np.array(obs_query, dtype=np.int64),
+            obs_train=np.array(obs_train, dtype=np.int32),
+            obs_seats=obs_seats,
+            routes=list(route_index),
+            trains=list(train_index),
+        )
+
+    # ------------------------------------------------------------------ 过滤
+
+    @property
+    def query_count(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def observation_count(self) -> int:
+        return len(self.obs_query)
+
+    def _lookup(self, index: Dict[str, int], name: Optional[str], kind: str) -> Optional[int]:
+        if name is None:
+            return None
+        if name not in index:
+            raise KeyError(f"历史记录中不存在该{kind}: {name}")
+        return index[name]
+
+    def _masks(self, train: Optional[str] = None, seat: Optional[str] = None,
+               route: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算查询表与观测表的过滤掩码
+        指定车次时，分母仅包含该车次出现过的线路上的查询
+        :return: (查询掩码, 观测掩码)
+        """
+        train_id = self._lookup(self._train_index, train, "车次")
+        route_id = self._lookup(self._route_index, route, "线路")
+
+        q_mask = np.ones(self.query_count, dtype=bool)
+        o_mask = np.ones(self.observation_count, dtype=bool)
+        if route_id is not None:
+            q_mask &= self.route_ids == route_id
+            o_mask &= self.obs_route == route_id
+        if train_id is not None:
+            o_mask &= self.obs_train == train_id
+            q_mask &= np.isin(self.route_ids, np.unique(self.obs_route[self.obs_train == train_id]))
+        if seat is not None:
+            if seat not in SEAT_CLASSES:
+                raise KeyError(f"未知坐席类型: {seat}")
+            o_mask &= self.obs_seats[:, SEAT_CLASSES.index(seat)]
+        return q_mask, o_mask
+
+    def _hit_queries(self, o_mask: np.ndarray) -> np.ndarray:
+        """满足条件的有票观测所在的查询下标（去重）"""
+        return np.unique(self.obs_query[o_mask])
+
+    # ------------------------------------------------------------------ 统计
+
+    def hit_rates(self, route: Optional[str] = None, min_queries: int = 1) -> List[Tuple[str, str, int, int, float]]:
+        """
+        各线路各车次的有票命中率
+        :param route: 仅统计指定线路（可选）
+        :param min_queries: 线路最少查询次数
+        :return: [(线路, 车次, 有票次数, 查询次数, 命中率)]，按命中率降序
+        """
+        _, o_mask = self._masks(route=route)
+        n_trains = max(len(self.trains), 1)
+        keys = self.obs_route[o_mask].astype(np.int64) * n_trains + self.obs_train[o_mask]
+        uniq, hits = np.unique(keys, return_counts=True)
+        route_of = uniq // n_trains
+        train_of = uniq % n_trains
+        queries = np.bincount(self.route_ids, minlength=len(self.routes))[route_of]
+
+        keep = queries >= min_queries
+        rates = np.divide(hits, queries, out=np.zeros(len(hits)), where=queries > 0)
+        order = np.lexsort((-hits[keep], -rates[keep]))
+        r, t, h, q, p = route_of[keep][order], train_of[keep][order], hits[keep][order], queries[keep][order], rates[keep][order]
+        return [(self.routes[a], self.trains[b], int(c), int(d), float(e)) for a, b, c, d, e in zip(r, t, h, q, p)]
+
+    def availability_heatmap(self, train: Optional[str] = None, seat: Optional[str] = None,
+                             route: Optional[str] = None) -> np.ndarray:
+        """
+        有票概率热力图（星期 × 小时）
+        :return: 形状 (7, 24) 的概率矩阵，无查询的格子为 NaN
+        """
+        q_mask, o_mask = self._masks(train, seat, route)
+        cells = self.weekdays * HOURS_PER_DAY + self.hours
+        size = DAYS_PER_WEEK * HOURS_PER_DAY
+        total = np.bincount(cells[q_mask & self.valid_ts], minlength=size)
+        hit_q = self._hit_queries(o_mask)
+        hits = np.bincount(cells[hit_q[self.valid_ts[hit_q]]], minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prob = np.where(total > 0, hits / np.maximum(total, 1), np.nan)
+        return prob.reshape(DAYS_PER_WEEK, HOURS_PER_DAY)
+
+    def days_before_profile(self, train: Optional[str] = None, seat: Optional[str] = None,
+                            route: Optional[str] = None, max_days: int = 30) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        距出发 N 天时的有票概率
+        :param max_days: 统计的最大提前天数
+        :return: (天数数组, 查询次数, 有票概率)
+        """
+        q_mask, o_mask = self._masks(train, seat, route)
+        valid = (self.days_before >= 0) & (self.days_before <= max_days)
+        total = np.bincount(self.days_before[q_mask & valid], minlength=max_days + 1)
+        hit_q = self._hit_queries(o_mask)
+        hit_q = hit_q[valid[hit_q]]
+        hits = np.bincount(self.days_before[hit_q], minlength=max_days + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            prob = np.where(total > 0, hits / np.maximum(total, 1), np.nan)
+        return np.arange(max_days + 1), total, prob
+
+    def _ensure_route_order(self):
+        """按 (线路, 出发日期, 时间) 排序查询，得到每次查询在所属 (线路, 日期) 内的序号"""
+        if self._query_pos is not None:
+            return
+        order = np.lexsort((self.timestamps.astype(np.int64), self.series_ids))
+        sorted_series = self.series_ids[order]
+        n_series = int(self.series_ids.max()) + 1 if self.query_count else 0
+        route_start = np.searchsorted(sorted_series, np.arange(n_series))
+        pos = np.empty(self.query_count, dtype=np.int64)
+        pos[order] = np.arange(self.query_count)
+        self._route_order = order
+        self._route_start = route_start
+        self._query_pos = pos - route_start[self.series_ids]
+
+    def reappearances(self, train: Optional[str] = None, seat: Optional[str] = None,
+                      route: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        车次（坐席）售罄后重新有票的事件，同一线路不同出发日期的查询分别比较
+        延迟定义为：首次查询到无票 -> 再次查询到有票 的时间差
+        :return: {"latency_seconds", "hour", "weekday", "route_id", "train_id"} 各为等长数组
+        """
+        _, o_mask = self._masks(train, seat, route)
+        self._ensure_route_order()
+
+        oq = self.obs_query[o_mask]
+        ot = self.obs_train[o_mask]
+        g = self.series_ids[oq]
+        p = self._query_pos[oq]
+
+        idx = np.lexsort((p, ot, g))
+        oq, ot, g, p = oq[idx], ot[idx], g[idx], p[idx]
+
+        same_group = (g[1:] == g[:-1]) & (ot[1:] == ot[:-1])
+        event = same_group & (p[1:] - p[:-1] > 1)
+        back_q = oq[1:][event]
+        gone_q = self._route_order[self._route_start[g[1:][event]] + p[:-1][event] + 1]
+        valid = self.valid_ts[back_q] & self.valid_ts[gone_q]
+        back_q, gone_q = back_q[valid], gone_q[valid]
+
+        latency = (self.timestamps[back_q] - self.timestamps[gone_q]).astype(np.int64)
+        return {
+            "latency_seconds": latency,
+            "hour": self.hours[back_q],
+            "weekday": self.weekdays[back_q],
+            "route_id": self.route_ids[back_q],
+            "train_id": ot[1:][event][valid],
+        }
+
+    def reappearance_hours(self, train: Optional[str] = None, seat: Optional[str] = None,
+                           route: Optional[str] = None) -> np.ndarray:
+        """
+        回票事件的小时分布
+        :return: 长度 24 的事件计数
+        """
+        events = self.reappearances(train, seat, route)
+        return np.bincount(events["hour"], minlength=HOURS_PER_DAY)
+
+    def latency_percentiles(self, train: Optional[str] = None, seat: Optional[str] = None,
+                            route: Optional[str] = None,
+                            percentiles: Tuple[int, ...] = (50, 90, 99)) -> Dict[int, float]:
+        """
+        回票延迟分位数（秒）
+        :return: {分位: 秒数}，无事件时为空字典
+        """
+        latency = self.reappearances(train, seat, route)["latency_seconds"]
+        if latency.size == 0:
+            return {}
+        values = np.percentile(latency, percentiles)
+        return {p: float(v) for p, v in zip(percentiles, values)}
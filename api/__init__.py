@@ -0,0 +1,23 @@
+"""
+本地 HTTP 接口模块
+"""
+
+from .live_state import LiveState, EventSubscriber
+
+# 接口服务（http.server）在首次使用时才导入，缩短程序启动时间
+_LAZY = {
+    'ApiServer': '.server',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['LiveState', 'EventSubscriber', 'ApiServer']
@@ -0,0 +1,191 @@
+"""
+实时监控状态：各线路最近一次的查询结果，以及坐席变化事件的分发（供本地接口与 SSE 推送使用）
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+RouteKey = Tuple[str, str, str]  # (始发, 到达, 日期)
+
+
+class EventSubscriber:
+    """一个事件订阅者（如一个 SSE 连接），事件放入有界队列"""
+
+    def __init__(self, route: Optional[str] = None, max_queue: int = 1000):
+        """
+        :param route: 只接收该线路（"始发->到达"）的事件，None 表示全部
+        :param max_queue: 队列上限；消费过慢导致队列满时订阅被断开，客户端可凭 Last-Event-ID 重连补发
+        """
+        self.route = route
+        self.queue: "queue.Queue[Dict]" = queue.Queue(max_queue)
+        self.overflowed = False
+
+    def offer(self, event: Dict) -> bool:
+        """放入事件，队列已满时返回 False"""
+        if self.route is not None and event["data"].get("route") != self.route:
+            return True
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.overflowed = True
+            return False
+
+    def get(self, timeout: float) -> Optional[Dict]:
+        """取出一个事件，超时返回 None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LiveState:
+    """各线路的最新结果与坐席变化事件，线程安全"""
+
+    def __init__(self, replay_size: int = 1000):
+        """
+        :param replay_size: 保留最近多少个事件，供断线重连的客户端补发
+        """
+        self.started = time.time()
+        self._routes: Dict[RouteKey, Dict] = {}
+        self._recent: Deque[Dict] = deque(maxlen=replay_size)
+        self._subscribers: List[EventSubscriber] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.dropped_subscribers = 0
+
+    def update(self, key: RouteKey, tickets: Iterable) -> List[Dict]:
+        """
+        记录一次成功查询的全部车次，与上一次结果比较，坐席余票有变化的车次生成事件并推送
+        同一线路的第一次结果只作为基线，不生成事件
+        :param key: (始发, 到达, 日期)
+        :param tickets: 该次查询的全部 TicketInfo
+        :return: 生成的事件
+        """
+        tickets = {t.train_no: t for t in tickets}
+        now = datetime.now().isoformat(timespec="seconds")
+        route = f"{key[0]}->{key[1]}"
+        with self._lock:
+            previous = self._routes.get(key)
+            entry = dict(previous) if previous else {"polls": 0, "failures": 0}
+            entry.update(tickets=tickets, updated_at=now, polls=entry["polls"] + 1)
+            self._routes[key] = entry
+            if previous is None:
+                return []
+            events = []
+            for train_no, ticket in tickets.items():
+                before = previous["tickets"].get(train_no)
+                if before is not None and before.seats == ticket.seats:
+                    continue
+                after_seats = ticket.available_seats
+                before_seats = before.available_seats if before is not None else {}
+                if before is None and not after_seats:
+                    continue
+                events.append(self._event_locked("seats", {
+                    "time": now,
+                    "route": route,
+                    "date": key[2],
+                    "train_no": train_no,
+                    "departure_time": ticket.departure_time,
+                    "before": before_seats,
+                    "after": after_seats,
+                    "available": bool(after_seats),
+                }))
+            # 从结果中消失的有票车次（停售，或协调者只上报有票车次时已售罄）
+            for train_no, before in previous["tickets"].items():
+                if train_no not in tickets and before.has_seats:
+                    events.append(self._event_locked("seats", {
+                        "time": now,
+                        "route": route,
+                        "date": key[2],
+                        "train_no": train_no,
+                        "departure_time": before.departure_time,
+                        "before": before.available_seats,
+                        "after": {},
+                        "available": False,
+                    }))
+            self._publish_locked(events)
+        return events
+
+    def mark_failed(self, key: RouteKey):
+        """记录一次失败的查询（只影响健康状态，不改变最近结果）"""
+        with self._lock:
+            entry = self._routes.get(key)
+            if entry is not None:
+                entry["failures"] += 1
+                entry["last_failure"] = datetime.now().isoformat(timespec="seconds")
+
+    def _event_locked(self, kind: str, data: Dict) -> Dict:
+        event = {"id": self._next_id, "event": kind, "data": data}
+        self._next_id += 1
+        self._recent.append(event)
+        return event
+
+    def _publish_locked(self, events: List[Dict]):
+        if not events or not self._subscribers:
+            return
+        alive = []
+        for subscriber in self._subscribers:
+            if all(subscriber.offer(event) for event in events):
+                alive.append(subscriber)
+            else:
+                self.dropped_subscribers += 1
+        self._subscribers = alive
+
+    def subscribe(self, route: Optional[str] = None, last_event_id: Optional[int] = None,
+                  max_queue: int = 1000) -> EventSubscriber:
+        """
+        新增订阅者
+        :param last_event_id: 客户端已收到的最后一个事件编号，之后保留的事件会先补发
+        """
+        subscriber = EventSubscriber(route, max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event["id"] > last_event_id:
+                        subscriber.offer(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: EventSubscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def routes(self, from_station: Optional[str] = None, to_station: Optional[str] = None,
+               date: Optional[str] = None, tickets: bool = False, available_only: bool = False) -> List[Dict]:
+        """
+        各线路的最新结果
+        :param from_station / to_station / date: 过滤条件，None 表示不限
+        :param tickets: 是否包含车次明细
+        :param available_only: 车次明细只包含有票车次
+        """
+        with self._lock:
+            items = [(key, dict(entry)) for key, entry in self._routes.items()
+                     if (from_station is None or key[0] == from_station)
+                     and (to_station is None or key[1] == to_station)
+                     and (date is None or key[2] == date)]
+        result = []
+        for key, entry in items:
+            all_tickets = entry.pop("tickets").values()
+            available = [t for t in all_tickets if t.has_seats]
+            item = {"from": key[0], "to": key[1], "date": key[2], "route": f"{key[0]}->{key[1]}",
+                    "trains": len(all_tickets), "available": len(available)}
+            item.update(entry)
+            if tickets:
+                item["tickets"] = [t.to_dict() for t in (available if available_only else all_tickets)]
+            result.append(item)
+        return result
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
@@ -0,0 +1,187 @@
+"""
+本地 HTTP 接口：各线路最新查询结果、查询历史、运行状况，以及坐席变化的 SSE 推送
+
+其他看板或脚本读取同一个监控实例的数据，不再各自向 12306 发起查询。
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .live_state import LiveState
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    server_ref: "ApiServer" = None
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        routes = {
+            "/api/health": self._health,
+            "/api/routes": self._routes,
+            "/api/history": self._history,
+            "/api/history/stats": self._history_stats,
+            "/api/events": self._events,
+        }
+        handler = routes.get(parts.path.rstrip("/") or "/")
+        if handler is None:
+            self._send_json({"error": "not found", "endpoints": sorted(routes)}, 404)
+            return
+        self._responded = False
+        try:
+            handler(params)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            # 读取历史文件等失败：尚未开始响应时返回错误，避免客户端一直等待
+            if not self._responded:
+                self._send_json({"error": f"{type(e).__name__}: {e}"}, 500)
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._responded = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self._cors()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cors(self):
+        if self.server_ref.allow_origin:
+            self.send_header("Access-Control-Allow-Origin", self.server_ref.allow_origin)
+
+    def _health(self, params: Dict[str, str]):
+        self._send_json(self.server_ref.health())
+
+    def _routes(self, params: Dict[str, str]):
+        """?from=&to=&date= 过滤；tickets=0 不含车次明细；available=1 只含有票车次"""
+        self._send_json(self.server_ref.state.routes(
+            params.get("from"), params.get("to"), params.get("date"),
+            tickets=params.get("tickets", "1") != "0", available_only=params.get("available") == "1"))
+
+    def _history(self, params: Dict[str, str]):
+        """?limit=（默认 100，最多 1000）&from=&to=&date= 过滤"""
+        try:
+            limit = min(max(int(params.get("limit", 100)), 1), 1000)
+        except ValueError:
+            self._send_json({"error": "limit 应为整数"}, 400)
+            return
+        filters = {k: params[k] for k in ("from", "to", "date") if k in params}
+        records = self.server_ref.history.get_recent(1000 if filters else limit)
+        if filters:
+            records = [r for r in records if all(r.get(k) == v for k, v in filters.items())][-limit:]
+        self._send_json(records)
+
+    def _history_stats(self, params: Dict[str, str]):
+        self._send_json(self.server_ref.history.get_statistics())
+
+    def _events(self, params: Dict[str, str]):
+        """
+        SSE：推送坐席变化事件（event: seats）；?route=始发->到达 只接收该线路
+        断线重连时浏览器自动带上 Last-Event-ID（或 ?since=），之后保留的事件会先补发
+        """
+        api = self.server_ref
+        since = self.headers.get("Last-Event-ID") or params.get("since")
+        try:
+            last_id = int(since) if since else None
+        except ValueError:
+            last_id = None
+        if not api.acquire_client():
+            self._send_json({"error": "SSE 连接数已达上限"}, 503)
+            return
+        subscriber = api.state.subscribe(params.get("route"), last_id)
+        try:
+            self._responded = True
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self._cors()
+            self.end_headers()
+            self.wfile.write(f"retry: 3000\n: connected, last event {api.state.last_event_id()}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            while not api.stopping.is_set():
+                event = subscriber.get(api.heartbeat_seconds)
+                if subscriber.overflowed:
+                    # 消费过慢已被移出订阅，断开让客户端凭 Last-Event-ID 重连补发
+                    break
+                if event is None:
+                    chunk = ": ping\n\n"
+                else:
+                    data = json.dumps(event["data"], ensure_ascii=False)
+                    chunk = f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+                self.wfile.write(chunk.encode("utf-8"))
+                self.wfile.flush()
+        finally:
+            api.state.unsubscribe(subscriber)
+            api.release_client()
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        # 不向终端输出访问日志
+        pass
+
+
+class ApiServer:
+    """在后台线程中提供本地 HTTP 接口"""
+
+    def __init__(self, state: LiveState, history, health: Callable[[], Dict],
+                 host: str = "127.0.0.1", port: int = 9109, max_clients: int = 32,
+                 heartbeat_seconds: float = 15, allow_origin: str = ""):
+        """
+        :param state: 实时监控状态
+        :param history: 查询历史（logger.QueryHistory）
+        :param health: 返回运行状况字典的函数
+        :param host: 监听地址（默认仅本机）
+        :param port: 监听端口
+        :param max_clients: SSE 连接数上限
+        :param heartbeat_seconds: 无事件时发送心跳注释的间隔，避免代理断开空闲连接
+        :param allow_origin: 非空时返回 Access-Control-Allow-Origin，供其他来源的网页看板读取
+        """
+        self.state = state
+        self.history = history
+        self.health = health
+        self.host = host
+        self.port = port
+        self.max_clients = max_clients
+        self.heartbeat_seconds = heartbeat_seconds
+        self.allow_origin = allow_origin
+        self.stopping = threading.Event()
+        self._clients = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def clients(self) -> int:
+        return self._clients
+
+    def acquire_client(self) -> bool:
+        with self._lock:
+            if self._clients >= self.max_clients:
+                return False
+            self._clients += 1
+            return True
+
+    def release_client(self):
+        with self._lock:
+            self._clients -= 1
+
+    def start(self):
+        handler = type("ApiHandler", (_ApiHandler,), {"server_ref": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="api-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
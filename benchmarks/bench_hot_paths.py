@@ -0,0 +1,241 @@
+"""
+热点路径基准测试：解析、车型分类、渲染、通知
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_hot_paths --rows 500 --save benchmarks/results/base.json
+    python -m benchmarks.bench_hot_paths --rows 500 --compare benchmarks/results/base.json
+
+结果保存为 JSON：{"meta": {...}, "results": {阶段: {"median", "min", "mean", "repeat", "number"}}}，
+--compare 会逐阶段对比中位数，超过阈值的变慢视为回归并以非零退出码结束。
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .common import BASE_DIR, load_main, load_module, make_monitor
+from .synthetic import generate_rows
+
+
+LEGACY_MAIN = os.path.join(BASE_DIR, "past_version", "main_v1.0.1.py")
+
+
+class _NullChannel:
+    """丢弃消息的通知渠道，仅测量通知管理器本身的开销"""
+    name = "null"
+
+    def send(self, title, message, ticket_info=None):
+        return True
+
+    def is_available(self):
+        return True
+
+
+def measure(func: Callable[[], object], repeat: int, number: int) -> Dict[str, float]:
+    """
+    重复计时
+    :param repeat: 采样次数
+    :param number: 每次采样内调用次数
+    :return: 单次调用耗时统计（秒）
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def build_cases(rows: List[str], include_legacy: bool = True) -> Dict[str, Callable[[], object]]:
+    """构造各阶段的待测函数"""
+    main = load_main()
+    from notification import NotificationManager
+    from prettytable import PrettyTable
+
+    monitor = make_monitor(main)
+    devnull = open(os.devnull, "w", encoding="utf-8")
+    split_rows = [r.split("|") for r in rows]
+    train_nos = [d[3] for d in split_rows]
+
+    def parse_and_print():
+        with redirect_stdout(devnull):
+            return monitor.parse_and_print(rows, date="2026-10-01")
+
+    with redirect_stdout(io.StringIO()):
+        tickets = monitor.parse_and_print(rows, date="2026-10-01", return_all=True)
+    available = [t for t in tickets if t.available_seats]
+
+    table_rows = [[d[3], d[6], d[7], d[8], d[9], d[10], d[32], d[31], d[30], d[23], d[28], d[24], d[29], d[26]]
+                  for d in split_rows]
+
+    def render():
+        table = PrettyTable()
+        table.field_names = ["车次", "始发", "到达", "开点", "到点", "历时", "商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座"]
+        for row in table_rows:
+            table.add_row(row)
+        with redirect_stdout(devnull):
+            print(table)
+
+    from display import TerminalRenderer
+    renderer = TerminalRenderer(devnull)
+    headers = ["车次", "始发", "到达", "开点", "到点", "历时", "商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座"]
+
+    def render_incremental():
+        # 增量渲染的稳态：与上一帧相同，只做比较不输出
+        renderer.begin()
+        renderer.table(headers, table_rows)
+        renderer.flush()
+
+    def new_manager(cooldown: int):
+        manager = NotificationManager({"enabled": True, "cooldown_seconds": cooldown,
+                                       "only_target_trains": False, "min_tickets": 1})
+        manager.register_channel(_NullChannel())
+        return manager
+
+    def notify_first():
+        # 每次都是新管理器：所有车次均为新发现，全部发送
+        new_manager(0).notify_ticket_available(available)
+
+    steady = new_manager(3600)
+    steady.notify_ticket_available(available)
+
+    def notify_steady():
+        # 已通知过且处于冷却期：衡量每轮无需发送时的判断开销
+        steady.notify_ticket_available(available)
+
+    cases = {
+        "split": lambda: [r.split("|") for r in rows],
+        "classify_train": lambda: [monitor.classify_train(t) for t in train_nos],
+        "parse_and_print": parse_and_print,
+        "render_only": render,
+        "render_incremental": render_incremental,
+        "notify_first": notify_first,
+        "notify_steady": notify_steady,
+        "parse_tickets": lambda: [t for _, t, _ in monitor._parse_rows(rows, date="2026-10-01")],
+        "ticket_to_dict": lambda: [t.to_dict() for t in tickets],
+    }
+
+    if include_legacy and os.path.exists(LEGACY_MAIN):
+        legacy = make_monitor(load_module(LEGACY_MAIN, "crtm_main_v1_0_1"))
+
+        def legacy_parse_and_print():
+            with redirect_stdout(devnull):
+                legacy.parse_and_print(rows)
+
+        cases["legacy_v1.0.1_parse_and_print"] = legacy_parse_and_print
+    return cases
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def run(rows: int, seed: int, repeat: int, number: int, only: Optional[List[str]] = None,
+        include_legacy: bool = True) -> Dict:
+    """执行基准测试并返回结果字典"""
+    data = generate_rows(rows, seed=seed)
+    cases = build_cases(data, include_legacy)
+    results = {}
+    for name, func in cases.items():
+        if only and name not in only:
+            continue
+        func()  # 预热
+        results[name] = measure(func, repeat, number)
+    return {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": f"{platform.system()} {platform.machine()}",
+            "rows": rows,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    打印与基线的对比
+    :param threshold: 视为回归的变慢比例（如 0.1 表示慢 10%）
+    :return: 回归的阶段名列表
+    """
+    regressions = []
+    base_meta = baseline.get("meta", {})
+    print(f"\n对比基线: {base_meta.get('revision', '?')} ({base_meta.get('time', '?')}, rows={base_meta.get('rows', '?')})")
+    if base_meta.get("rows") != current["meta"]["rows"]:
+        print("[!] 基线行数不同，对比结果仅供参考")
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"  {name:<32} 新增")
+            continue
+        ratio = cur["median"] / base["median"] if base["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- 回归"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  (提升)"
+        print(f"  {name:<32} {base['median'] * 1000:9.3f}ms -> {cur['median'] * 1000:9.3f}ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRTicketMonitor 热点路径基准测试")
+    parser.add_argument("--rows", type=int, default=500, help="合成查询结果行数")
+    parser.add_argument("--seed", type=int, default=12306, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=7, help="采样次数")
+    parser.add_argument("--number", type=int, default=5, help="每次采样的调用次数")
+    parser.add_argument("--only", nargs="*", help="仅运行指定阶段")
+    parser.add_argument("--no-legacy", action="store_true", help="不对比 past_version 旧版本")
+    parser.add_argument("--save", help="结果保存路径（JSON）")
+    parser.add_argument("--compare", help="基线结果路径（JSON）")
+    parser.add_argument("--threshold", type=float, default=0.10, help="回归判定阈值（默认 0.10）")
+    args = parser.parse_args(argv)
+
+    result = run(args.rows, args.seed, args.repeat, args.number, args.only, not args.no_legacy)
+
+    meta = result["meta"]
+    print(f"rows={meta['rows']} seed={meta['seed']} python={meta['python']} rev={meta['revision']}")
+    for name, r in result["results"].items():
+        per_row = r["median"] / max(args.rows, 1) * 1e6
+        print(f"  {name:<32} median {r['median'] * 1000:9.3f}ms  min {r['min'] * 1000:9.3f}ms  ({per_row:.2f}µs/行)")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
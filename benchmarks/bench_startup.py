@@ -0,0 +1,128 @@
+"""
+启动耗时基准：从启动 main.py 到出现第一个输入提示的时间
+
+在临时目录中运行项目副本（避免写入工作目录的配置、日志与车站缓存），
+车站同步指向带延迟的本地模拟服务器，验证同步不会阻塞第一个输入提示。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --station-delay 3000 --max-ms 200 --save benchmarks/results/startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from statistics import median
+from typing import Dict, List, Optional
+
+from .common import BASE_DIR
+from .mock_12306 import Mock12306Server, Scenario
+
+
+FIRST_PROMPT = "1. 始发城市/站".encode("utf-8")
+
+
+def copy_project(target: str) -> str:
+    """复制运行所需的文件到临时目录，返回副本中 main.py 的路径"""
+    shutil.copytree(BASE_DIR, target, ignore=shutil.ignore_patterns(
+        ".git", "__pycache__", "logs", "past_version", "results", "station_*.json"))
+    return os.path.join(target, "main.py")
+
+
+def time_to_prompt(main_path: str, base_url: str, timeout: float = 30) -> Optional[float]:
+    """
+    启动一次交互模式并测量到第一个输入提示的时间
+    :return: 秒；超时返回 None
+    """
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONDONTWRITEBYTECODE="1")
+    found = threading.Event()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, main_path, "--base-url", base_url],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                            cwd=os.path.dirname(main_path), env=env)
+    elapsed = [None]
+
+    def reader():
+        buf = b""
+        while True:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                return
+            buf += chunk
+            if FIRST_PROMPT in buf:
+                elapsed[0] = time.perf_counter() - start
+                found.set()
+                return
+
+    threading.Thread(target=reader, daemon=True).start()
+    found.wait(timeout)
+    proc.kill()
+    proc.wait()
+    return elapsed[0]
+
+
+def interpreter_baseline(runs: int) -> float:
+    """空解释器启动耗时中位数（秒），作为下限参考"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        samples.append(time.perf_counter() - start)
+    return median(samples)
+
+
+def run(runs: int, station_delay_ms: float) -> Dict:
+    server = Mock12306Server(Scenario(rows=10), station_delay_ms=station_delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="crtm_startup_")
+    try:
+        main_path = copy_project(os.path.join(workdir, "CRTicketMonitor"))
+        samples: List[Optional[float]] = [time_to_prompt(main_path, server.base_url) for _ in range(runs)]
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+    ok = [s for s in samples if s is not None]
+    return {
+        "runs": runs,
+        "station_delay_ms": station_delay_ms,
+        "samples_ms": [round(s * 1000, 1) if s is not None else None for s in samples],
+        "median_ms": round(median(ok) * 1000, 1) if ok else None,
+        "interpreter_ms": round(interpreter_baseline(runs) * 1000, 1),
+        "timeouts": len(samples) - len(ok),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRTicketMonitor 启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="启动次数（第一次为无车站缓存的冷启动）")
+    parser.add_argument("--station-delay", type=float, default=2000, help="模拟车站同步的延迟（毫秒）")
+    parser.add_argument("--max-ms", type=float, default=0, help="中位数超过该值时返回非零（0 为不检查）")
+    parser.add_argument("--save", help="结果保存路径（JSON）")
+    args = parser.parse_args(argv)
+
+    result = run(args.runs, args.station_delay)
+    print(f"到第一个输入提示: 中位数 {result['median_ms']}ms  各次 {result['samples_ms']}")
+    print(f"空解释器启动: {result['interpreter_ms']}ms  车站同步延迟: {args.station_delay:.0f}ms")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.save}")
+
+    if result["timeouts"] or result["median_ms"] is None:
+        print("[!] 未在超时时间内出现输入提示")
+        return 1
+    if args.max_ms and result["median_ms"] > args.max_ms:
+        print(f"[!] 启动耗时超过 {args.max_ms:.0f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
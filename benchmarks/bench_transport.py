@@ -0,0 +1,106 @@
+"""
+HTTP 传输层基准：在确定性的模拟传输上比较 重试 / 对冲请求 对查询耗时尾部的影响
+
+FakeTransport 按调用序号注入慢请求（模拟个别慢节点）与连接错误，不联网，结果可复现。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.bench_transport
+    python -m benchmarks.bench_transport --requests 400 --slow-every 20 --slow-ms 800 --save benchmarks/results/transport.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from statistics import median
+from typing import Dict, List
+
+from .common import BASE_DIR
+from .synthetic import generate_rows
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from network import FakeTransport, HttpClient, TransportError, DeadlineExceeded  # noqa: E402
+
+
+QUERY_PATH = "/otn/leftTicket/query"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_case(name: str, count: int, slow_every: int, slow_ms: float, fast_ms: float, fail_every: int,
+             timeout: float, deadline: float, hedge: bool, retries: int) -> Dict:
+    body = json.dumps({"data": {"result": generate_rows(50)}}, ensure_ascii=False)
+
+    def latency(n: int) -> float:
+        if slow_every and n % slow_every == slow_every - 1:
+            return slow_ms / 1000
+        return (fast_ms + (n % 7) * 0.5) / 1000
+
+    fails = range(fail_every - 1, count * 4, fail_every) if fail_every else ()
+    transport = FakeTransport({QUERY_PATH: body}, latency=latency, fail_calls=fails)
+    events: Dict[str, int] = {}
+    client = HttpClient(transport, retries=retries, backoff=0.01, max_backoff=0.05, hedge=hedge,
+                        hedge_min_samples=20, rng=random.Random(1),
+                        on_event=lambda kind, _: events.__setitem__(kind, events.get(kind, 0) + 1))
+    url = f"http://fake{QUERY_PATH}?leftTicketDTO.train_date=2026-10-01"
+    samples, failures = [], 0
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            client.get(url, timeout=timeout, deadline=time.monotonic() + deadline)
+        except (TransportError, DeadlineExceeded):
+            failures += 1
+        samples.append(time.perf_counter() - start)
+    client.close()
+    return {
+        "case": name,
+        "requests": count,
+        "transport_calls": len(transport.calls),
+        "failures": failures,
+        "p50_ms": round(median(samples) * 1000, 1),
+        "p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+        "events": events,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRTicketMonitor HTTP 传输层基准（模拟传输）")
+    parser.add_argument("--requests", type=int, default=300, help="每种情形的请求数")
+    parser.add_argument("--slow-every", type=int, default=20, help="每 N 次调用中有一次慢请求（0 为不注入）")
+    parser.add_argument("--slow-ms", type=float, default=600, help="慢请求耗时（毫秒）")
+    parser.add_argument("--fast-ms", type=float, default=10, help="正常请求耗时（毫秒）")
+    parser.add_argument("--fail-every", type=int, default=50, help="每 N 次调用中有一次连接错误（0 为不注入）")
+    parser.add_argument("--save", help="结果保存路径（JSON）")
+    args = parser.parse_args(argv)
+
+    common = dict(count=args.requests, slow_every=args.slow_every, slow_ms=args.slow_ms, fast_ms=args.fast_ms,
+                  fail_every=args.fail_every, timeout=10.0, deadline=20.0)
+    results = [
+        run_case("无重试", hedge=False, retries=0, **common),
+        run_case("重试", hedge=False, retries=2, **common),
+        run_case("重试 + 对冲", hedge=True, retries=2, **common),
+    ]
+    print(f"{'情形':<10}{'失败':>6}{'调用数':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  事件")
+    for r in results:
+        print(f"{r['case']:<10}{r['failures']:>6}{r['transport_calls']:>8}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+              f"{r['p99_ms']:>9}{r['max_ms']:>9}  {r['events']}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+基准测试与压测共用的工具
+"""
+
+import os
+import sys
+import types
+import tempfile
+import importlib.util
+from contextlib import contextmanager
+from typing import Optional
+
+from .synthetic import station_codes
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_shared_logger = None
+
+
+@contextmanager
+def _msvcrt_stub():
+    """
+    历史版本主程序在模块顶层 import msvcrt（仅交互按键使用）：非 Windows 平台下只在加载期间放入空模块，加载后移除，
+    避免其他模块（如 subprocess 以 msvcrt 是否存在判断平台）误判
+    """
+    try:
+        import msvcrt  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        yield
+        return
+    # 主程序会导入 subprocess，需在放入空模块前按真实平台完成导入
+    import subprocess  # noqa: F401
+    sys.modules["msvcrt"] = types.ModuleType("msvcrt")
+    try:
+        yield
+    finally:
+        sys.modules.pop("msvcrt", None)
+
+
+def load_module(path: str, name: str) -> types.ModuleType:
+    """按文件路径加载主程序模块"""
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    with _msvcrt_stub():
+        spec.loader.exec_module(module)
+    return module
+
+
+def load_main() -> types.ModuleType:
+    """加载当前版本 main.py（重复调用返回同一模块）"""
+    module = sys.modules.get("crtm_main")
+    if module is None:
+        module = load_module(os.path.join(BASE_DIR, "main.py"), "crtm_main")
+        sys.modules["crtm_main"] = module
+    return module
+
+
+def _quiet_logger():
+    """写入临时目录、仅记录 WARNING 以上的共享日志器"""
+    global _shared_logger
+    if _shared_logger is None:
+        from logger import TicketLogger
+        _shared_logger = TicketLogger(tempfile.mkdtemp(prefix="crtm_bench_"), {"level": "WARNING", "async_queue": True})
+    return _shared_logger
+
+
+def make_monitor(module: types.ModuleType, base_url: Optional[str] = None):
+    """
+    不经过 __init__（避免网络同步、配置文件读写与 atexit 注册）构造 TrainMonitor
+    :param module: main 模块
+    :param base_url: 指定时补齐发起查询所需的属性（HTTP 客户端、请求头、日志、指标）
+    """
+    from parsing import RowSchema, DEFAULT_FIELDS, DEFAULT_FIELD_COUNT
+    monitor = module.TrainMonitor.__new__(module.TrainMonitor)
+    monitor.station_dict = station_codes()
+    monitor.code_to_name = {code: name for name, code in monitor.station_dict.items()}
+    monitor.config = {
+        "dc_classification": {"default_mode": "smart", "smart_threshold": 899, "custom_mapping": {}},
+    }
+    monitor.renderer = None
+    monitor.row_schema = RowSchema(DEFAULT_FIELDS, DEFAULT_FIELD_COUNT)
+    if base_url is not None:
+        from metrics import MonitorMetrics
+        from network import RateLimiter, HttpClient, RequestsTransport
+        monitor.http = HttpClient(RequestsTransport(1), retries=0)  # 压测统计每一次请求的真实结果，不重试
+        monitor.headers = {"User-Agent": "CRTicketMonitor-bench"}
+        monitor.base_url = base_url.rstrip("/")
+        monitor.logger = _quiet_logger()
+        monitor.metrics = MonitorMetrics()
+        monitor.recorder = None
+        monitor.shared_cache = None
+        monitor.rate_limiter = RateLimiter(0)  # 压测不限速，由并发数与模拟服务器决定负载
+    return monitor
@@ -0,0 +1,289 @@
+"""
+端到端压测：大量监控任务对本地模拟服务器轮询
+
+每个监控任务（线路 + 日期）拥有独立的 NotificationManager，按固定间隔执行
+真实的 query_tickets -> parse_and_print（输出丢弃）-> notify_ticket_available 流程。
+压测期间随机在模拟服务器上放出余票，统计从放票到收到通知的时间。
+
+用法（在项目根目录执行）:
+    python -m benchmarks.load_harness --jobs 1000 --concurrency 32 --interval 5 --duration 60
+    python -m benchmarks.load_harness --jobs 500 --latency 20 80 --max-rps 200 --save benchmarks/results/load.json
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_cls, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .common import load_main, make_monitor
+from .mock_12306 import Mock12306Server, Scenario
+from .synthetic import STATIONS
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+def current_rss_mb() -> float:
+    """当前进程常驻内存（MB），无 /proc 时退化为峰值 RSS"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        import resource  # Windows 下不可用，仅作为无 /proc 平台的退化方案
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+class _CaptureChannel:
+    """记录通知到达时间的通知渠道"""
+    name = "capture"
+
+    def __init__(self, harness: "LoadHarness", job: "WatchJob"):
+        self.harness = harness
+        self.job = job
+
+    def send(self, title, message, ticket_info=None):
+        if ticket_info is not None:
+            self.harness.on_notified(self.job, ticket_info.train_no)
+        return True
+
+    def is_available(self):
+        return True
+
+
+class WatchJob:
+    """一个监控任务"""
+
+    def __init__(self, index: int, from_station: str, to_station: str, date: str, station_dict: Dict[str, str]):
+        self.index = index
+        self.from_station = from_station
+        self.to_station = to_station
+        self.date = date
+        self.route_key = (station_dict[from_station], station_dict[to_station], date)
+        self.manager = None
+
+
+class LoadHarness:
+    """压测驱动"""
+
+    def __init__(self, base_url: str, server: Optional[Mock12306Server], jobs: int, concurrency: int,
+                 interval: float, flip_every: float, seed: int = 1):
+        from notification import NotificationManager
+
+        self.base_url = base_url
+        self.server = server
+        self.concurrency = concurrency
+        self.interval = interval
+        self.flip_every = flip_every
+        self.rng = random.Random(seed)
+        self.main = load_main()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        station_dict = make_monitor(self.main).station_dict
+        self.jobs = self._build_jobs(jobs, station_dict)
+        for job in self.jobs:
+            job.manager = NotificationManager({"enabled": True, "cooldown_seconds": 3600,
+                                               "only_target_trains": False, "min_tickets": 1})
+            job.manager.register_channel(_CaptureChannel(self, job))
+
+        self.poll_latencies: List[float] = []
+        self.notify_latencies: List[float] = []
+        self.pending_flips: Dict[Tuple[Tuple[str, str, str], str], float] = {}
+        self.polls = 0
+        self.failed_polls = 0
+        self.rss_samples: List[Tuple[float, float]] = []
+
+    def _build_jobs(self, count: int, station_dict: Dict[str, str]) -> List[WatchJob]:
+        """线路 × 日期 组合出互不相同的监控任务"""
+        names = [stations[0][0] for stations in STATIONS.values()]
+        pairs = [(a, b) for a in names for b in names if a != b]
+        start = date_cls.today() + timedelta(days=1)
+        jobs = []
+        for i in range(count):
+            a, b = pairs[i % len(pairs)]
+            day = (start + timedelta(days=i // len(pairs))).isoformat()
+            jobs.append(WatchJob(i, a, b, day, station_dict))
+        return jobs
+
+    def _monitor(self):
+        """每个工作线程一个 TrainMonitor（各自的 HTTP 会话）"""
+        monitor = getattr(self._local, "monitor", None)
+        if monitor is None:
+            monitor = self._local.monitor = make_monitor(self.main, self.base_url)
+        return monitor
+
+    def poll(self, job: WatchJob):
+        monitor = self._monitor()
+        start = time.perf_counter()
+        data = monitor.query_tickets(job.date, job.from_station, job.to_station)
+        ok = isinstance(data, list)
+        if data and ok:
+            tickets = monitor.parse_and_print(data, date=job.date)
+            if tickets:
+                job.manager.notify_ticket_available(tickets)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.polls += 1
+            if not ok:
+                self.failed_polls += 1
+            self.poll_latencies.append(elapsed)
+
+    def on_notified(self, job: WatchJob, train_no: str):
+        now = time.time()
+        with self._lock:
+            t0 = self.pending_flips.pop((job.route_key, train_no), None)
+            if t0 is not None:
+                self.notify_latencies.append(now - t0)
+
+    def _flip_loop(self, stop: threading.Event):
+        """定期在随机线路上放出余票"""
+        while not stop.wait(self.flip_every):
+            job = self.rng.choice(self.jobs)
+            trains = self.server.scenario.trains(job.route_key)
+            train = self.rng.choice(trains)
+            with self._lock:
+                if (job.route_key, train) in self.pending_flips:
+                    continue
+                self.pending_flips[(job.route_key, train)] = time.time()
+            self.server.scenario.set_seat(job.route_key, train, "二等座", "有")
+
+    def _rss_loop(self, stop: threading.Event, started: float):
+        while True:
+            self.rss_samples.append((round(time.time() - started, 1), round(current_rss_mb(), 1)))
+            if stop.wait(1.0):
+                return
+
+    def run(self, duration: float) -> Dict:
+        started = time.time()
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._rss_loop, args=(stop, started), daemon=True)]
+        if self.server and self.flip_every > 0:
+            threads.append(threading.Thread(target=self._flip_loop, args=(stop,), daemon=True))
+        for t in threads:
+            t.start()
+
+        # 任务初始时间错开，避免同时发起
+        heap = [(time.monotonic() + self.interval * job.index / len(self.jobs), job.index) for job in self.jobs]
+        heapq.heapify(heap)
+        cond = threading.Condition()
+        deadline = time.monotonic() + duration
+
+        def done(job: WatchJob):
+            with cond:
+                heapq.heappush(heap, (time.monotonic() + self.interval, job.index))
+                cond.notify()
+
+        def task(job: WatchJob):
+            try:
+                self.poll(job)
+            except Exception:
+                with self._lock:
+                    self.failed_polls += 1
+            finally:
+                done(job)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            with cond:
+                while time.monotonic() < deadline:
+                    if not heap:
+                        cond.wait(0.1)
+                        continue
+                    due, index = heap[0]
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        cond.wait(min(wait, deadline - time.monotonic()))
+                        continue
+                    heapq.heappop(heap)
+                    job = self.jobs[index]
+                    pool.submit(task, job)
+            stop.set()
+
+        elapsed = time.time() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict:
+        ms = lambda v: None if v is None else round(v * 1000, 1)
+        counts = dict(self.server.request_counts) if self.server else {}
+        rss = [r for _, r in self.rss_samples]
+        return {
+            "jobs": len(self.jobs),
+            "concurrency": self.concurrency,
+            "interval_seconds": self.interval,
+            "duration_seconds": round(elapsed, 1),
+            "polls": self.polls,
+            "failed_polls": self.failed_polls,
+            "polls_per_second": round(self.polls / elapsed, 1),
+            "http_requests_per_second": round(sum(v for k, v in counts.items() if k != "throttled") / elapsed, 1) if counts else None,
+            "server_counts": counts,
+            "poll_latency_ms": {"p50": ms(percentile(self.poll_latencies, 50)),
+                                "p99": ms(percentile(self.poll_latencies, 99))},
+            "notify_latency_ms": {"count": len(self.notify_latencies),
+                                  "p50": ms(percentile(self.notify_latencies, 50)),
+                                  "p99": ms(percentile(self.notify_latencies, 99)),
+                                  "missed": len(self.pending_flips)},
+            "rss_mb": {"start": rss[0] if rss else None, "max": max(rss) if rss else None,
+                       "end": rss[-1] if rss else None, "samples": self.rss_samples},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CRTicketMonitor 端到端压测")
+    parser.add_argument("--jobs", type=int, default=200, help="监控任务数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发工作线程数")
+    parser.add_argument("--interval", type=float, default=5, help="每个任务的轮询间隔（秒）")
+    parser.add_argument("--duration", type=float, default=30, help="压测时长（秒）")
+    parser.add_argument("--rows", type=int, default=40, help="每条线路的车次数")
+    parser.add_argument("--latency", type=float, nargs=2, default=[5, 30], metavar=("MIN_MS", "MAX_MS"))
+    parser.add_argument("--max-rps", type=float, default=0, help="模拟服务器限流阈值")
+    parser.add_argument("--flip-every", type=float, default=0.5, help="放票间隔（秒），0 为不放票")
+    parser.add_argument("--base-url", help="使用外部模拟服务器（不再启动内置服务器，也不放票）")
+    parser.add_argument("--save", help="结果保存路径（JSON）")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = Mock12306Server(Scenario(rows=args.rows, availability=0.0),
+                                 latency_ms=tuple(args.latency), max_rps=args.max_rps).start()
+        base_url = server.base_url
+
+    real_stdout = sys.stdout
+    harness = LoadHarness(base_url, server, args.jobs, args.concurrency, args.interval, args.flip_every)
+    print(f"压测开始: {args.jobs} 个任务, 并发 {args.concurrency}, 间隔 {args.interval}s, 时长 {args.duration}s -> {base_url}")
+    # parse_and_print 会打印表格，压测期间丢弃标准输出
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    try:
+        result = harness.run(args.duration)
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+        if server:
+            server.stop()
+
+    summary = {k: v for k, v in result.items() if k != "rss_mb"}
+    summary["rss_mb"] = {k: v for k, v in result["rss_mb"].items() if k != "samples"}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
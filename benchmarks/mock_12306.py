@@ -0,0 +1,295 @@
+"""
+本地 12306 模拟服务器
+
+提供 station_name.js、leftTicket/init、leftTicket/query 三个接口，支持：
+- 可脚本化的余票变化（按时间触发的事件，或运行时调用 set_seat）
+- 延迟注入（固定区间随机延迟 + 少量慢请求）
+- 限流（超过每秒请求数时返回 HTML 错误页或 HTTP 429，与真实 12306 行为一致）
+
+用法:
+    python -m benchmarks.mock_12306 --port 8306 --rows 40 --latency 20 80 --max-rps 50
+    python main.py --base-url http://127.0.0.1:8306
+场景文件（--scenario）示例:
+    {"rows": 40, "availability": 0.0, "latency_ms": [20, 80],
+     "throttle": {"max_rps": 50, "mode": "html"},
+     "events": [{"at": 30, "route": "BJP-SHH", "date": "2026-10-01", "train": "*", "seat": "二等座", "value": "有"}]}
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from .synthetic import SEAT_INDEXES, city_codes, make_row, station_name_js, DEFAULT_MIX
+
+
+THROTTLE_HTML = "<html><head><title>网络可能存在问题</title></head><body>网络可能存在问题，请您重试一下！</body></html>"
+
+RouteKey = Tuple[str, str, str]  # (from_code, to_code, date)
+
+
+class Scenario:
+    """余票场景：各线路的基础数据与按时间生效的坐席变更"""
+
+    def __init__(self, rows: int = 40, availability: float = 0.0, seed: int = 12306,
+                 events: Optional[List[Dict]] = None):
+        """
+        :param rows: 每条线路返回的车次数
+        :param availability: 基础数据中坐席有票的概率
+        :param seed: 随机种子
+        :param events: 定时事件 [{"at": 秒, "route": "FROM-TO"|"*", "date": 日期|"*", "train": 车次|"*", "seat": 坐席, "value": 余票}]
+        """
+        self.rows = rows
+        self.availability = availability
+        self.seed = seed
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._base: Dict[RouteKey, List[List[str]]] = {}
+        self._overrides: Dict[RouteKey, Dict[Tuple[str, int], str]] = {}
+        self._pending = sorted(events or [], key=lambda e: e.get("at", 0))
+        self.changes: deque = deque(maxlen=100000)  # (时间, 线路, 车次, 坐席, 余票)
+
+    def _base_rows(self, key: RouteKey) -> List[List[str]]:
+        rows = self._base.get(key)
+        if rows is None:
+            from_code, to_code, date = key
+            rng = random.Random(zlib.crc32(f"{self.seed}|{from_code}|{to_code}|{date}".encode()))
+            from_codes, to_codes = city_codes(from_code), city_codes(to_code)
+            prefixes, weights = zip(*DEFAULT_MIX.items())
+            rows = []
+            for _ in range(self.rows):
+                train_no = f"{rng.choices(prefixes, weights)[0]}{rng.randint(1, 9999)}"
+                row = make_row(rng, train_no, rng.choice(from_codes), rng.choice(to_codes),
+                               self.availability, date.replace("-", ""))
+                rows.append(row.split("|"))
+            self._base[key] = rows
+        return rows
+
+    def trains(self, key: RouteKey) -> List[str]:
+        """线路上的车次列表"""
+        with self._lock:
+            return [d[3] for d in self._base_rows(key)]
+
+    def set_seat(self, key: RouteKey, train: str, seat: str, value: str):
+        """
+        修改某线路某车次的坐席余票（立即生效）
+        :param train: 车次号，"*" 表示全部
+        :param seat: 坐席名（见 synthetic.SEAT_INDEXES）
+        :param value: 余票，如 "有"、"5"、"无"
+        """
+        index = SEAT_INDEXES[seat]
+        with self._lock:
+            overrides = self._overrides.setdefault(key, {})
+            for d in self._base_rows(key):
+                if train in ("*", d[3]):
+                    overrides[(d[3], index)] = value
+                    self.changes.append((time.time(), key, d[3], seat, value))
+
+    def _apply_due_events(self, key: RouteKey):
+        # 到期事件与目标线路在锁内取出（各处理线程并发调用），修改余票时 set_seat 再自行加锁
+        elapsed = time.time() - self.started_at
+        due = []
+        with self._lock:
+            while self._pending and self._pending[0].get("at", 0) <= elapsed:
+                event = self._pending.pop(0)
+                route = event.get("route", "*")
+                date = event.get("date", "*")
+                targets = {k for k in list(self._base) + [key]
+                           if route in ("*", f"{k[0]}-{k[1]}") and date in ("*", k[2])}
+                due.append((event, targets))
+        for event, targets in due:
+            for k in targets:
+                self.set_seat(k, event.get("train", "*"), event["seat"], event["value"])
+
+    def result(self, key: RouteKey) -> List[str]:
+        """生成某线路当前的 data.result"""
+        if self._pending:
+            self._apply_due_events(key)
+        with self._lock:
+            rows = self._base_rows(key)
+            overrides = self._overrides.get(key)
+            if not overrides:
+                return ["|".join(d) for d in rows]
+            out = []
+            for d in rows:
+                d = list(d)
+                for (train, index), value in overrides.items():
+                    if train == d[3]:
+                        d[index] = value
+                out.append("|".join(d))
+            return out
+
+
+class _Throttle:
+    """滑动窗口限流"""
+
+    def __init__(self, max_rps: float):
+        self.max_rps = max_rps
+        self._times: deque = deque()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if self.max_rps <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            while self._times and now - self._times[0] > 1.0:
+                self._times.popleft()
+            if len(self._times) >= self.max_rps:
+                return False
+            self._times.append(now)
+            return True
+
+
+class Mock12306Server:
+    """在后台线程运行的模拟服务器"""
+
+    def __init__(self, scenario: Optional[Scenario] = None, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: Tuple[float, float] = (0, 0), slow_ratio: float = 0.0, slow_ms: float = 2000,
+                 max_rps: float = 0, throttle_mode: str = "html", station_delay_ms: float = 0):
+        """
+        :param scenario: 余票场景
+        :param port: 监听端口，0 为自动分配
+        :param latency_ms: 查询接口随机延迟区间（毫秒）
+        :param slow_ratio: 慢请求比例
+        :param slow_ms: 慢请求额外延迟（毫秒）
+        :param max_rps: 每秒最多处理的查询数，0 为不限
+        :param throttle_mode: 超限时的响应，"html"（200 + 错误页）或 "429"
+        :param station_delay_ms: station_name.js 的响应延迟（毫秒），模拟慢速车站同步
+        """
+        self.scenario = scenario or Scenario()
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self.throttle = _Throttle(max_rps)
+        self.throttle_mode = throttle_mode
+        self.station_delay_ms = station_delay_ms
+        self.request_counts: Dict[str, int] = {"station": 0, "init": 0, "query": 0, "throttled": 0}
+        self._counts_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _count(self, name: str):
+        with self._counts_lock:
+            self.request_counts[name] += 1
+
+    def _delay(self):
+        low, high = self.latency_ms
+        delay = random.uniform(low, high) if high > 0 else 0
+        if self.slow_ratio and random.random() < self.slow_ratio:
+            delay += self.slow_ms
+        if delay:
+            time.sleep(delay / 1000)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status: int, body: str, content_type: str):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                path = parts.path
+                if path.endswith("/station_name.js"):
+                    server._count("station")
+                    if server.station_delay_ms:
+                        time.sleep(server.station_delay_ms / 1000)
+                    self._send(200, station_name_js(), "application/javascript; charset=utf-8")
+                elif path == "/otn/leftTicket/init":
+                    server._count("init")
+                    self._send(200, "<html><body>init</body></html>", "text/html; charset=utf-8")
+                elif path == "/otn/leftTicket/query":
+                    server._count("query")
+                    if not server.throttle.allow():
+                        server._count("throttled")
+                        if server.throttle_mode == "429":
+                            self._send(429, "Too Many Requests", "text/plain; charset=utf-8")
+                        else:
+                            self._send(200, THROTTLE_HTML, "text/html; charset=utf-8")
+                        return
+                    server._delay()
+                    qs = parse_qs(parts.query)
+                    key = (qs.get("leftTicketDTO.from_station", [""])[0],
+                           qs.get("leftTicketDTO.to_station", [""])[0],
+                           qs.get("leftTicketDTO.train_date", [""])[0])
+                    payload = {"httpstatus": 200, "status": True,
+                               "data": {"flag": "1", "result": server.scenario.result(key), "map": {}}}
+                    self._send(200, json.dumps(payload, ensure_ascii=False), "application/json;charset=UTF-8")
+                else:
+                    self._send(404, "not found", "text/plain; charset=utf-8")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 1024
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="mock-12306", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地 12306 模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8306)
+    parser.add_argument("--scenario", help="场景文件（JSON）")
+    parser.add_argument("--rows", type=int, default=40, help="每条线路的车次数")
+    parser.add_argument("--availability", type=float, default=0.3, help="基础有票概率")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0, 0], metavar=("MIN_MS", "MAX_MS"))
+    parser.add_argument("--max-rps", type=float, default=0, help="限流阈值（每秒查询数）")
+    parser.add_argument("--throttle-mode", choices=["html", "429"], default="html")
+    parser.add_argument("--station-delay", type=float, default=0, help="station_name.js 响应延迟（毫秒）")
+    args = parser.parse_args(argv)
+
+    conf = {}
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as f:
+            conf = json.load(f)
+    throttle = conf.get("throttle", {})
+    scenario = Scenario(conf.get("rows", args.rows), conf.get("availability", args.availability),
+                        conf.get("seed", 12306), conf.get("events"))
+    server = Mock12306Server(scenario, args.host, args.port,
+                             tuple(conf.get("latency_ms", args.latency)),
+                             conf.get("slow_ratio", 0.0), conf.get("slow_ms", 2000),
+                             throttle.get("max_rps", args.max_rps), throttle.get("mode", args.throttle_mode),
+                             conf.get("station_delay_ms", args.station_delay))
+    server.start()
+    print(f"模拟服务器已启动: {server.base_url}  (Ctrl+C 退出)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+合成 12306 余票查询结果
+
+按 leftTicket/query 返回的 data.result 字段布局生成 '|' 分隔的行：
+    3: 车次  6/7: 出发/到达站代码  8/9/10: 开点/到点/历时
+    23: 软卧/一等卧  24: 软座  26: 无座  28: 硬卧/二等卧  29: 硬座
+    30: 二等座  31: 一等座  32: 商务/特等座
+其余字段填充为与真实数据长度相近的占位内容。
+"""
+
+import random
+from typing import Dict, List, Optional
+
+
+FIELD_COUNT = 57
+
+# 模拟同城多站：城市 -> [(站名, 代码)]
+STATIONS = {
+    "北京": [("北京", "BJP"), ("北京南", "VNP"), ("北京西", "BXP"), ("北京丰台", "FTP")],
+    "上海": [("上海", "SHH"), ("上海虹桥", "AOH"), ("上海南", "SNH"), ("上海西", "SXH")],
+    "广州": [("广州", "GZQ"), ("广州南", "IZQ"), ("广州东", "GGQ")],
+    "深圳": [("深圳", "SZQ"), ("深圳北", "IOQ"), ("福田", "NZQ")],
+}
+
+SEAT_INDEXES = {
+    "商/特": 32, "一等座": 31, "二等座": 30, "一等/软卧": 23,
+    "二等/硬卧": 28, "软座": 24, "硬座": 29, "无座": 26,
+}
+
+# 各车型实际存在的坐席（其余为空，即 "--"）
+SEATS_BY_KIND = {
+    "G": ("商/特", "一等座", "二等座", "无座"),
+    "D": ("一等座", "二等座", "无座"),
+    "C": ("一等座", "二等座", "无座"),
+    "S": ("二等座", "无座"),
+    "K": ("一等/软卧", "二等/硬卧", "硬座", "无座"),
+    "T": ("一等/软卧", "二等/硬卧", "硬座", "无座"),
+    "Z": ("一等/软卧", "二等/硬卧", "硬座", "无座"),
+}
+
+# 车次前缀的默认权重
+DEFAULT_MIX = {"G": 0.45, "D": 0.2, "C": 0.05, "S": 0.1, "K": 0.1, "T": 0.05, "Z": 0.05}
+
+
+def station_codes() -> Dict[str, str]:
+    """合成数据使用的 站名 -> 代码 映射"""
+    return {name: code for stations in STATIONS.values() for name, code in stations}
+
+
+def _seat_value(rng: random.Random, availability: float) -> str:
+    r = rng.random()
+    if r >= availability:
+        return "无"
+    if r < availability * 0.4:
+        return "有"
+    return str(rng.randint(1, 20))
+
+
+def make_row(rng: random.Random, train_no: str, from_code: str, to_code: str,
+             availability: float = 0.3, date: str = "20261001") -> str:
+    """
+    生成一行查询结果
+    :param availability: 每个坐席有票的概率
+    """
+    d = [""] * FIELD_COUNT
+    d[0] = "".join(rng.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789%") for _ in range(160))
+    d[1] = "预订"
+    d[2] = f"{rng.randint(100000, 999999)}{train_no}0"
+    d[3] = train_no
+    d[4], d[5] = from_code, to_code
+    d[6], d[7] = from_code, to_code
+    dep = rng.randint(6 * 60, 22 * 60)
+    dur = rng.randint(30, 15 * 60)
+    arr = (dep + dur) % (24 * 60)
+    d[8] = f"{dep // 60:02d}:{dep % 60:02d}"
+    d[9] = f"{arr // 60:02d}:{arr % 60:02d}"
+    d[10] = f"{dur // 60:02d}:{dur % 60:02d}"
+    d[11] = "Y"
+    d[12] = "".join(rng.choice("0123456789ABCDEF") for _ in range(40))
+    d[13] = date
+    d[14] = "3"
+    d[15] = "P2"
+    d[16], d[17] = "01", f"{rng.randint(2, 20):02d}"
+    d[18], d[19] = "1", "0"
+    kind = train_no[0] if not train_no[0].isdigit() else "K"
+    for seat in SEATS_BY_KIND.get(kind, SEATS_BY_KIND["K"]):
+        d[SEAT_INDEXES[seat]] = _seat_value(rng, availability)
+    d[34] = "O0M090"
+    d[35] = "OM9"
+    d[36] = "1"
+    return "|".join(d)
+
+
+def generate_rows(count: int, seed: int = 12306, availability: float = 0.3,
+                  mix: Optional[Dict[str, float]] = None,
+                  from_city: str = "北京", to_city: str = "上海", date: str = "20261001") -> List[str]:
+    """
+    生成多行查询结果（同一种子生成的数据完全一致）
+    :param count: 行数
+    :param seed: 随机种子
+    :param availability: 坐席有票概率
+    :param mix: 车次前缀权重，默认 DEFAULT_MIX（含 S 字头与 D/C 字头）
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    prefixes, weights = zip(*mix.items())
+    from_codes = [code for _, code in STATIONS.get(from_city, [(from_city, "AAA")])]
+    to_codes = [code for _, code in STATIONS.get(to_city, [(to_city, "BBB")])]
+
+    rows = []
+    for _ in range(count):
+        prefix = rng.choices(prefixes, weights)[0]
+        if prefix in "DC":
+            # D/C 字头覆盖低号段（智能模式归为普通车）与高号段
+            number = rng.choice([rng.randint(1, 899), rng.randint(900, 9999)])
+        else:
+            number = rng.randint(1, 9999)
+        rows.append(make_row(rng, f"{prefix}{number}", rng.choice(from_codes), rng.choice(to_codes), availability, date))
+    return rows
+
+
+def city_codes(code: str) -> List[str]:
+    """某车站所在城市的全部车站代码（未知代码原样返回）"""
+    for stations in STATIONS.values():
+        codes = [c for _, c in stations]
+        if code in codes:
+            return codes
+    return [code]
+
+
+def station_name_js() -> str:
+    """按 12306 station_name.js 格式输出合成车站表"""
+    items = []
+    index = 0
+    for city, stations in STATIONS.items():
+        for name, code in stations:
+            items.append(f"@{code.lower()}|{name}|{code}|{code.lower()}|{code.lower()}|{index}|{index:04d}|{city}|||")
+            index += 1
+    return "var station_names ='" + "".join(items) + "';"
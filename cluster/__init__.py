@@ -0,0 +1,10 @@
+"""
+分片监控模块
+"""
+
+from .hashring import HashRing
+from .protocol import send_message, read_message
+from .coordinator import Coordinator
+from .worker import Worker
+
+__all__ = ['HashRing', 'send_message', 'read_message', 'Coordinator', 'Worker']
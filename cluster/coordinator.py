@@ -0,0 +1,210 @@
+"""
+协调者：接受工作进程连接，按一致性哈希分配监控任务，汇总结果并统一去重通知
+"""
+
+import time
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from notification import TicketInfo
+from .hashring import HashRing
+from .protocol import send_message, read_message
+
+
+RouteKey = Tuple[str, str, str]  # (始发, 到达, 日期)
+
+
+def job_id(key: RouteKey) -> str:
+    return "|".join(key)
+
+
+class _WorkerConnection:
+    """一个已连接的工作进程"""
+
+    def __init__(self, name: str, sock: socket.socket, rfile, wfile):
+        self.name = name
+        self.sock = sock
+        self.rfile = rfile
+        self.wfile = wfile
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.jobs: List[str] = []
+        self.results = 0
+
+    def send(self, message: Dict) -> bool:
+        try:
+            send_message(self.wfile, message, self.lock)
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class Coordinator:
+    """分片监控协调者"""
+
+    def __init__(self, jobs: List[RouteKey],
+                 on_result: Callable[[RouteKey, bool, int, List[TicketInfo]], None],
+                 host: str = "127.0.0.1", port: int = 0, interval: float = 180,
+                 heartbeat_timeout: float = 20, logger=None):
+        """
+        :param jobs: 监控任务 (始发, 到达, 日期)
+        :param on_result: 结果回调 (任务, 是否成功, 车次数, 有票车票列表)，在协调者内串行调用
+        :param interval: 工作进程对每个任务的查询间隔（秒）
+        :param heartbeat_timeout: 超过该时间未收到工作进程消息视为失联
+        """
+        self.jobs = {job_id(key): key for key in jobs}
+        self.on_result = on_result
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.logger = logger
+        self.ring = HashRing()
+        self.workers: Dict[str, _WorkerConnection] = {}
+        self._lock = threading.Lock()          # 保护 workers / ring
+        self._result_lock = threading.Lock()   # 串行化结果回调（通知去重不需要额外加锁）
+        self._stop = threading.Event()
+        self._server: Optional[socket.socket] = None
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def start(self):
+        self._server = socket.create_server((self.host, self.port), reuse_port=False)
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept_loop, name="coordinator-accept", daemon=True).start()
+        threading.Thread(target=self._watch_loop, name="coordinator-watch", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            workers = list(self.workers.values())
+        for worker in workers:
+            worker.send({"type": "stop"})
+            worker.close()
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    def status(self) -> Dict[str, Dict]:
+        """各工作进程的任务数与已上报结果数"""
+        with self._lock:
+            return {name: {"jobs": len(w.jobs), "results": w.results} for name, w in self.workers.items()}
+
+    def _log(self, level: str, msg: str, *args, **kwargs):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args, **kwargs)
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), name="coordinator-conn", daemon=True).start()
+
+    def _serve(self, sock: socket.socket):
+        rfile, wfile = sock.makefile("rb"), sock.makefile("wb")
+        try:
+            hello = read_message(rfile)
+        except (OSError, ValueError):
+            hello = None
+        if not hello or hello.get("type") != "hello":
+            sock.close()
+            return
+        name = f"{hello.get('host', '?')}:{hello.get('pid', '?')}#{hello.get('worker', '0')}"
+        worker = _WorkerConnection(name, sock, rfile, wfile)
+        with self._lock:
+            self.workers[name] = worker
+            self.ring.add(name)
+        self._log("info", "工作进程已连接: %s", name)
+        self._rebalance()
+
+        try:
+            while not self._stop.is_set():
+                message = read_message(rfile)
+                if message is None:
+                    break
+                worker.last_seen = time.monotonic()
+                if message.get("type") == "result":
+                    self._handle_result(worker, message)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._drop(worker)
+
+    def _handle_result(self, worker: _WorkerConnection, message: Dict):
+        key = tuple(message.get("key", ()))
+        if job_id(key) not in self.jobs:
+            return
+        worker.results += 1
+        tickets = [TicketInfo.from_dict(t) for t in message.get("tickets", [])]
+        with self._result_lock:
+            try:
+                self.on_result(key, bool(message.get("ok")), int(message.get("rows", 0)), tickets)
+            except Exception as e:
+                self._log("error", "处理工作进程结果失败: %s", e, exc_info=True)
+
+    def _drop(self, worker: _WorkerConnection):
+        with self._lock:
+            if self.workers.get(worker.name) is not worker:
+                return
+            del self.workers[worker.name]
+            self.ring.remove(worker.name)
+        worker.close()
+        if not self._stop.is_set():
+            self._log("warning", "工作进程已断开，重新分配任务: %s", worker.name)
+            self._rebalance()
+
+    def update(self, jobs: Optional[List[RouteKey]] = None, interval: Optional[float] = None):
+        """
+        运行中更新任务列表或查询间隔（配置、订阅文件热加载时调用），重新分配后通知所有工作进程
+        :param jobs: 新的任务列表，None 表示不变
+        :param interval: 新的查询间隔（秒），None 表示不变
+        """
+        with self._lock:
+            if jobs is not None:
+                self.jobs = {job_id(key): key for key in jobs}
+            if interval is not None:
+                self.interval = interval
+        self._rebalance(force=True)
+
+    def _rebalance(self, force: bool = False):
+        """
+        按当前存活的工作进程重新计算分配，只通知分配有变化的进程
+        :param force: 通知所有工作进程（任务内容或查询间隔变化时）
+        """
+        with self._lock:
+            assignment = self.ring.assign(self.jobs)
+            changed = []
+            for name, ids in assignment.items():
+                worker = self.workers.get(name)
+                ids = sorted(ids)
+                if worker and (force or ids != worker.jobs):
+                    worker.jobs = ids
+                    changed.append(worker)
+        for worker in changed:
+            worker.send({"type": "assign", "interval": self.interval,
+                         "jobs": [list(self.jobs[i]) for i in worker.jobs]})
+        if changed:
+            self._log("info", "任务分配: %s", {w.name: len(w.jobs) for w in changed})
+
+    def _watch_loop(self):
+        """心跳超时检测：关闭连接后由读取线程完成移除与重新分配"""
+        while not self._stop.wait(1.0):
+            now = time.monotonic()
+            with self._lock:
+                stale = [w for w in self.workers.values() if now - w.last_seen > self.heartbeat_timeout]
+            for worker in stale:
+                self._log("warning", "工作进程心跳超时: %s", worker.name)
+                worker.close()
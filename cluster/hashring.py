@@ -0,0 +1,59 @@
+"""
+一致性哈希环：节点增减时只有相邻区间的任务需要迁移
+"""
+
+import hashlib
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """带虚拟节点的一致性哈希环"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 100):
+        """
+        :param nodes: 初始节点
+        :param replicas: 每个节点的虚拟节点数，越大分布越均匀
+        """
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            point = _hash(f"{node}#{i}")
+            self._owners[point] = node
+        self._points = sorted(self._owners)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        self._owners = {p: n for p, n in self._owners.items() if n != node}
+        self._points = sorted(self._owners)
+
+    def get(self, key: str) -> Optional[str]:
+        """负责该键的节点；环为空时为 None"""
+        if not self._points:
+            return None
+        i = bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[self._points[i]]
+
+    def assign(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """按节点分组 {node: [key]}"""
+        result: Dict[str, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            node = self.get(key)
+            if node is not None:
+                result[node].append(key)
+        return result
@@ -0,0 +1,35 @@
+"""
+协调者与工作进程之间的消息协议：TCP 上每行一个 JSON 对象
+
+工作进程 -> 协调者:
+    {"type": "hello", "worker": 编号, "host": 主机名, "pid": 进程号}
+    {"type": "heartbeat"}
+    {"type": "result", "key": [始发, 到达, 日期], "ok": 是否成功, "rows": 车次数, "tickets": [TicketInfo 字典], "elapsed": 秒}
+协调者 -> 工作进程:
+    {"type": "assign", "jobs": [[始发, 到达, 日期], ...], "interval": 秒}
+    {"type": "stop"}
+"""
+
+import json
+import threading
+from typing import Dict, Optional
+
+
+def send_message(wfile, message: Dict, lock: Optional[threading.Lock] = None):
+    """写入一条消息（多线程写同一连接时传入锁）"""
+    data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+    if lock is None:
+        wfile.write(data)
+        wfile.flush()
+        return
+    with lock:
+        wfile.write(data)
+        wfile.flush()
+
+
+def read_message(rfile) -> Optional[Dict]:
+    """读取一条消息，连接关闭时返回 None"""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
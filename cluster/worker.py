@@ -0,0 +1,147 @@
+"""
+工作进程：连接协调者，轮询分配到的监控任务并上报结果
+"""
+
+import os
+import time
+import socket
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from notification import TicketInfo
+from .protocol import send_message, read_message
+
+
+RouteKey = Tuple[str, str, str]  # (始发, 到达, 日期)
+PollResult = Tuple[bool, int, List[TicketInfo]]  # (是否成功, 车次数, 有票车票)
+
+
+class Worker:
+    """分片监控工作进程"""
+
+    def __init__(self, poll: Callable[[RouteKey], PollResult], host: str, port: int, worker_id: str = "0",
+                 heartbeat_interval: float = 5, reconnect_seconds: float = 30, logger=None):
+        """
+        :param poll: 查询一个任务的函数
+        :param worker_id: 工作进程编号（同一主机上区分多个进程）
+        :param heartbeat_interval: 心跳间隔（秒）
+        :param reconnect_seconds: 与协调者断开后持续重连的时长，超时退出
+        """
+        self.poll = poll
+        self.host = host
+        self.port = port
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_seconds = reconnect_seconds
+        self.logger = logger
+        self.jobs: List[RouteKey] = []
+        self.interval = 180.0
+        self.last_polled: Dict[RouteKey, float] = {}  # 各任务上次查询的时间（monotonic），重新分配后据此续查
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _log(self, level: str, msg: str, *args, **kwargs):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args, **kwargs)
+
+    def _connect(self) -> Optional[socket.socket]:
+        deadline = time.monotonic() + self.reconnect_seconds
+        while not self._stop.is_set():
+            try:
+                return socket.create_connection((self.host, self.port), timeout=10)
+            except OSError:
+                if time.monotonic() > deadline:
+                    return None
+                time.sleep(1)
+        return None
+
+    def run(self) -> int:
+        """运行直到协调者要求停止或无法重连；返回退出码"""
+        while not self._stop.is_set():
+            sock = self._connect()
+            if sock is None:
+                self._log("error", "无法连接协调者 %s:%d，退出", self.host, self.port)
+                return 1
+            sock.settimeout(None)
+            self._session(sock)
+            with self._lock:
+                self.jobs = []
+        return 0
+
+    def stop(self):
+        self._stop.set()
+        self._changed.set()
+
+    def _session(self, sock: socket.socket):
+        rfile, wfile = sock.makefile("rb"), sock.makefile("wb")
+        lock = threading.Lock()
+        connected = threading.Event()
+        connected.set()
+
+        def send(message):
+            try:
+                send_message(wfile, message, lock)
+            except OSError:
+                connected.clear()
+                self._changed.set()
+
+        send({"type": "hello", "worker": self.worker_id, "host": socket.gethostname(), "pid": os.getpid()})
+        self._log("info", "已连接协调者 %s:%d", self.host, self.port)
+
+        def reader():
+            try:
+                while True:
+                    message = read_message(rfile)
+                    if message is None:
+                        break
+                    if message.get("type") == "assign":
+                        with self._lock:
+                            self.jobs = [tuple(job) for job in message.get("jobs", [])]
+                            self.interval = float(message.get("interval", self.interval))
+                        self._log("info", "分配到 %d 个任务", len(self.jobs))
+                        self._changed.set()
+                    elif message.get("type") == "stop":
+                        self.stop()
+                        break
+            except (OSError, ValueError):
+                pass
+            connected.clear()
+            self._changed.set()
+
+        def heartbeat():
+            while connected.is_set() and not self._stop.wait(self.heartbeat_interval):
+                send({"type": "heartbeat"})
+
+        threading.Thread(target=reader, name="worker-reader", daemon=True).start()
+        threading.Thread(target=heartbeat, name="worker-heartbeat", daemon=True).start()
+
+        while connected.is_set() and not self._stop.is_set():
+            self._changed.clear()
+            with self._lock:
+                jobs, interval = list(self.jobs), self.interval
+            # 按任务记录上次查询时间：分配更新后不从头重查，只查已到期的任务，最久未查的优先
+            last = self.last_polled = {key: self.last_polled[key] for key in jobs if key in self.last_polled}
+            now = time.monotonic()
+            due = sorted((key for key in jobs if now - last.get(key, float("-inf")) >= interval),
+                         key=lambda k: last.get(k, float("-inf")))
+            for key in due:
+                if self._changed.is_set():
+                    break
+                poll_started = last[key] = time.monotonic()
+                try:
+                    ok, rows, tickets = self.poll(key)
+                except Exception as e:
+                    self._log("error", "查询任务失败 %s: %s", key, e, exc_info=True)
+                    ok, rows, tickets = False, 0, []
+                send({"type": "result", "key": list(key), "ok": ok, "rows": rows,
+                      "tickets": [t.to_dict() for t in tickets],
+                      "elapsed": round(time.monotonic() - poll_started, 3)})
+            if self._changed.is_set():
+                continue
+            next_due = min((last[key] + interval for key in jobs if key in last), default=now + interval)
+            self._changed.wait(max(0.0, next_due - time.monotonic()))
+        try:
+            sock.close()
+        except OSError:
+            pass
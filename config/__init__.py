@@ -0,0 +1,7 @@
+"""
+配置热加载模块
+"""
+
+from .watcher import ConfigWatcher, changed_sections
+
+__all__ = ['ConfigWatcher', 'changed_sections']
@@ -0,0 +1,84 @@
+"""
+配置文件热加载：轮询文件的修改时间与大小，变化时重新读取并回调
+"""
+
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def changed_sections(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """
+    比较两份配置
+    :return: 内容发生变化（含新增、删除）的顶层配置段名称
+    """
+    return [key for key in sorted(set(old) | set(new)) if old.get(key) != new.get(key)]
+
+
+class ConfigWatcher:
+    """在后台线程中监视一个 JSON 文件"""
+
+    def __init__(self, path: str, on_change: Callable[[Dict], None], interval: float = 2.0, logger=None):
+        """
+        :param path: 被监视的文件
+        :param on_change: 文件内容变化时的回调，参数为解析后的 JSON；在监视线程中调用
+        :param interval: 检查间隔（秒），每次检查只做一次 stat
+        :param logger: 日志器（可选）
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.logger = logger
+        self._stamp = self._stat()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _log(self, level: str, msg: str, *args):
+        if self.logger:
+            getattr(self.logger, level)(msg, *args)
+
+    def mark_current(self):
+        """程序自身写入文件后调用，避免把自己的写入当作外部修改"""
+        self._stamp = self._stat()
+
+    def check(self) -> bool:
+        """
+        检查一次文件是否变化，变化且能解析时调用回调
+        :return: 是否调用了回调
+        """
+        stamp = self._stat()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            # 编辑器保存到一半或格式错误：保持当前配置，等待下一次修改
+            self._log("error", "配置文件无法解析，保持当前配置: %s (%s)", self.path, e)
+            return False
+        try:
+            self.on_change(data)
+        except Exception as e:
+            self._log("error", "应用配置变更失败: %s", e)
+        return True
+
+    def start(self) -> "ConfigWatcher":
+        self._thread = threading.Thread(target=self._loop, name="config-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,8 @@
+"""
+终端显示模块
+"""
+
+from .renderer import TerminalRenderer, display_width
+from .keyboard import KeyReader, ENTER
+
+__all__ = ['TerminalRenderer', 'display_width', 'KeyReader', 'ENTER']
@@ -0,0 +1,140 @@
+"""
+跨平台按键读取：阻塞等待 键盘输入 或 超时，期间不轮询
+
+Linux/macOS 使用 termios 进入 cbreak 模式并用 select 等待 stdin；
+Windows 使用 WaitForSingleObject 等待控制台输入句柄，再用 msvcrt 读取按键。
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+if os.name == "nt":
+    import ctypes
+    import msvcrt
+    from ctypes import wintypes
+    termios = None
+
+    KEY_EVENT = 0x0001
+
+    class _KeyEventRecord(ctypes.Structure):
+        _fields_ = [("bKeyDown", wintypes.BOOL), ("wRepeatCount", wintypes.WORD),
+                    ("wVirtualKeyCode", wintypes.WORD), ("wVirtualScanCode", wintypes.WORD),
+                    ("uChar", wintypes.WCHAR), ("dwControlKeyState", wintypes.DWORD)]
+
+    class _InputRecord(ctypes.Structure):
+        # INPUT_RECORD：联合体中按键事件与鼠标事件同为 16 字节，这里只需读取按键事件
+        _fields_ = [("EventType", wintypes.WORD), ("KeyEvent", _KeyEventRecord)]
+else:
+    import select
+    try:
+        import termios
+        import tty
+    except ImportError:
+        termios = None
+
+
+ENTER = "\r"
+
+
+class KeyReader:
+    """按键读取器，需在 with 语句中使用（退出时恢复终端设置）"""
+
+    def __init__(self, stream=None):
+        """
+        :param stream: 输入流，默认 sys.stdin
+        """
+        self.stream = stream or sys.stdin
+        self._saved = None
+        self._handle = None
+
+    def __enter__(self) -> "KeyReader":
+        if os.name == "nt":
+            self._handle = ctypes.windll.kernel32.GetStdHandle(-10)  # STD_INPUT_HANDLE
+        else:
+            self._enter_cbreak()
+        return self
+
+    def __exit__(self, *exc):
+        self._restore()
+
+    def _enter_cbreak(self):
+        if termios is None or not self.stream.isatty():
+            return
+        fd = self.stream.fileno()
+        self._saved = termios.tcgetattr(fd)
+        tty.setcbreak(fd)
+
+    def _restore(self):
+        if self._saved is not None:
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+    @contextmanager
+    def suspended(self):
+        """临时恢复正常输入模式（用于 input() 提示）"""
+        cbreak = self._saved is not None
+        self._restore()
+        try:
+            yield
+        finally:
+            if cbreak:
+                self._enter_cbreak()
+
+    def wait(self, timeout: float) -> Optional[str]:
+        """
+        等待一个按键
+        :param timeout: 最长等待秒数
+        :return: 小写按键字符（回车为 ENTER）；超时返回 None
+        """
+        if os.name == "nt":
+            return self._wait_windows(timeout)
+        return self._wait_posix(timeout)
+
+    @staticmethod
+    def _translate(ch: str) -> str:
+        return ENTER if ch in ("\r", "\n") else ch.lower()
+
+    def _wait_posix(self, timeout: float) -> Optional[str]:
+        fd = self.stream.fileno()
+        ready, _, _ = select.select([fd], [], [], max(0.0, timeout))
+        if not ready:
+            return None
+        data = os.read(fd, 32)
+        if not data:
+            # 输入已关闭（如管道结束），按超时处理并避免空转
+            time.sleep(max(0.0, timeout))
+            return None
+        return self._translate(data.decode("utf-8", "ignore")[:1] or " ")
+
+    def _wait_windows(self, timeout: float) -> Optional[str]:
+        kernel32 = ctypes.windll.kernel32
+        deadline = time.monotonic() + timeout
+        while True:
+            if msvcrt.kbhit():
+                ch = msvcrt.getwch()
+                if ch in ("\x00", "\xe0"):
+                    msvcrt.getwch()  # 功能键/方向键的第二个字节，忽略
+                    continue
+                return self._translate(ch)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if kernel32.WaitForSingleObject(self._handle, int(remaining * 1000)) == 0:
+                self._discard_non_key_events()
+
+    def _discard_non_key_events(self):
+        """
+        鼠标、焦点、按键抬起等事件也会唤醒等待，逐条读掉队首的这类事件以免反复唤醒
+        遇到按下按键的事件即停止，留给 msvcrt 读取（不清空整个缓冲区，以免丢掉刚到达的按键）
+        """
+        kernel32 = ctypes.windll.kernel32
+        record = _InputRecord()
+        count = wintypes.DWORD()
+        while kernel32.PeekConsoleInputW(self._handle, ctypes.byref(record), 1, ctypes.byref(count)) and count.value:
+            if record.EventType == KEY_EVENT and record.KeyEvent.bKeyDown and msvcrt.kbhit():
+                return
+            # 非按键事件，或 msvcrt 不会读取的按下事件（如单独按下 Shift）
+            kernel32.ReadConsoleInputW(self._handle, ctypes.byref(record), 1, ctypes.byref(count))
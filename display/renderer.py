@@ -0,0 +1,137 @@
+"""
+增量终端渲染
+
+保留上一帧的内容，新一帧只重绘有变化的单元格/行（ANSI 光标定位），
+不再调用 cls/clear 清屏，避免闪烁和启动外部进程的开销。
+表格样式与 PrettyTable 默认样式一致（居中对齐、+---+ 边框）。
+"""
+
+import re
+import sys
+import shutil
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+Line = Tuple[str, ...]  # 一行由若干片段组成，片段拼接即整行文本
+
+
+@lru_cache(maxsize=4096)
+def display_width(text: str) -> int:
+    """终端显示宽度（忽略颜色控制符，中文等全角字符占 2 列）"""
+    text = ANSI_RE.sub("", text)
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+
+def _center(text: str, width: int) -> str:
+    pad = width - display_width(text)
+    left = pad // 2
+    return " " * left + text + " " * (pad - left)
+
+
+class TerminalRenderer:
+    """增量刷新的终端渲染器"""
+
+    def __init__(self, stream=None):
+        """
+        :param stream: 输出流，默认 sys.stdout
+        """
+        self.stream = stream or sys.stdout
+        self._prev: List[Line] = []
+        self._frame: Optional[List[Line]] = None
+        self._widths: Dict[Tuple[str, ...], List[int]] = {}  # 表头 -> 列宽（只增不减，避免整表重排）
+        self._size = None
+        self._full = True
+
+    @property
+    def collecting(self) -> bool:
+        """是否正在组装一帧"""
+        return self._frame is not None
+
+    def invalidate(self):
+        """屏幕内容被其他输出打乱（如输入提示）后调用，下一帧整屏重绘"""
+        self._full = True
+
+    def clear(self):
+        """清屏（ANSI 控制符，不启动外部进程）"""
+        self.stream.write("\033[2J\033[H")
+        self.stream.flush()
+        self._prev = []
+        self._full = True
+
+    def begin(self):
+        """开始组装一帧"""
+        self._frame = []
+
+    def line(self, text: str = ""):
+        """追加文本行（可含换行）"""
+        for part in text.split("\n"):
+            self._frame.append((part,))
+
+    def table(self, headers: Sequence[str], rows: List[Sequence[str]]):
+        """
+        追加表格
+        :param headers: 表头
+        :param rows: 行数据（单元格可带颜色控制符）
+        """
+        key = tuple(headers)
+        widths = self._widths.get(key)
+        if widths is None:
+            widths = self._widths[key] = [display_width(h) for h in headers]
+        for row in rows:
+            for i, cell in enumerate(row):
+                w = display_width(cell)
+                if w > widths[i]:
+                    widths[i] = w
+
+        border = ("+" + "+".join("-" * (w + 2) for w in widths) + "+",)
+        self._frame.append(border)
+        self._frame.append(self._row(headers, widths))
+        self._frame.append(border)
+        for row in rows:
+            self._frame.append(self._row(row, widths))
+        self._frame.append(border)
+
+    @staticmethod
+    def _row(cells: Sequence[str], widths: List[int]) -> Line:
+        return ("|",) + tuple(f" {_center(cell, w)} |" for cell, w in zip(cells, widths))
+
+    def flush(self):
+        """输出当前帧：只重绘与上一帧不同的部分"""
+        frame, self._frame = self._frame or [], None
+        size = shutil.get_terminal_size()
+        # 帧高度超过终端时光标定位不可靠，退化为整屏重绘
+        full = self._full or size != self._size or len(frame) >= size.lines
+        out = []
+        if full:
+            out.append("\033[H")
+            for line in frame:
+                out.append("".join(line) + "\033[K\n")
+            out.append("\033[J")
+        else:
+            prev = self._prev
+            for i, line in enumerate(frame):
+                old = prev[i] if i < len(prev) else None
+                if old == line:
+                    continue
+                if old is not None and len(old) == len(line) and \
+                        all(display_width(a) == display_width(b) for a, b in zip(old, line)):
+                    # 布局相同，只重绘变化的单元格
+                    col = 1
+                    for a, b in zip(old, line):
+                        if a != b:
+                            out.append(f"\033[{i + 1};{col}H{b}")
+                        col += display_width(a)
+                else:
+                    out.append(f"\033[{i + 1};1H{''.join(line)}\033[K")
+            if len(frame) < len(prev):
+                out.append(f"\033[{len(frame) + 1};1H\033[J")
+            out.append(f"\033[{len(frame) + 1};1H")
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self._prev = frame
+        self._size = size
+        self._full = False
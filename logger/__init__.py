@@ -4,5 +4,7 @@
 
 from .ticket_logger import TicketLogger
 from .query_history import QueryHistory
+from .response_archive import ResponseArchive
+from .ticket_export import TicketExporter
 
-__all__ = ['TicketLogger', 'QueryHistory']
+__all__ = ['TicketLogger', 'QueryHistory', 'ResponseArchive', 'TicketExporter']
@@ -20,7 +20,8 @@ class QueryHistory:
         self.history_file = os.path.join(log_dir, "query_history.jsonl")
 
     def record(self, from_station: str, to_station: str, date: str,
-               total_count: int, available_trains: List[str]):
+               total_count: int, available_trains: List[str],
+               available_seats: Optional[Dict[str, List[str]]] = None):
         """
         记录一次查询
         :param from_station: 始发站
@@ -28,6 +29,7 @@ class QueryHistory:
         :param date: 出发日期
         :param total_count: 返回的总记录数
         :param available_trains: 有票的车次列表
+        :param available_seats: 各车次有票的坐席 {车次: [坐席类型]}（可选，供统计分析使用）
         """
         record = {
             "timestamp": datetime.now().isoformat(),
@@ -38,6 +40,8 @@ class QueryHistory:
             "available_count": len(available_trains),
             "available_trains": available_trains
         }
+        if available_seats is not None:
+            record["available_seats"] = available_seats
 
         try:
             with open(self.history_file, "a", encoding="utf-8") as f:
@@ -47,21 +51,41 @@ class QueryHistory:
 
     def get_recent(self, limit: int = 100) -> List[Dict]:
         """
-        获取最近的查询历史
+        获取最近的查询历史（从文件末尾向前读取，不载入整个文件）
+        无法解析的行（如正在追加、尚未写完的最后一行）跳过
         :param limit: 获取数量限制
         :return: 查询记录列表
         """
-        records = []
         try:
-            with open(self.history_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        records.append(json.loads(line))
+            lines = self._tail_lines(limit)
         except FileNotFoundError:
             return []
 
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
         return records[-limit:]
 
+    def _tail_lines(self, count: int, block_size: int = 65536) -> List[str]:
+        """文件末尾的 count 行（多读一行，补足可能被跳过的未写完的行）"""
+        with open(self.history_file, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= count + 1:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.split(b"\n")
+        if position > 0:
+            # 第一行可能只读到一部分
+            lines = lines[1:]
+        return [line.decode("utf-8", errors="replace") for line in lines[-(count + 1):] if line.strip()]
+
     def get_statistics(self) -> Dict:
         """
         获取查询统计信息
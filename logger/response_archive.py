@@ -0,0 +1,96 @@
+"""
+原始查询响应归档（gzip 压缩、仅追加）
+"""
+
+import os
+import gzip
+import json
+import time
+import zlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class ResponseArchive:
+    """原始查询响应记录器"""
+
+    def __init__(self, archive_dir: str, prefix: str = "responses"):
+        """
+        初始化记录器，按天写入 <prefix>_YYYYMMDD.jsonl.gz
+        :param archive_dir: 归档目录
+        :param prefix: 文件名前缀
+        """
+        self.archive_dir = archive_dir
+        self.prefix = prefix
+        self._file: Optional[gzip.GzipFile] = None
+        self._file_day: Optional[str] = None
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def _open_for(self, day: str) -> gzip.GzipFile:
+        if self._file is not None and self._file_day == day:
+            return self._file
+        self.close()
+        path = os.path.join(self.archive_dir, f"{self.prefix}_{day}.jsonl.gz")
+        # 追加模式：每次打开都会新增一个 gzip 成员，读取时自动拼接
+        self._file = gzip.open(path, "ab")
+        self._file_day = day
+        return self._file
+
+    def record(self, from_station: str, to_station: str, date: str,
+               from_code: str, to_code: str, status: int, body: str, timestamp: Optional[float] = None):
+        """
+        追加一条原始响应
+        :param status: HTTP 状态码
+        :param body: 原始响应文本
+        :param timestamp: 响应时间（默认当前时间）
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        line = json.dumps({
+            "ts": ts,
+            "from": from_station,
+            "to": to_station,
+            "date": date,
+            "from_code": from_code,
+            "to_code": to_code,
+            "status": status,
+            "body": body,
+        }, ensure_ascii=False) + "\n"
+        day = datetime.fromtimestamp(ts).strftime("%Y%m%d")
+        try:
+            with self._lock:
+                f = self._open_for(day)
+                f.write(line.encode("utf-8"))
+                # 同步刷新压缩流，进程异常退出时已写入的记录仍可读取
+                f.flush(zlib.Z_SYNC_FLUSH)
+        except Exception:
+            pass
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+                self._file_day = None
+
+    @staticmethod
+    def read(paths: Iterable[str]) -> Iterator[Dict]:
+        """
+        按顺序读取归档记录
+        未正常关闭的文件末尾缺少 gzip 结束标记，读到该处即停止
+        :param paths: 归档文件路径列表
+        """
+        for path in paths:
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            try:
+                                yield json.loads(line)
+                            except ValueError:
+                                # 异常退出时最后一行可能不完整
+                                continue
+            except EOFError:
+                continue
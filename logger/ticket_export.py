@@ -0,0 +1,101 @@
+"""
+查询结果流式导出（JSON Lines / CSV，可选 gzip，仅追加）
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from typing import Iterable, Optional
+
+# CSV 坐席列顺序，与 TicketInfo.available_seats 的键一致
+SEAT_COLUMNS = ('商/特', '一等座', '二等座', '一等/软卧', '二等/硬卧', '软座', '硬座', '无座')
+CSV_COLUMNS = ('time', 'route', 'train_no', 'from_station', 'to_station', 'date',
+               'departure_time', 'duration') + SEAT_COLUMNS
+
+
+class TicketExporter:
+    """查询结果导出器：所有线路写入同一文件，每次查询逐行追加"""
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        """
+        初始化导出器
+        :param path: 输出文件；以 .gz 结尾时 gzip 压缩
+        :param fmt: "jsonl" 或 "csv"，默认按扩展名判断（.csv / .csv.gz 为 CSV，其余为 JSON Lines）
+        """
+        self.path = path
+        self.compress = path.endswith(".gz")
+        base = path[:-3] if self.compress else path
+        self.fmt = fmt or ("csv" if base.endswith(".csv") else "jsonl")
+        if self.fmt not in ("jsonl", "csv"):
+            raise ValueError(f"不支持的导出格式: {self.fmt}")
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        if self._file is not None:
+            return
+        # 已有内容时不再写 CSV 表头（gzip 文件按成员追加，读取时自动拼接）
+        empty = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if self.compress:
+            raw = gzip.open(self.path, "ab")
+            self._file = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        else:
+            self._file = open(self.path, "a", encoding="utf-8", newline="")
+        if self.fmt == "csv":
+            self._writer = csv.writer(self._file)
+            if empty:
+                self._writer.writerow(CSV_COLUMNS)
+
+    def write(self, route: str, tickets: Iterable, polled_at: Optional[str] = None) -> int:
+        """
+        逐条追加一次查询的结果，tickets 可以是生成器，内存占用与结果条数无关
+        :param route: 线路，如 "北京->上海"
+        :param tickets: TicketInfo 可迭代对象（None 会被跳过）
+        :param polled_at: 查询时间，默认当前时间
+        :return: 写入条数
+        """
+        polled_at = polled_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        written = 0
+        with self._lock:
+            self._open()
+            for ticket in tickets:
+                if ticket is None:
+                    continue
+                if self.fmt == "csv":
+                    seats = ticket.available_seats
+                    self._writer.writerow((polled_at, route, ticket.train_no, ticket.from_station,
+                                           ticket.to_station, ticket.date, ticket.departure_time,
+                                           ticket.duration) + tuple(seats.get(s, "") for s in SEAT_COLUMNS))
+                else:
+                    record = {"time": polled_at, "route": route}
+                    record.update(ticket.to_dict())
+                    self._file.write(json.dumps(record, ensure_ascii=False))
+                    self._file.write("\n")
+                written += 1
+            self._flush()
+            self.count += written
+        return written
+
+    def _flush(self):
+        self._file.flush()
+        if self.compress:
+            # 同步刷新压缩流，进程异常退出时已写入的记录仍可读取
+            self._file.buffer.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                finally:
+                    self._file = None
+                    self._writer = None
@@ -3,12 +3,27 @@
 """
 
 import os
+import gzip
+import queue
+import shutil
 import logging
 import platform
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from typing import Optional
 
 
+def _gzip_namer(name: str) -> str:
+    """轮转文件名追加 .gz 后缀"""
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    """将轮转出的日志文件压缩为 gzip"""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
 class TicketLogger:
     """车票监控日志器"""
 
@@ -20,9 +35,19 @@ class TicketLogger:
         """
         self.log_dir = log_dir
         self.config = config
+        self._listener: Optional[QueueListener] = None
         os.makedirs(log_dir, exist_ok=True)
         self.logger = self._setup_logger()
 
+    def reconfigure(self, config: dict):
+        """
+        按新的日志配置重建 handler（配置文件加载后调用）
+        :param config: 日志配置字典
+        """
+        self._stop_listener()
+        self.config = config
+        self.logger = self._setup_logger()
+
     def _setup_logger(self) -> logging.Logger:
         """配置日志系统"""
         level_str = self.config.get("level", "INFO")
@@ -30,6 +55,8 @@ class TicketLogger:
         max_size = self.config.get("max_size_mb", 10) * 1024 * 1024
         backup_count = self.config.get("backup_count", 5)
         console_output = self.config.get("console_output", False)
+        async_queue = self.config.get("async_queue", False)
+        compress_rotated = self.config.get("compress_rotated", False)
 
         # 主日志文件
         log_file = os.path.join(self.log_dir, "ticket_monitor.log")
@@ -50,29 +77,64 @@ class TicketLogger:
         )
         error_handler.setLevel(logging.ERROR)
 
+        # 轮转文件压缩（异步模式下在后台监听线程中进行）
+        if compress_rotated:
+            for h in (handler, error_handler):
+                h.namer = _gzip_namer
+                h.rotator = _gzip_rotator
+
         # 格式化
         formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] %(message)s',
                                        datefmt='%Y-%m-%d %H:%M:%S')
         handler.setFormatter(formatter)
         error_handler.setFormatter(formatter)
 
-        # 配置logger
-        logger = logging.getLogger('CRTicketMonitor')
-        logger.setLevel(level)
-        # 清除已有的handler
-        logger.handlers.clear()
-        logger.addHandler(handler)
-        logger.addHandler(error_handler)
+        handlers = [handler, error_handler]
 
         # 同时输出到控制台
         if console_output or level == logging.DEBUG:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(level)
             console_handler.setFormatter(formatter)
-            logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        # 配置logger
+        logger = logging.getLogger('CRTicketMonitor')
+        logger.setLevel(level)
+        # 清除已有的handler
+        for h in logger.handlers:
+            h.close()
+        logger.handlers.clear()
+
+        if async_queue:
+            # 异步模式：调用线程中生成消息文本后入队（参数在记录时取值，格式化异常在调用方线程报告），
+            # 加时间前缀、写文件、轮转由后台线程完成
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(QueueHandler(log_queue))
+            self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+            self._listener.start()
+        else:
+            for h in handlers:
+                logger.addHandler(h)
 
         return logger
 
+    def _stop_listener(self):
+        """
+        停止后台日志线程，等待队列中的记录全部写出
+        之后文件 handler 直接挂回 logger（同步写入），退出清理过程中的日志不会留在无人读取的队列里
+        """
+        if self._listener is None:
+            return
+        listener, self._listener = self._listener, None
+        listener.stop()
+        for h in list(self.logger.handlers):
+            if isinstance(h, QueueHandler):
+                self.logger.removeHandler(h)
+                h.close()
+        for h in listener.handlers:
+            self.logger.addHandler(h)
+
     def log_startup(self, version: str = "1.2.0"):
         """记录启动信息"""
         self.logger.info("=" * 60)
@@ -84,18 +146,31 @@ class TicketLogger:
         """记录关闭信息"""
         self.logger.info("CRTicketMonitor 退出")
         self.logger.info("=" * 60)
+        self._stop_listener()
+
+    def is_enabled_for(self, level) -> bool:
+        """
+        判断某级别日志是否会被输出，用于跳过代价较高的日志参数计算
+        :param level: 日志级别，可为 logging 常量或名称（如 "DEBUG"）
+        """
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        return self.logger.isEnabledFor(level)
+
+    # 以下方法均支持 %-style 延迟格式化：logger.debug("查询完成: %s", route)
+    # 级别被禁用时不会进行任何字符串拼接
 
-    def debug(self, msg: str):
-        self.logger.debug(msg)
+    def debug(self, msg: str, *args):
+        self.logger.debug(msg, *args)
 
-    def info(self, msg: str):
-        self.logger.info(msg)
+    def info(self, msg: str, *args):
+        self.logger.info(msg, *args)
 
-    def warning(self, msg: str):
-        self.logger.warning(msg)
+    def warning(self, msg: str, *args):
+        self.logger.warning(msg, *args)
 
-    def error(self, msg: str, exc_info: bool = False):
-        self.logger.error(msg, exc_info=exc_info)
+    def error(self, msg: str, *args, exc_info: bool = False):
+        self.logger.error(msg, *args, exc_info=exc_info)
 
-    def critical(self, msg: str, exc_info: bool = True):
-        self.logger.critical(msg, exc_info=exc_info)
+    def critical(self, msg: str, *args, exc_info: bool = True):
+        self.logger.critical(msg, *args, exc_info=exc_info)
@@ -1,23 +1,69 @@
-import requests
 import time
 import re
 import json
+import copy
 import os
 import sys
-import msvcrt
+import math
 import atexit
-from datetime import datetime
-from prettytable import PrettyTable
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 # 新增：导入日志和通知模块
-from logger import TicketLogger, QueryHistory
-from notification import NotificationManager, NativeWindowsNotification, TicketInfo
+# requests、prettytable、各通知渠道、分片与剖析模块在首次使用时才导入，缩短启动时间
+from logger import TicketLogger, QueryHistory, ResponseArchive, TicketExporter
+from notification import NotificationManager, TicketInfo
+from notification import NO_SEATS, encode_seats
+from metrics import MonitorMetrics
+from network import RateLimiter, SharedResultCache, HttpClient, TransportError, DeadlineExceeded
+from transfer import Leg, join_legs, rank_itineraries
+from parsing import RowSchema, DEFAULT_FIELDS, DEFAULT_FIELD_COUNT, TOLERATED_DRIFT
+from scheduling import ReleaseCalendar
+from display import TerminalRenderer, KeyReader, ENTER
+from config import ConfigWatcher, changed_sections
+from api import LiveState
+
+
+DEFAULT_BASE_URL = "https://kyfw.12306.cn"
+
+SEAT_HEADERS = ["商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座"]
+
+
+def expand_dates(start, end=None, weekdays=None):
+    """
+    展开日期范围
+    :param start: 起始日期 YYYY-MM-DD
+    :param end: 结束日期（含），默认与起始日期相同
+    :param weekdays: 星期掩码，如 "67" 表示仅周六、周日（1 为周一）；默认全部
+    :return: 日期字符串列表
+    """
+    first = datetime.strptime(start, "%Y-%m-%d").date()
+    last = datetime.strptime(end, "%Y-%m-%d").date() if end else first
+    allowed = {int(c) for c in weekdays if c.isdigit()} if weekdays else None
+    dates = []
+    day = first
+    while day <= last:
+        if not allowed or day.isoweekday() in allowed:
+            dates.append(day.isoformat())
+        day += timedelta(days=1)
+    return dates
 
 
 class TrainMonitor:
-    def __init__(self):
+    def __init__(self, base_url=None, offline=False, record=False, export=None, api=None, worker=False):
+        """
+        :param base_url: 12306 接口地址，覆盖配置文件中的 network.base_url（如指向本地模拟服务器）
+        :param offline: 离线模式（回放归档时使用），不联网同步车站数据，仅读取本地缓存
+        :param record: 记录原始查询响应（等同于配置 recorder.enabled）
+        :param export: 查询结果导出文件（等同于配置 export.path）
+        :param api: 本地接口监听地址 [HOST:]PORT（等同于配置 api.enabled）
+        :param worker: 作为分片工作进程运行：不启动指标与本地接口（同一台机器上的多个工作进程不争用端口，指标与接口由协调者提供）
+        """
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.station_json = os.path.join(base_dir, "station_codes.json")
+        self.city_json = os.path.join(base_dir, "station_cities.json")
         self.config_json = os.path.join(base_dir, "config.json")
         self.log_dir = os.path.join(base_dir, "logs")
         os.makedirs(self.log_dir, exist_ok=True)
@@ -29,16 +75,53 @@ class TrainMonitor:
         # 新增：初始化查询历史记录
         self.query_history = QueryHistory(self.log_dir)
 
+        # 运行指标（分阶段耗时、请求/限流/通知计数）
+        self.metrics = MonitorMetrics()
+        self.metrics_server = None
+        self.api_server = None  # 本地 HTTP 接口
+        self.live_state = None  # 接口使用的各线路最新结果
+        self.profiler = None  # 由命令行 --profile 启用
+        self.renderer = None  # 交互模式的增量渲染器
+        self.recorder = None  # 原始响应归档
+        self.exporter = None  # 查询结果流式导出
+        self.config_watcher = None  # 配置文件热加载
+        self._coordinator = None  # 分片协调者（运行中更新任务与查询间隔）
+        self._coordinator_interval = None  # 协调者的命令行查询间隔
+        self.release_calendar = None  # 放票日历
+        self._monitored = []  # 当前监控的 (始发, 到达, 日期)，预热线程据此计算预热时间
+        self._bursting = set()  # 处于放票窗口的线路
+        self._prewarm_thread = None
+
         self.station_dict = {}
         self.code_to_name = {}
-        self.session = requests.Session()
+        self.station_city = {}  # {车站代码: 所属城市}
+        self.city_codes = {}  # {城市: [车站代码]}
+        self._expand_pool = None
+        self._expand_empty = {}  # 同城扩展查询中补充查询后仍无车次的车站 {(始发, 到达, 日期): {车站代码}}
+        self._http = None  # HTTP 客户端，首次使用时创建（导入 requests 较慢）
+        self._station_sync = None  # 后台车站同步线程
+        self.rate_limiter = None
+        self.shared_cache = None  # 跨进程共享结果缓存
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Referer": "https://kyfw.12306.cn/otn/leftTicket/init",
         }
+        self.base_url = DEFAULT_BASE_URL
+        self._cli_base_url = base_url
 
         # 默认配置（扩展）
         self.config = {
+            "monitor": {
+                "interval_seconds": 180,
+                "hot_reload": True,
+                "reload_check_seconds": 2
+            },
+            "release_calendar": {
+                "enabled": False,
+                "prewarm_seconds": 20,
+                "burst_interval_seconds": 5,
+                "burst_duration_seconds": 180,
+                "windows": []
+            },
             "dc_classification": {
                 "default_mode": "official",
                 "smart_threshold": 899,
@@ -48,23 +131,104 @@ class TrainMonitor:
                 "enabled": True,
                 "cooldown_seconds": 300,
                 "only_target_trains": False,
-                "min_tickets": 1
+                "min_tickets": 1,
+                "rate_limit": {
+                    "enabled": True,
+                    "max_pending": 20,
+                    "max_age_seconds": 120
+                }
             },
             "logging": {
                 "level": "INFO",
                 "max_size_mb": 10,
                 "backup_count": 5,
                 "console_output": False,
-                "log_query_history": True
+                "log_query_history": True,
+                "async_queue": True,
+                "compress_rotated": True
+            },
+            "network": {
+                "base_url": DEFAULT_BASE_URL,
+                "max_queries_per_second": 1.0,
+                "burst": 2,
+                "sweep_workers": 4,
+                "expand_city": False
+            },
+            "http": {
+                "init_timeout_seconds": 5,
+                "query_timeout_seconds": 10,
+                "station_timeout_seconds": 10,
+                "poll_deadline_seconds": 20,
+                "retries": 2,
+                "backoff_seconds": 0.5,
+                "max_backoff_seconds": 4,
+                "jitter": 0.5,
+                "pool_size": 0,
+                "hedge": False,
+                "hedge_quantile": 0.95,
+                "hedge_min_samples": 20
+            },
+            "metrics": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 9108,
+                "summary_interval_seconds": 600
+            },
+            "api": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 9109,
+                "max_clients": 32,
+                "allow_origin": ""
+            },
+            "recorder": {
+                "enabled": False,
+                "dir": ""
+            },
+            "export": {
+                "enabled": False,
+                "path": ""
+            },
+            "row_schema": {
+                "field_count": DEFAULT_FIELD_COUNT,
+                "fields": [dict(f) for f in DEFAULT_FIELDS]
+            },
+            "shared_cache": {
+                "enabled": False,
+                "dir": "",
+                "max_age_seconds": 60
+            },
+            "transfer": {
+                "enabled": False,
+                "hubs": [],
+                "min_layover_minutes": 20,
+                "max_layover_minutes": 180,
+                "max_results": 10
             }
         }
 
+        self._default_config = copy.deepcopy(self.config)
         self.load_config()
-        self.init_station_data()
+        self._file_config = copy.deepcopy(self.config)  # 配置文件的当前内容（含默认值），热加载时据此比较
+        self.logger.reconfigure(self.config.get("logging", {}))
+        self._apply_network_config(base_url)
+        self._setup_row_schema()
+        self._setup_release_calendar()
+        if offline:
+            self._load_station_cache()
+        else:
+            self._start_station_sync()
+        self._setup_recorder(record)
+        self._setup_exporter(export)
 
         # 新增：初始化通知管理器
         self.notification_manager = None
         self._setup_notifications()
+        if not worker:
+            self._setup_metrics_server()
+            self._setup_api_server(api)
+        if not offline:
+            self._setup_config_watcher()
 
         # 注册退出处理
         atexit.register(self._cleanup)
@@ -72,34 +236,224 @@ class TrainMonitor:
     def _cleanup(self):
         """程序退出时的清理工作"""
         try:
+            if self.profiler:
+                self.profiler.finish()
+            if self.config_watcher:
+                self.config_watcher.stop()
+            if self.metrics_server:
+                self.metrics_server.stop()
+            if self.api_server:
+                self.api_server.stop()
+            if self._expand_pool:
+                self._expand_pool.shutdown(wait=False)
+            if self.recorder:
+                self.recorder.close()
+            if self.exporter:
+                self.exporter.close()
+            if self._http:
+                self._http.close()
+            self.logger.info("%s", self.metrics.summary_line())
             self.logger.log_shutdown()
         except:
             pass
 
+    def _setup_recorder(self, enabled=False):
+        """按配置启用原始响应归档"""
+        conf = self.config.get("recorder", {})
+        if not (enabled or conf.get("enabled", False)):
+            return
+        archive_dir = conf.get("dir") or os.path.join(self.log_dir, "responses")
+        self.recorder = ResponseArchive(archive_dir)
+        self.logger.info("原始响应归档已启用: %s", archive_dir)
+
+    def _setup_exporter(self, path=None):
+        """按配置启用查询结果流式导出"""
+        conf = self.config.get("export", {})
+        if not (path or conf.get("enabled", False)):
+            return
+        path = path or conf.get("path") or os.path.join(self.log_dir, "tickets_export.jsonl.gz")
+        try:
+            self.exporter = TicketExporter(path)
+        except ValueError as e:
+            self.logger.error("导出未启用: %s", e)
+            return
+        self.logger.info("查询结果导出已启用: %s (%s)", path, self.exporter.fmt)
+
+    def _publish_result(self, data, f_st, t_st, date):
+        """把一次查询的所有车次逐行追加到导出文件，并更新本地接口的实时状态"""
+        if not isinstance(data, list):
+            if self.live_state:
+                self.live_state.mark_failed((f_st, t_st, date))
+            return
+        if not (self.exporter or self.live_state):
+            return
+        tickets = (ticket for _, ticket, _ in self._parse_rows(data, date=date, report_drift=False))
+        if self.live_state:
+            tickets = list(tickets)
+            self.live_state.update((f_st, t_st, date), tickets)
+        if self.exporter and data:
+            self.exporter.write(f"{f_st}->{t_st}", tickets)
+
+    def _setup_metrics_server(self):
+        """按配置启动本地指标接口"""
+        conf = self.config.get("metrics", {})
+        if not conf.get("enabled", False):
+            return
+        try:
+            from metrics import MetricsServer
+            self.metrics_server = MetricsServer(self.metrics.registry, conf.get("host", "127.0.0.1"), conf.get("port", 9108))
+            self.metrics_server.start()
+            self.logger.info("指标接口已启动: http://%s:%d/metrics", self.metrics_server.host, self.metrics_server.port)
+        except OSError as e:
+            self.metrics_server = None
+            self.logger.error("指标接口启动失败: %s", e)
+
+    def _setup_api_server(self, address=None):
+        """
+        按配置启动本地 HTTP 接口
+        :param address: 命令行指定的监听地址 [HOST:]PORT，优先于配置
+        """
+        conf = self.config.get("api", {})
+        if not (address or conf.get("enabled", False)):
+            return
+        host, port = conf.get("host", "127.0.0.1"), conf.get("port", 9109)
+        if address:
+            addr_host, _, addr_port = str(address).rpartition(":")
+            host, port = addr_host or host, addr_port
+        try:
+            from api import ApiServer
+            self.live_state = LiveState()
+            self.api_server = ApiServer(self.live_state, self.query_history, self._health, host, int(port),
+                                        conf.get("max_clients", 32), allow_origin=conf.get("allow_origin", ""))
+            self.api_server.start()
+            self.logger.info("本地接口已启动: http://%s:%d/api/routes", self.api_server.host, self.api_server.port)
+        except (OSError, ValueError) as e:
+            self.api_server = None
+            self.live_state = None
+            self.logger.error("本地接口启动失败: %s", e)
+
+    def _health(self):
+        """本地接口 /api/health：运行状况"""
+        routes = self.live_state.routes(tickets=False)
+        now = datetime.now()
+        # 超过 3 个查询间隔（另加 1 分钟余量）未成功更新的线路视为停滞
+        limit = self._interval() * 3 + 60
+        stale = [f"{r['route']} ({r['date']})" for r in routes
+                 if (now - datetime.fromisoformat(r["updated_at"])).total_seconds() > limit]
+        return {
+            "status": "starting" if not routes else ("stale" if stale else "ok"),
+            "uptime_seconds": round(time.time() - self.live_state.started),
+            "routes": len(routes),
+            "stale_routes": stale,
+            "release_windows": sorted(self._bursting),
+            "polls": self.metrics.polls.total(),
+            "requests": self.metrics.requests.total(),
+            "errors": self.metrics.errors.total(),
+            "throttled": self.metrics.throttles.total(),
+            "deadline_exceeded": self.metrics.deadlines.total(),
+            "notification_rate_limits": self.notification_manager.throttle_stats() if self.notification_manager else {},
+            "sse_clients": self.api_server.clients if self.api_server else 0,
+            "last_event_id": self.live_state.last_event_id(),
+        }
+
     def _setup_notifications(self):
         """初始化通知系统"""
         try:
             notif_config = self.config.get("notification", {})
             if notif_config.get("enabled", True):
-                base_dir = os.path.dirname(os.path.abspath(__file__))
-                icon_path = os.path.join(base_dir, "railway.ico")
-
                 # 过滤配置，只传递 NotificationConfig 定义的参数
                 notif_config_filtered = {
                     'enabled': notif_config.get('enabled', True),
                     'cooldown_seconds': notif_config.get('cooldown_seconds', 300),
                     'only_target_trains': notif_config.get('only_target_trains', False),
                     'min_tickets': notif_config.get('min_tickets', 1),
+                    'rate_limit': notif_config.get('rate_limit', {}),
                     'target_trains': None  # 初始为空
                 }
                 self.notification_manager = NotificationManager(notif_config_filtered)
-
-                # 直接使用 Windows 原生通知（无需外部依赖）
-                self.notification_manager.register_channel(NativeWindowsNotification())
-                self.logger.info("通知渠道已启用: Windows原生通知")
+                self.notification_manager.channels = self._build_notification_channels(notif_config)
+                self.logger.info("通知渠道已启用: %s", ", ".join(c.name for c in self.notification_manager.channels) or "无")
         except Exception as e:
             self.logger.error(f"通知系统初始化失败: {e}", exc_info=True)
 
+    def _build_notification_channels(self, notif_config):
+        """
+        按配置 notification.channels 创建通知渠道
+        桌面通知直接使用 Windows 原生通知（无需外部依赖），其余为已启用的机器人 Webhook
+        """
+        from notification import NativeWindowsNotification, build_channel
+        channels = []
+        for name, spec in notif_config.get("channels", {"windows_desktop": {"enabled": True}}).items():
+            if not spec.get("enabled", False):
+                continue
+            if name == "windows_desktop":
+                channels.append(NativeWindowsNotification())
+                continue
+            params = {k: v for k, v in spec.items() if k not in ("enabled", "description")}
+            try:
+                channels.append(build_channel(dict(params, type=name)))
+            except (ValueError, TypeError) as e:
+                self.logger.error("通知渠道 %s 配置无效，已跳过: %s", name, e)
+        return channels
+
+    def _apply_network_config(self, base_url=None):
+        """设置接口地址（命令行参数优先于配置文件）"""
+        self._apply_base_url(base_url)
+        net = self.config.get("network", {})
+        # 所有查询（包括扫描模式的并发查询）共享同一速率上限
+        self.rate_limiter = RateLimiter(net.get("max_queries_per_second", 1.0), net.get("burst", 2))
+        self._setup_shared_cache()
+
+    def _apply_base_url(self, base_url=None):
+        self.base_url = (base_url or self.config.get("network", {}).get("base_url") or DEFAULT_BASE_URL).rstrip("/")
+        self.headers["Referer"] = f"{self.base_url}/otn/leftTicket/init"
+        if self.base_url != DEFAULT_BASE_URL:
+            self.logger.info("使用自定义接口地址: %s", self.base_url)
+
+    def _setup_shared_cache(self):
+        """按配置启用跨进程共享结果缓存"""
+        cache_conf = self.config.get("shared_cache", {})
+        shared_cache = None
+        if cache_conf.get("enabled", False):
+            try:
+                shared_cache = SharedResultCache(cache_conf.get("dir") or None, cache_conf.get("max_age_seconds", 60))
+                self.logger.info("共享结果缓存已启用: %s", shared_cache.cache_dir)
+            except OSError as e:
+                self.logger.warning("共享结果缓存目录不可用，已禁用: %s", e)
+        self.shared_cache = shared_cache
+
+    def _setup_row_schema(self):
+        """按配置编译查询结果行解码器，配置无效时回退到内置格式"""
+        self._drift_warned = set()
+        try:
+            self.row_schema = RowSchema.from_config(self.config.get("row_schema", {}), self._on_schema_drift)
+        except (ValueError, TypeError, AttributeError) as e:
+            self.logger.error("row_schema 配置无效，使用内置格式: %s", e)
+            self.row_schema = RowSchema(DEFAULT_FIELDS, DEFAULT_FIELD_COUNT, self._on_schema_drift)
+
+    def _setup_release_calendar(self):
+        """按配置加载放票日历，配置无效时不启用"""
+        conf = self.config.get("release_calendar", {})
+        calendar = None
+        if conf.get("enabled", False):
+            try:
+                calendar = ReleaseCalendar.from_config(conf)
+                self.logger.info("放票日历已启用: %d 个放票窗口", len(calendar.windows))
+            except (ValueError, TypeError, AttributeError) as e:
+                self.logger.error("release_calendar 配置无效，未启用: %s", e)
+        self.release_calendar = calendar
+        self._bursting = set()
+
+    def _on_schema_drift(self, reason):
+        """查询结果行格式与 row_schema 不符：计数，每种原因只告警一次"""
+        self.metrics.schema_drift.inc(reason=reason)
+        if reason not in self._drift_warned:
+            self._drift_warned.add(reason)
+            if reason in TOLERATED_DRIFT:
+                self.logger.warning("查询结果格式与 row_schema 不符（%s），仍按字段下标解析，请检查 config.json 的 row_schema", reason)
+            else:
+                self.logger.warning("查询结果格式与 row_schema 不符（%s），相关车次已跳过，请检查 config.json 的 row_schema", reason)
+
     def load_config(self):
         """加载配置文件"""
         if os.path.exists(self.config_json):
@@ -130,33 +484,353 @@ class TrainMonitor:
             with open(self.config_json, "w", encoding="utf-8") as f:
                 json.dump(self.config, f, ensure_ascii=False, indent=4)
             self.logger.debug(f"配置文件已保存: {self.config_json}")
+            self._file_config = copy.deepcopy(self.config)
+            if self.config_watcher:
+                self.config_watcher.mark_current()
         except Exception as e:
             self.logger.error(f"配置文件保存失败: {e}", exc_info=True)
 
+    def _setup_config_watcher(self):
+        """按配置监视 config.json，修改后无需重启即可生效"""
+        conf = self.config.get("monitor", {})
+        if not conf.get("hot_reload", True):
+            return
+        self.config_watcher = ConfigWatcher(self.config_json, self._reload_config,
+                                            conf.get("reload_check_seconds", 2), logger=self.logger).start()
+
+    def _interval(self, interval=None):
+        """查询间隔：命令行参数优先，否则取配置 monitor.interval_seconds（可热加载）"""
+        if interval is not None:
+            return interval
+        return self.config.get("monitor", {}).get("interval_seconds", 180)
+
+    def _next_wait(self, f_st, t_st, interval=None):
+        """
+        距该线路下一次查询的秒数：按放票日历，放票窗口内缩短间隔、窗口开始时立即查询，其余时间为正常间隔
+        :param interval: 命令行指定的正常间隔（None 取配置）
+        """
+        interval = self._interval(interval)
+        calendar = self.release_calendar
+        if calendar is None:
+            return interval
+        now = datetime.now()
+        route = f"{f_st}->{t_st}"
+        window = calendar.active_window(f_st, t_st, now)
+        if window and route not in self._bursting:
+            self._bursting.add(route)
+            self.logger.info("进入放票窗口: %s，查询间隔 %ss", route, window.interval)
+        elif not window and route in self._bursting:
+            self._bursting.discard(route)
+            self.logger.info("放票窗口结束: %s，恢复查询间隔 %ss", route, interval)
+        return calendar.next_wait(f_st, t_st, interval, now)
+
+    def _watch_routes(self, keys):
+        """
+        登记当前监控的任务，首次调用时启动放票预热线程
+        :param keys: [(始发, 到达, 日期)]
+        """
+        self._monitored = list(keys)
+        if self._prewarm_thread is None:
+            self._prewarm_thread = threading.Thread(target=self._prewarm_loop, name="release-prewarm", daemon=True)
+            self._prewarm_thread.start()
+
+    def _prewarm_loop(self):
+        """在放票窗口开始前 prewarm_seconds 预热连接；日历未启用时只是定期醒来，以响应配置热加载"""
+        while True:
+            calendar = self.release_calendar
+            at = calendar.next_prewarm([k[:2] for k in self._monitored], datetime.now()) if calendar else None
+            wait = 60 if at is None else min(60, (at - datetime.now()).total_seconds())
+            time.sleep(max(wait, 0))
+            if at is not None and datetime.now() >= at:
+                self._prewarm()
+
+    def _prewarm(self):
+        """
+        放票前预热：并发完成若干次 leftTicket/init，在共用连接池中建立连接并刷新 Cookie
+        每个连接占用一个限速令牌，令牌不足时少建或跳过，不超出全局请求预算
+        """
+        workers = self.config.get("network", {}).get("sweep_workers", 4)
+        count = 0
+        for _ in range(max(1, min(workers, len(self._monitored)))):
+            if self.rate_limiter and not self.rate_limiter.try_acquire():
+                break
+            count += 1
+        if not count:
+            self.logger.info("放票前预热跳过：请求预算不足")
+            return
+        url = f"{self.base_url}/otn/leftTicket/init"
+        timeout = self.config.get("http", {}).get("init_timeout_seconds", 5)
+        http, deadline = self.http, self._deadline()
+
+        def warm(_):
+            self.metrics.requests.inc(route="prewarm", endpoint="init")
+            try:
+                http.get(url, self.headers, timeout, deadline)
+                return True
+            except (TransportError, DeadlineExceeded) as e:
+                self.logger.warning("放票前预热失败: %s", e)
+                return False
+
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="prewarm") as pool:
+            warmed = sum(pool.map(warm, range(count)))
+        self.logger.info("放票前预热完成: %d 个连接", warmed)
+
+    def _validate_config(self, conf):
+        """
+        校验新配置，无效时抛出 ValueError
+        :return: 按新配置编译的行解码器
+        """
+        def number(section, key, minimum):
+            value = conf.get(section, {}).get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+                raise ValueError(f"{section}.{key} 应为不小于 {minimum} 的数字: {value!r}")
+
+        number("monitor", "interval_seconds", 1)
+        number("monitor", "reload_check_seconds", 0.1)
+        number("notification", "cooldown_seconds", 0)
+        number("notification", "min_tickets", 0)
+        number("network", "max_queries_per_second", 0)
+        number("network", "burst", 1)
+        number("network", "sweep_workers", 1)
+        number("metrics", "summary_interval_seconds", 1)
+        for key in ("init_timeout_seconds", "query_timeout_seconds", "station_timeout_seconds", "poll_deadline_seconds"):
+            number("http", key, 0.1)
+        for key in ("retries", "backoff_seconds", "max_backoff_seconds", "jitter", "pool_size", "hedge_min_samples"):
+            number("http", key, 0)
+        if not 0 < conf.get("http", {}).get("hedge_quantile", 0) < 1:
+            raise ValueError("http.hedge_quantile 应在 0 与 1 之间")
+        number("dc_classification", "smart_threshold", 0)
+        if conf.get("dc_classification", {}).get("default_mode") not in ("official", "smart"):
+            raise ValueError("dc_classification.default_mode 应为 official 或 smart")
+        channels = conf.get("notification", {}).get("channels", {})
+        if not isinstance(channels, dict) or not all(isinstance(spec, dict) for spec in channels.values()):
+            raise ValueError("notification.channels 格式无效")
+        for name, spec in channels.items():
+            limit = spec.get("max_per_minute")
+            if limit is not None and (isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit < 1):
+                raise ValueError(f"notification.channels.{name}.max_per_minute 应为不小于 1 的数字: {limit!r}")
+        rate_limit = conf.get("notification", {}).get("rate_limit", {})
+        for key, minimum in (("max_pending", 0), ("max_age_seconds", 1)):
+            value = rate_limit.get(key)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+                raise ValueError(f"notification.rate_limit.{key} 应为不小于 {minimum} 的数字: {value!r}")
+        try:
+            ReleaseCalendar.from_config(conf.get("release_calendar", {}))
+        except (TypeError, AttributeError) as e:
+            raise ValueError(f"release_calendar 无效: {e}")
+        try:
+            return RowSchema.from_config(conf.get("row_schema", {}), self._on_schema_drift)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"row_schema 无效: {e}")
+
+    def _reload_config(self, loaded):
+        """
+        配置文件被修改：校验通过后只应用发生变化的配置段；无效时保持当前配置
+        各配置段整体替换（引用赋值），正在进行的查询继续使用旧值直到本次结束
+        :param loaded: 配置文件的新内容
+        """
+        candidate = copy.deepcopy(self._default_config)
+        self._deep_update(candidate, loaded)
+        changed = [s for s in changed_sections(self._file_config, candidate) if s not in ("version", "description")]
+        if not changed:
+            return
+        try:
+            row_schema = self._validate_config(candidate)
+        except ValueError as e:
+            self.logger.error("新配置无效，保持当前配置: %s", e)
+            return
+
+        restart = []
+        for section in changed:
+            old, new = self._file_config.get(section), candidate.get(section)
+            if isinstance(old, dict) and isinstance(new, dict) and isinstance(self.config.get(section), dict):
+                # 只覆盖文件中改动过的键，命令行参数对其他键的覆盖保持不变
+                merged = dict(self.config[section])
+                for key in set(old) | set(new):
+                    if old.get(key) != new.get(key):
+                        if key in new:
+                            merged[key] = new[key]
+                        else:
+                            merged.pop(key, None)
+                self.config[section] = merged
+            else:
+                self.config[section] = copy.deepcopy(new)
+
+            if section == "notification":
+                self._reload_notifications()
+            elif section == "logging":
+                self.logger.reconfigure(self.config["logging"])
+            elif section == "network":
+                net = self.config["network"]
+                if not self._cli_base_url:
+                    self._apply_base_url()
+                self.rate_limiter.configure(net.get("max_queries_per_second", 1.0), net.get("burst", 2))
+            elif section == "http":
+                # 下次请求时按新配置创建客户端，进行中的请求继续使用旧客户端，结束后关闭旧客户端
+                old_http, self._http = self._http, None
+                if old_http is not None:
+                    old_http.retire()
+            elif section == "row_schema":
+                self.row_schema = row_schema
+            elif section == "shared_cache":
+                self._setup_shared_cache()
+            elif section == "release_calendar":
+                self._setup_release_calendar()
+            elif section == "monitor":
+                if self.config_watcher:
+                    self.config_watcher.interval = self.config["monitor"].get("reload_check_seconds", 2)
+                if self._coordinator and self._coordinator_interval is None:
+                    self._coordinator.update(interval=self._interval())
+            elif section in ("recorder", "export", "api") or (
+                    section == "metrics" and any(old.get(k) != new.get(k) for k in ("enabled", "host", "port"))):
+                restart.append(section)
+            # dc_classification、transfer 与 metrics 的其余项在每次使用时读取，赋值后即生效
+        self._file_config = candidate
+        self.logger.info("配置已重新加载: %s", ", ".join(changed))
+        if restart:
+            self.logger.warning("以下配置段需要重启程序才能生效: %s", ", ".join(restart))
+
+    def _reload_notifications(self):
+        """应用新的通知配置，保留冷却计时、已发现车次、目标车次与各渠道的限速记录"""
+        conf = self.config.get("notification", {})
+        manager = self.notification_manager
+        if manager is None:
+            self._setup_notifications()
+            return
+        manager.config.enabled = conf.get("enabled", True)
+        manager.config.cooldown_seconds = conf.get("cooldown_seconds", 300)
+        manager.config.only_target_trains = conf.get("only_target_trains", False)
+        manager.config.min_tickets = conf.get("min_tickets", 1)
+        manager.rate_limit = dict(conf.get("rate_limit") or {})
+        manager.channels = self._build_notification_channels(conf)
+        self.logger.info("通知渠道: %s", ", ".join(c.name for c in manager.channels) or "无")
+
+    @property
+    def http(self):
+        """HTTP 客户端（首次访问时按配置 http 段创建），所有查询线程共用同一连接池"""
+        if self._http is None:
+            self._http = self._build_http_client()
+        return self._http
+
+    @http.setter
+    def http(self, value):
+        self._http = value
+
+    def _build_http_client(self, transport=None):
+        """
+        按配置创建 HTTP 客户端
+        :param transport: 传输实现，默认为 requests（连接池大小 http.pool_size，0 表示按并发查询数自动设置）
+        """
+        conf = self.config.get("http", {})
+        if transport is None:
+            from network import RequestsTransport
+            # 扫描/订阅/同城扩展的并发查询，加上同样多的对冲请求
+            pool_size = conf.get("pool_size", 0) or max(10, self.config.get("network", {}).get("sweep_workers", 4) * 2)
+            transport = RequestsTransport(pool_size)
+        return HttpClient(
+            transport,
+            retries=conf.get("retries", 2),
+            backoff=conf.get("backoff_seconds", 0.5),
+            max_backoff=conf.get("max_backoff_seconds", 4),
+            jitter=conf.get("jitter", 0.5),
+            hedge=conf.get("hedge", False),
+            hedge_quantile=conf.get("hedge_quantile", 0.95),
+            hedge_min_samples=conf.get("hedge_min_samples", 20),
+            # 对冲请求与重试同样占用共享限速的令牌：对冲在令牌不足时不发，重试在截止时间内等待令牌
+            hedge_permit=lambda: self.rate_limiter is None or self.rate_limiter.try_acquire(),
+            retry_permit=lambda remaining: self.rate_limiter is None or
+                self.rate_limiter.acquire(timeout=remaining) is not None,
+            on_event=self._on_http_event,
+        )
+
+    def _on_http_event(self, kind, endpoint):
+        """HTTP 客户端事件计入指标"""
+        endpoint = endpoint.rsplit("/", 1)[-1]
+        if kind == "retry":
+            self.metrics.retries.inc(endpoint=endpoint)
+        elif kind == "hedge":
+            self.metrics.hedges.inc(endpoint=endpoint)
+        elif kind == "hedge_win":
+            self.metrics.hedge_wins.inc(endpoint=endpoint)
+        elif kind == "deadline":
+            self.metrics.deadlines.inc(endpoint=endpoint)
+
+    def _deadline(self):
+        """一次查询（init + query，含重试）的截止时间"""
+        return time.monotonic() + self.config.get("http", {}).get("poll_deadline_seconds", 20)
+
+    def _start_station_sync(self):
+        """先读取本地缓存，再在后台线程同步最新车站数据，用户输入线路期间即可完成"""
+        self._load_station_cache()
+        self._station_sync = threading.Thread(target=self.init_station_data, name="station-sync", daemon=True)
+        self._station_sync.start()
+
+    def _wait_station_sync(self):
+        """等待后台车站同步完成（首次查询前调用）"""
+        thread = self._station_sync
+        if thread is not None:
+            thread.join()
+            self._station_sync = None
+
     def init_station_data(self):
         """同步车站编码数据"""
         try:
             self.logger.debug("开始同步车站数据")
-            url = f'https://kyfw.12306.cn/otn/resources/js/framework/station_name.js?v={time.time()}'
-            res = self.session.get(url, timeout=10)
+            url = f'{self.base_url}/otn/resources/js/framework/station_name.js?v={time.time()}'
+            res = self.http.get(url, timeout=self.config.get("http", {}).get("station_timeout_seconds", 10),
+                                deadline=self._deadline())
             matched = re.findall(r'([\u4e00-\u9fa5]+)\|([A-Z]+)', res.text)
             if matched:
                 self.station_dict = {name: code for name, code in matched}
                 with open(self.station_json, "w", encoding="utf-8") as f:
                     json.dump(self.station_dict, f, ensure_ascii=False, indent=4)
                 self.logger.debug(f"车站数据同步完成，共 {len(self.station_dict)} 个站点")
+            self._parse_station_cities(res.text)
         except Exception as e:
             self.logger.warning(f"车站数据同步失败，使用缓存: {e}")
-            if os.path.exists(self.station_json):
-                try:
-                    with open(self.station_json, "r", encoding="utf-8") as f:
-                        self.station_dict = json.load(f)
-                        self.logger.debug(f"使用缓存车站数据，共 {len(self.station_dict)} 个站点")
-                except Exception as e:
-                    self.logger.error(f"读取缓存车站数据失败: {e}", exc_info=True)
+            self._load_station_cache()
 
         self.code_to_name = {code: name for name, code in self.station_dict.items()}
 
+    def _parse_station_cities(self, text):
+        """从 station_name.js 解析车站所属城市（每条记录的第 8 个字段）"""
+        cities = {}
+        for entry in text.split('@')[1:]:
+            parts = entry.split('|')
+            if len(parts) > 7 and parts[2] and parts[7]:
+                cities[parts[2]] = parts[7]
+        if not cities:
+            return
+        self._set_station_cities(cities)
+        try:
+            with open(self.city_json, "w", encoding="utf-8") as f:
+                json.dump(cities, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            self.logger.warning(f"车站城市数据保存失败: {e}")
+
+    def _set_station_cities(self, cities):
+        self.station_city = cities
+        self.city_codes = {}
+        for code, city in cities.items():
+            self.city_codes.setdefault(city, []).append(code)
+
+    def _load_station_cache(self):
+        """读取本地缓存的车站数据"""
+        if os.path.exists(self.station_json):
+            try:
+                with open(self.station_json, "r", encoding="utf-8") as f:
+                    self.station_dict = json.load(f)
+                    self.logger.debug(f"使用缓存车站数据，共 {len(self.station_dict)} 个站点")
+            except Exception as e:
+                self.logger.error(f"读取缓存车站数据失败: {e}", exc_info=True)
+        if os.path.exists(self.city_json):
+            try:
+                with open(self.city_json, "r", encoding="utf-8") as f:
+                    self._set_station_cities(json.load(f))
+            except Exception as e:
+                self.logger.warning(f"读取缓存车站城市数据失败: {e}")
+        self.code_to_name = {code: name for name, code in self.station_dict.items()}
+
     def classify_train(self, train_no):
         """后台判断逻辑"""
         conf = self.config["dc_classification"]
@@ -180,82 +854,221 @@ class TrainMonitor:
     def query_tickets(self, date, from_station, to_station):
         """执行查询，站名匹配失败则强制同步"""
         if from_station not in self.station_dict or to_station not in self.station_dict:
-            self.logger.debug(f"站名不在字典中，尝试重新同步: {from_station} -> {to_station}")
+            self.logger.debug("站名不在字典中，尝试重新同步: %s -> %s", from_station, to_station)
             self.init_station_data()
 
         from_code = self.station_dict.get(from_station)
         to_code = self.station_dict.get(to_station)
 
         if not from_code or not to_code:
-            self.logger.error(f"站名匹配失败: {from_station}({from_code}) -> {to_station}({to_code})")
+            self.logger.error("站名匹配失败: %s(%s) -> %s(%s)", from_station, from_code, to_station, to_code)
             return "STATION_NOT_FOUND"
 
-        url = f"https://kyfw.12306.cn/otn/leftTicket/query?leftTicketDTO.train_date={date}&leftTicketDTO.from_station={from_code}&leftTicketDTO.to_station={to_code}&purpose_codes=ADULT"
+        if self.shared_cache:
+            result, hit = self.shared_cache.get_or_fetch(
+                (from_code, to_code, date),
+                lambda: self._request_tickets(date, from_station, to_station, from_code, to_code))
+            if hit:
+                self.metrics.cache_hits.inc(route=f"{from_station}->{to_station}")
+                self.logger.debug("命中共享缓存: %s -> %s (%s)", from_station, to_station, date)
+            return result
+        return self._request_tickets(date, from_station, to_station, from_code, to_code)
+
+    def _request_tickets(self, date, from_station, to_station, from_code, to_code):
+        """向 12306 发起查询请求"""
+        url = f"{self.base_url}/otn/leftTicket/query?leftTicketDTO.train_date={date}&leftTicketDTO.from_station={from_code}&leftTicketDTO.to_station={to_code}&purpose_codes=ADULT"
+        route = f"{from_station}->{to_station}"
         try:
-            self.session.get("https://kyfw.12306.cn/otn/leftTicket/init", headers=self.headers, timeout=5)
-            response = self.session.get(url, headers=self.headers, timeout=10)
-            result = response.json().get('data', {}).get('result', [])
-            self.logger.debug(f"查询完成: {from_station} -> {to_station}, 返回 {len(result)} 条记录")
+            with self.metrics.time_phase("rate_wait", route):
+                self.rate_limiter.acquire()
+            http, conf = self.http, self.config.get("http", {})
+            # 截止时间从限速等待之后算起，覆盖 init 与 query 两次请求及其重试
+            deadline = self._deadline()
+            self.metrics.requests.inc(route=route, endpoint="init")
+            with self.metrics.time_phase("init_get", route):
+                http.get(f"{self.base_url}/otn/leftTicket/init", self.headers,
+                         conf.get("init_timeout_seconds", 5), deadline)
+            self.metrics.requests.inc(route=route, endpoint="query")
+            with self.metrics.time_phase("query_get", route):
+                response = http.get(url, self.headers, conf.get("query_timeout_seconds", 10), deadline)
+            if self.recorder:
+                self.recorder.record(from_station, to_station, date, from_code, to_code,
+                                     response.status_code, response.text)
+            result = self._decode_response(response.status_code, response.json, route)
+            if result is not None:
+                self.logger.debug("查询完成: %s -> %s, 返回 %d 条记录", from_station, to_station, len(result))
             return result
+        except DeadlineExceeded as e:
+            self.metrics.errors.inc(route=route)
+            self.logger.warning("查询超过截止时间，本轮跳过: %s (%s)", route, e)
+            return None
+        except TransportError as e:
+            self.metrics.errors.inc(route=route)
+            self.logger.error("查询请求失败: %s (%s)", route, e)
+            return None
         except Exception as e:
-            self.logger.error(f"查询请求失败: {e}", exc_info=True)
+            self.metrics.errors.inc(route=route)
+            self.logger.error("查询请求失败: %s", e, exc_info=True)
+            return None
+
+    def same_city_codes(self, station):
+        """
+        与输入站同城的全部车站代码（输入站本身排在首位）
+        :param station: 站名或城市名
+        """
+        code = self.station_dict.get(station)
+        city = self.station_city.get(code, station)
+        codes = list(self.city_codes.get(city, []))
+        if code:
+            codes = [code] + [c for c in codes if c != code]
+        return codes
+
+    def fetch(self, date, from_station, to_station):
+        """按配置执行单站查询或同城多站扩展查询"""
+        self._wait_station_sync()
+        if self.config.get("network", {}).get("expand_city", False):
+            return self.query_tickets_expanded(date, from_station, to_station)
+        return self.query_tickets(date, from_station, to_station)
+
+    def query_tickets_expanded(self, date, from_station, to_station):
+        """
+        同城多站扩展查询：12306 已按输入站所在城市匹配车站，先查询输入站，
+        只对结果中没有出现的同城车站补充查询（与另一端的输入站组合，另一端同样按城市匹配），合并去重
+        补充查询计入查询间隔内的请求预算：每个监控任务每个间隔最多 间隔 × 每秒查询次数 ÷ 任务数 - 1 次，
+        超出的车站留到之后的轮次；补充查询后仍没有车次的车站不再查询该日期
+        :return: 合并后的查询结果（按开点排序）；输入站查询失败时为其结果
+        """
+        from_codes = [c for c in self.same_city_codes(from_station) if c in self.code_to_name]
+        to_codes = [c for c in self.same_city_codes(to_station) if c in self.code_to_name]
+        if not from_codes or not to_codes:
+            # 城市数据缺失时退回单站查询（站名无法识别时同样由其处理）
+            return self.query_tickets(date, from_station, to_station)
+        # 输入站排在首位；输入城市名时取该城市的第一个车站
+        origin, destination = self.code_to_name[from_codes[0]], self.code_to_name[to_codes[0]]
+        data = self.query_tickets(date, origin, destination)
+        if not isinstance(data, list):
+            return data
+
+        merged = {}
+        self._merge_rows(merged, data)
+        seen_from = {key[1] for key in merged}
+        seen_to = {key[2] for key in merged}
+        skip = self._expand_empty.setdefault((from_station, to_station, date), set())
+        missing = [(code, True) for code in from_codes[1:] if code not in seen_from and code not in skip]
+        missing += [(code, False) for code in to_codes[1:] if code not in seen_to and code not in skip]
+        if not missing:
+            return data
+
+        allowed = self._expand_budget()
+        if len(missing) > allowed:
+            self.logger.debug("同城扩展查询: %s -> %s 本轮补充 %d/%d 个车站，其余超出请求预算",
+                              from_station, to_station, allowed, len(missing))
+            missing = missing[:allowed]
+        if not missing:
+            return data
+
+        def pair(code, is_origin):
+            name = self.code_to_name[code]
+            return (name, destination) if is_origin else (origin, name)
+
+        if self._expand_pool is None:
+            workers = self.config.get("network", {}).get("sweep_workers", 4)
+            self._expand_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="expand")
+        futures = [(code, is_origin, self._expand_pool.submit(lambda p: self.query_tickets(date, *p),
+                                                             pair(code, is_origin)))
+                   for code, is_origin in missing]
+        failed = 0
+        for code, is_origin, future in futures:
+            extra = future.result()
+            if not isinstance(extra, list):
+                failed += 1
+                continue
+            self._merge_rows(merged, extra)
+            if not any(key[1 if is_origin else 2] == code for key in merged):
+                skip.add(code)
+        self.logger.debug("同城扩展查询: %s -> %s, 补充查询 %d 个车站, 失败 %d, 合并后 %d 条",
+                          from_station, to_station, len(missing), failed, len(merged))
+        return [item for _, item in sorted(merged.values(), key=lambda v: v[0])]
+
+    def _merge_rows(self, merged, data):
+        """按 车次 + 上下车站 去重合并查询结果 {(车次, 上车站代码, 下车站代码): (开点, 原始行)}"""
+        for item in data:
+            fields = self.row_schema.decode(item, report=False)
+            if fields is not None:
+                merged.setdefault(fields[:3], (fields[3], item))
+
+    def _expand_budget(self):
+        """同城扩展查询每个任务每轮可用的补充查询次数（扣除任务本身的一次查询）"""
+        if self.rate_limiter is None:
+            return len(self.station_dict)
+        per_interval = self._interval() * self.rate_limiter.rate
+        return max(0, int(per_interval / max(1, len(self._monitored))) - 1)
+
+    def _decode_response(self, status_code, load_json, route):
+        """
+        解析查询响应
+        :param status_code: HTTP 状态码
+        :param load_json: 返回 JSON 对象的函数（实时查询为 response.json，回放时解析归档文本）
+        :param route: 线路（用于指标与日志）
+        :return: data.result 列表；被限流时为 None
+        """
+        if status_code in (403, 429):
+            self.metrics.throttles.inc(route=route)
+            self.logger.warning("查询被限流: %s, HTTP %d", route, status_code)
+            return None
+        try:
+            with self.metrics.time_phase("json_decode", route):
+                payload = load_json()
+        except ValueError:
+            # 12306 限流时通常返回 HTML 错误页而非 JSON
+            self.metrics.throttles.inc(route=route)
+            self.logger.warning("查询返回非 JSON 响应（疑似限流）: %s", route)
             return None
+        return payload.get('data', {}).get('result', [])
 
     def export_to_json(self, tickets, filepath: str):
         """
-        导出车票信息到 JSON 文件
-        :param tickets: 车票列表
+        导出车票信息到 JSON 文件（逐条写入，tickets 可以是生成器）
+        :param tickets: 车票列表或生成器
         :param filepath: 输出文件路径
         """
-        data = {
-            "export_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_count": len(tickets),
-            "tickets": [ticket.to_dict() for ticket in tickets]
-        }
+        count = 0
         with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        self.logger.info(f"导出 {len(tickets)} 条车票信息到: {filepath}")
+            f.write('{\n  "export_time": %s,\n  "tickets": [' % json.dumps(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            for ticket in tickets:
+                f.write(",\n    " if count else "\n    ")
+                f.write(json.dumps(ticket.to_dict(), ensure_ascii=False))
+                count += 1
+            # 条数在写完后才知道，放在末尾
+            f.write('\n  ],\n  "total_count": %d\n}\n' % count)
+        self.logger.info(f"导出 {count} 条车票信息到: {filepath}")
 
-    def parse_and_print(self, raw_data, target_trains=None, type_filter=None, sel_from=None, sel_to=None, date=None, return_all=False):
+    def _parse_rows(self, raw_data, target_trains=None, type_filter=None, sel_from=None, sel_to=None, date=None,
+                    report_drift=True):
         """
-        解析并打印车票信息
-        :param return_all: 是否返回所有车票（包括无票的）
-        :return: 有票的车次列表；如果 return_all=True，返回所有车票
+        解析查询结果（字段位置由配置 row_schema 决定，格式不符的行跳过并计入指标）
+        :param report_drift: 是否统计格式漂移（同一结果再次解析时关闭）
+        :return: 生成 (表格行, TicketInfo 或 None, 是否有票)
         """
-        table = PrettyTable()
-        table.field_names = ["车次", "始发", "到达", "开点", "到点", "历时", "商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座"]
-
-        available_tickets = []  # 记录有票的车次
-        all_tickets = []  # 记录所有车票
-
+        intern = sys.intern
+        decode = self.row_schema.decode
         for item in raw_data:
-            d = item.split('|')
-            train_no = d[3]
+            fields = decode(item, report_drift)
+            if fields is None: continue
+            # 坐席依次为 商务/特等、一等座、二等座、一等卧/软卧、二等卧/硬卧、软座、硬座、无座（空值已转为 "--"）
+            train_no, f_code, t_code, depart, arrive, duration, sw, yd, ed, y_wo, e_wo, rz, yz, wz = fields
+            train_no = intern(train_no)
             train_type = self.classify_train(train_no)
 
             if type_filter and type_filter not in train_type: continue
             if target_trains and train_no not in target_trains: continue
 
-            f_st_name = self.code_to_name.get(d[6], d[6])
-            t_st_name = self.code_to_name.get(d[7], d[7])
+            f_st_name = self.code_to_name.get(f_code, f_code)
+            t_st_name = self.code_to_name.get(t_code, t_code)
             if sel_from and f_st_name != sel_from: continue
             if sel_to and t_st_name != sel_to: continue
 
-            # 坐席解析
-            sw = d[32] or "--"   # 商务/特等
-            yd = d[31] or "--"   # 一等座
-            ed = d[30] or "--"   # 二等座
-            y_wo = d[23] or "--" # 一等卧/软卧
-            e_wo = d[28] or "--" # 二等卧/硬卧
-            rz = d[24] or "--"   # 软座
-            yz = d[29] or "--"   # 硬座
-            wz = d[26] or "--"   # 无座
-
-            row = [train_no, f_st_name, t_st_name, d[8], d[9], d[10], sw, yd, ed, y_wo, e_wo, rz, yz, wz]
-
-            # 坐席信息
-            seats = {'商/特': sw, '一等座': yd, '二等座': ed,
-                     '一等/软卧': y_wo, '二等/硬卧': e_wo, '软座': rz, '硬座': yz, '无座': wz}
+            row = [train_no, f_st_name, t_st_name, depart, arrive, duration, sw, yd, ed, y_wo, e_wo, rz, yz, wz]
 
             # 基础着色逻辑（非S字头：有任意票即绿）
             has_ticket = any(s not in ['无', '--', '', '0'] for s in [sw, yd, ed, y_wo, e_wo, rz, yz])
@@ -279,42 +1092,83 @@ class TrainMonitor:
                 if has_ticket:
                     row[0] = f"\033[92m{train_no}\033[0m"
 
-            # 为所有车次创建 TicketInfo（用于导出）
-            available_seats = {k: v for k, v in seats.items() if v not in ['无', '--', '', '0']}
+            # 为所有车次创建 TicketInfo（用于导出）；坐席按 SEAT_TYPES 顺序编码，无票车次共用 NO_SEATS
+            ticket_info = None
             if date:
                 ticket_info = TicketInfo(
-                    train_no=train_no,
-                    from_station=f_st_name,
-                    to_station=t_st_name,
-                    date=date,
-                    departure_time=d[8],
-                    duration=d[10],
-                    available_seats=available_seats if has_ticket else {}
+                    train_no, f_st_name, t_st_name, date, intern(depart), intern(duration),
+                    encode_seats((sw, yd, ed, y_wo, e_wo, rz, yz, wz)) if has_ticket else NO_SEATS
                 )
-                all_tickets.append(ticket_info)
+            yield row, ticket_info, has_ticket
 
+    def parse_and_print(self, raw_data, target_trains=None, type_filter=None, sel_from=None, sel_to=None, date=None, return_all=False):
+        """
+        解析并打印车票信息
+        :param return_all: 是否返回所有车票（包括无票的）
+        :return: 有票的车次列表；如果 return_all=True，返回所有车票
+        """
+        available_tickets = []  # 记录有票的车次
+        all_tickets = []  # 记录所有车票
+        rows = []
+
+        for row, ticket_info, has_ticket in self._parse_rows(raw_data, target_trains, type_filter, sel_from, sel_to, date):
+            if ticket_info:
+                all_tickets.append(ticket_info)
                 # 有票的车次单独记录
                 if has_ticket:
                     available_tickets.append(ticket_info)
+            rows.append(row)
+        self._show_table(["车次", "始发", "到达", "开点", "到点", "历时"] + SEAT_HEADERS, rows)
+        return all_tickets if return_all else available_tickets  # 根据参数返回
 
+    def _show_table(self, headers, rows):
+        """输出表格：交互模式交给增量渲染器，其余直接打印"""
+        if self.renderer and self.renderer.collecting:
+            self.renderer.table(headers, rows)
+            return
+        from prettytable import PrettyTable
+        table = PrettyTable()
+        table.field_names = headers
+        for row in rows:
             table.add_row(row)
         print(table)
-        return all_tickets if return_all else available_tickets  # 根据参数返回
 
-    def start(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("\n" + "="*65)
-        print("=== 12306 余票查询与监控助手 ver 1.2.1 design by BH7GUL ===")
-        print("="*65)
+    def _emit(self, text=""):
+        """输出文本行：交互模式交给增量渲染器，其余直接打印"""
+        if self.renderer and self.renderer.collecting:
+            self.renderer.line(text)
+        else:
+            print(text)
 
-        f_st = input("1. 始发城市/站: ").strip()
-        t_st = input("2. 到达城市/站: ").strip()
-        date = input("3. 出发日期 (YYYY-MM-DD): ").strip()
-        t_in = input("4. 监控车次 (回车全部): ").strip()
-        target = t_in.split() if t_in else None
+    def print_sweep(self, results, target_trains=None, type_filter=None):
+        """
+        合并打印多个日期的查询结果（按 日期、开点 排序）
+        :param results: {日期: 查询结果}
+        :return: 各日期有票的车次列表（按日期顺序）
+        """
+        from prettytable import PrettyTable
+        table = PrettyTable()
+        table.field_names = ["日期", "车次", "始发", "到达", "开点", "到点", "历时"] + SEAT_HEADERS
 
-        type_filter, sel_from, sel_to = None, None, None
+        available_tickets = []
+        rows = []
+        for date in sorted(results):
+            data = results[date]
+            if not data:
+                rows.append([date, "--", "查询失败" if data is None else "无车次"] + [""] * 12)
+                continue
+            for row, ticket_info, has_ticket in self._parse_rows(data, target_trains, type_filter, date=date):
+                rows.append([date] + row)
+                if has_ticket:
+                    available_tickets.append(ticket_info)
+        rows.sort(key=lambda r: (r[0], r[4]))
+        for row in rows:
+            table.add_row(row)
+        print(table)
+        return available_tickets
 
+    def _set_target_trains(self, target, f_st, t_st, date):
+        """更新通知管理器的目标车次并记录监控开始"""
         # 新增：更新通知管理器的目标车次
         if self.notification_manager:
             self.notification_manager.config.target_trains = target
@@ -327,117 +1181,791 @@ class TrainMonitor:
         target_str = ', '.join(target) if target else '全部'
         self.logger.info(f"开始监控: {f_st} -> {t_st}, 日期: {date}, 目标车次: {target_str}")
 
-        while True:
-            data = self.query_tickets(date, f_st, t_st)
+    def _poll(self, date, f_st, t_st):
+        """执行一次查询并更新周期计数与指标汇总"""
+        data = self.fetch(date, f_st, t_st)
+        self.metrics.polls.inc(route=f"{f_st}->{t_st}")
+        self._publish_result(data, f_st, t_st, date)
+        summary_interval = self.config.get("metrics", {}).get("summary_interval_seconds", 600)
+        if self.metrics.summary_due(summary_interval):
+            self.logger.info("%s", self.metrics.summary_line())
+        return data
 
-            # 站名匹配失败处理
+    def _process_result(self, data, f_st, t_st, date, target=None, type_filter=None, sel_from=None, sel_to=None,
+                        record_history=True):
+        """
+        解析打印查询结果，记录历史并发送通知
+        :param record_history: 是否写入查询历史（回放时关闭）
+        :return: 有票的车次列表
+        """
+        route = f"{f_st}->{t_st}"
+
+        # 新增：获取有票列表并传入日期
+        with self.metrics.time_phase("parse", route):
+            available_tickets = self.parse_and_print(data, target, type_filter, sel_from, sel_to, date)
+
+        # 新增：记录查询历史
+        train_list = [t.train_no for t in available_tickets]
+        if record_history:
+            seat_map = {t.train_no: list(t.available_seats) for t in available_tickets}
+            with self.metrics.time_phase("history_record", route):
+                self.query_history.record(f_st, t_st, date, len(data), train_list, seat_map)
+
+        # 新增：发送通知
+        if self.notification_manager and available_tickets:
+            # 获取当前监控车次数量（通知前）
+            monitored_before = self.notification_manager.get_monitored_count()
+
+            self.logger.info("发现 %d 个有票车次: %s", len(available_tickets), train_list)
+            with self.metrics.time_phase("notify", route):
+                results = self.notification_manager.notify_ticket_available(available_tickets)
+            self.metrics.record_notifications(results)
+
+            # 获取新增的监控车次数量
+            monitored_after = self.notification_manager.get_monitored_count()
+            new_count = monitored_after - monitored_before
+
+            # 显示监控信息
+            self._emit(f"\n[监控信息] 当前监控 {monitored_after} 个有票车次，本次发现 {len(available_tickets)} 个有票车次")
+            if new_count > 0:
+                self._emit(f"[新发现] {new_count} 个新车次有票！（已发送强提醒）")
+
+            # 记录通知结果
+            if self.logger.is_enabled_for("DEBUG"):
+                for train_no, channel_results in results.items():
+                    self.logger.debug("  %s 通知结果: %s", train_no, channel_results)
+        elif self.notification_manager and self.notification_manager.has_pending():
+            # 补发等待渠道限速额度的通知
+            self.metrics.record_notifications(self.notification_manager.flush())
+
+        return available_tickets
+
+    def _legs(self, data, date, day_offset=0):
+        """查询结果中有票的车次转换为行程段"""
+        if not data or not isinstance(data, list):
+            return []
+        return [Leg.from_ticket(ticket, day_offset)
+                for _, ticket, has_ticket in self._parse_rows(data, date=date) if has_ticket]
+
+    def search_transfers(self, date, f_st, t_st, hubs=None):
+        """
+        中转换乘搜索：并发查询 始发->中转站、中转站->到达 两程，按换乘时间约束配对，打印并通知
+        :param hubs: 中转站列表，默认取配置 transfer.hubs
+        :return: 排序后的中转方案（TicketInfo）
+        """
+        conf = self.config.get("transfer", {})
+        hubs = [h for h in (hubs or conf.get("hubs", [])) if h not in (f_st, t_st)]
+        if not hubs:
+            return []
+        min_layover = conf.get("min_layover_minutes", 20)
+        max_layover = conf.get("max_layover_minutes", 180)
+        next_date = (datetime.strptime(date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        route = f"{f_st}->{t_st}"
+
+        workers = max(1, self.config.get("network", {}).get("sweep_workers", 4))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transfer") as pool:
+            query = lambda d, a, b: pool.submit(lambda: self.fetch(d, a, b))
+            first_futures = [query(date, f_st, hub) for hub in hubs]
+            second_futures = [query(date, hub, t_st) for hub in hubs]
+            with self.metrics.time_phase("parse", route):
+                first_legs = [leg for fut in first_futures for leg in self._legs(fut.result(), date)]
+            if not first_legs:
+                self.logger.info("中转搜索: %s 到各中转站均无票", f_st)
+                return []
+            second_results = [(fut.result(), date, 0) for fut in second_futures]
+            # 第一程到达较晚时，换乘窗口跨过零点，再查询次日的第二程
+            if max(leg.arrive for leg in first_legs) + max_layover >= 1440:
+                late_hubs = sorted({leg.to_station for leg in first_legs
+                                    if leg.arrive + max_layover >= 1440})
+                next_futures = [query(next_date, hub, t_st) for hub in late_hubs]
+                second_results += [(fut.result(), next_date, 1) for fut in next_futures]
+        with self.metrics.time_phase("parse", route):
+            second_legs = [leg for data, d, offset in second_results for leg in self._legs(data, d, offset)]
+            ranked = rank_itineraries(join_legs(first_legs, second_legs, min_layover, max_layover),
+                                      conf.get("max_results", 10))
+
+        self.logger.info("中转搜索: %s -> %s, 中转站 %s, 第一程 %d 个, 第二程 %d 个, 方案 %d 个",
+                         f_st, t_st, hubs, len(first_legs), len(second_legs), len(ranked))
+        if not ranked:
+            self._emit("\n[中转] 没有满足换乘时间要求且两程均有票的方案。")
+            return []
+
+        rows = []
+        for it in ranked:
+            a, b = it.first, it.second
+            rows.append([a.train_no, f"{a.from_station}→{a.to_station}", a.departure_text, a.arrival_text,
+                         f"{it.layover} 分钟", b.train_no, f"{b.from_station}→{b.to_station}",
+                         b.departure_text, b.arrival_text, f"{it.total // 60}:{it.total % 60:02d}"])
+        self._emit(f"\n[中转] 直达无票，找到 {len(ranked)} 个中转方案（换乘 {min_layover}-{max_layover} 分钟）:")
+        self._show_table(["第一程", "区间1", "开点1", "到点1", "换乘", "第二程", "区间2", "开点2", "到点2", "总历时"], rows)
+
+        tickets = [it.to_ticket(date, f_st, t_st) for it in ranked]
+        if self.notification_manager:
+            with self.metrics.time_phase("notify", route):
+                results = self.notification_manager.notify_ticket_available(tickets)
+            self.metrics.record_notifications(results)
+        return tickets
+
+    def _maybe_search_transfers(self, date, f_st, t_st):
+        """直达无票且启用中转搜索时执行"""
+        conf = self.config.get("transfer", {})
+        if conf.get("enabled", False) and conf.get("hubs"):
+            self.search_transfers(date, f_st, t_st)
+
+    def _profile_begin(self):
+        if self.profiler and self.profiler.active:
+            self.profiler.begin_cycle()
+
+    def _profile_end(self):
+        if self.profiler and self.profiler.end_cycle():
+            self.logger.info("性能剖析完成，报告: %s", self.profiler.report_files)
+            print(f"\n[剖析] 已完成 {self.profiler.completed_cycles} 个周期，报告已写入: {self.profiler.report_files[0]}")
+
+    def run_headless(self, f_st, t_st, date, target=None, interval=None, cycles=0):
+        """
+        无交互运行监控（无需键盘输入，适合后台/服务器）
+        :param interval: 两次查询之间的间隔（秒），默认取配置 monitor.interval_seconds
+        :param cycles: 运行的周期数，0 表示不限；启用剖析时在剖析完成后结束
+        :return: 退出码
+        """
+        self._set_target_trains(target, f_st, t_st, date)
+        self._watch_routes([(f_st, t_st, date)])
+        done = 0
+        while True:
+            self._profile_begin()
+            data = self._poll(date, f_st, t_st)
             if data == "STATION_NOT_FOUND":
-                print(f"\n[!] 错误：无法识别站名。请检查是否输入了简写或错别字。")
-                input("请按 [回车键] 重新开始查询...")
-                return self.start()
+                print(f"[!] 错误：无法识别站名: {f_st} -> {t_st}")
+                return 1
 
             now = datetime.now().strftime("%H:%M:%S")
-            os.system('cls' if os.name == 'nt' else 'clear')
+            print(f"\n[{now}] {f_st} -> {t_st} ({date})")
+            if data:
+                available = self._process_result(data, f_st, t_st, date, target)
+                if not available:
+                    self._maybe_search_transfers(date, f_st, t_st)
+            else:
+                self.logger.warning("查询返回空数据")
+                print("目前没有符合条件的列车。")
+            self._profile_end()
 
-            mode_str = "官方定义" if self.config["dc_classification"]["default_mode"] == "official" else "智能识别(动集归普)"
-            print(f"[{now}] {f_st} -> {t_st} ({date}) | 模式: {mode_str}")
-            print(f"当前筛选: 类型[{type_filter or '全部'}] | 始发[{sel_from or '全部'}] | 到达[{sel_to or '全部'}]")
-            print("-" * 110)
-            print("[S]筛选车型  [F]筛选站点  [M]切换模式  [E]导出结果  [C]重置筛选  [R]重新查询  [Q]退出")
+            done += 1
+            if self.profiler and not self.profiler.active:
+                return 0
+            if cycles and done >= cycles:
+                return 0
+            time.sleep(self._next_wait(f_st, t_st, interval))
 
-            if data:
-                # 新增：获取有票列表并传入日期
-                available_tickets = self.parse_and_print(data, target, type_filter, sel_from, sel_to, date)
+    def _fetch_dates(self, pool, dates, f_st, t_st):
+        """
+        并发查询多个日期（共享限速器）
+        :return: {日期: 查询结果}
+        """
+        futures = {date: pool.submit(lambda d: self.fetch(d, f_st, t_st), date)
+                   for date in dates}
+        route = f"{f_st}->{t_st}"
+        self.metrics.polls.inc(len(dates), route=route)
+        summary_interval = self.config.get("metrics", {}).get("summary_interval_seconds", 600)
+        if self.metrics.summary_due(summary_interval):
+            self.logger.info("%s", self.metrics.summary_line())
+        return {date: future.result() for date, future in futures.items()}
+
+    def run_sweep(self, f_st, t_st, dates, target=None, interval=None, cycles=0):
+        """
+        多日期扫描监控：每轮并发查询所有日期，合并为一张表，同一车次跨日期只通知一次
+        :param dates: 日期列表（见 expand_dates）
+        :param interval: 两轮扫描之间的间隔（秒），默认取配置 monitor.interval_seconds
+        :param cycles: 运行的轮数，0 表示不限
+        :return: 退出码
+        """
+        self._wait_station_sync()
+        if f_st not in self.station_dict or t_st not in self.station_dict:
+            self.init_station_data()
+        if f_st not in self.station_dict or t_st not in self.station_dict:
+            print(f"[!] 错误：无法识别站名: {f_st} -> {t_st}")
+            return 1
 
-                # 新增：记录查询历史
-                train_list = [t.train_no for t in available_tickets]
-                self.query_history.record(f_st, t_st, date, len(data), train_list)
+        self._set_target_trains(target, f_st, t_st, f"{dates[0]} ~ {dates[-1]} ({len(dates)} 天)")
+        route = f"{f_st}->{t_st}"
+        self._watch_routes([(f_st, t_st, date) for date in dates])
+        workers = max(1, min(len(dates), self.config.get("network", {}).get("sweep_workers", 4)))
+        done = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sweep") as pool:
+            while True:
+                self._profile_begin()
+                results = self._fetch_dates(pool, dates, f_st, t_st)
+
+                now = datetime.now().strftime("%H:%M:%S")
+                print(f"\n[{now}] {f_st} -> {t_st} | {dates[0]} ~ {dates[-1]}，共 {len(dates)} 天")
+                with self.metrics.time_phase("parse", route):
+                    available_tickets = self.print_sweep(results, target)
+
+                for date, data in results.items():
+                    if data:
+                        trains = [t.train_no for t in available_tickets if t.date == date]
+                        seat_map = {t.train_no: list(t.available_seats) for t in available_tickets if t.date == date}
+                        with self.metrics.time_phase("history_record", route):
+                            self.query_history.record(f_st, t_st, date, len(data), trains, seat_map)
+                    self._publish_result(data, f_st, t_st, date)
 
-                # 新增：发送通知
                 if self.notification_manager and available_tickets:
-                    # 获取当前监控车次数量（通知前）
-                    monitored_before = self.notification_manager.get_monitored_count()
+                    self.logger.info("扫描发现 %d 个有票车次/日期", len(available_tickets))
+                    with self.metrics.time_phase("notify", route):
+                        notify_results = self.notification_manager.notify_across_dates(available_tickets)
+                    self.metrics.record_notifications(notify_results)
+                    if notify_results:
+                        print(f"\n[新发现] {len(notify_results)} 个车次有票（已合并日期发送提醒）")
+                elif self.notification_manager and self.notification_manager.has_pending():
+                    # 补发等待渠道限速额度的通知
+                    self.metrics.record_notifications(self.notification_manager.flush())
+                self._profile_end()
 
-                    self.logger.info(f"发现 {len(available_tickets)} 个有票车次: {train_list}")
-                    results = self.notification_manager.notify_ticket_available(available_tickets)
+                done += 1
+                if self.profiler and not self.profiler.active:
+                    return 0
+                if cycles and done >= cycles:
+                    return 0
+                time.sleep(self._next_wait(f_st, t_st, interval))
 
-                    # 获取新增的监控车次数量
-                    monitored_after = self.notification_manager.get_monitored_count()
-                    new_count = monitored_after - monitored_before
+    def _available_tickets(self, data, date):
+        """解析查询结果（不打印），返回有票车次"""
+        return [ticket for _, ticket, has_ticket in self._parse_rows(data, date=date) if has_ticket]
 
-                    # 显示监控信息
-                    print(f"\n[监控信息] 当前监控 {monitored_after} 个有票车次，本次发现 {len(available_tickets)} 个有票车次")
-                    if new_count > 0:
-                        print(f"[新发现] {new_count} 个新车次有票！（已发送强提醒）")
+    def _dispatch_key(self, key, ok, rows, available, index=None):
+        """
+        处理一个 (线路, 日期) 的查询结果：记录历史并通知（订阅模式分发给各用户）
+        :param index: 订阅索引；为 None 时使用本机通知管理器
+        """
+        f_st, t_st, date = key
+        route = f"{f_st}->{t_st}"
+        self.metrics.polls.inc(route=route)
+        if not ok:
+            print(f"  {f_st} -> {t_st} ({date}): 查询失败")
+            return
+        train_list = [t.train_no for t in available]
+        with self.metrics.time_phase("history_record", route):
+            self.query_history.record(f_st, t_st, date, rows, train_list,
+                                      {t.train_no: list(t.available_seats) for t in available})
+        notified = ""
+        with self.metrics.time_phase("notify", route):
+            if index is not None:
+                results = index.dispatch(key, available)
+                for user_results in results.values():
+                    self.metrics.record_notifications(user_results)
+                if results:
+                    notified = f"，通知 {len(results)} 人: {', '.join(results)}"
+            elif self.notification_manager and available:
+                results = self.notification_manager.notify_ticket_available(available)
+                self.metrics.record_notifications(results)
+                if results:
+                    notified = f"，已通知: {', '.join(results)}"
+            elif self.notification_manager:
+                self.metrics.record_notifications(self.notification_manager.flush())
+        print(f"  {f_st} -> {t_st} ({date}): {rows} 车次，有票 {len(available)}{notified}")
 
-                    # 记录通知结果
-                    for train_no, channel_results in results.items():
-                        self.logger.debug(f"  {train_no} 通知结果: {channel_results}")
+    def run_subscriptions(self, path, interval=None, cycles=0):
+        """
+        多用户订阅监控：每个 (线路, 日期) 每轮只查询一次，结果分发给相关订阅，各用户通过自己的渠道接收通知
+        :param path: 订阅文件（见 notification.SubscriptionIndex.from_file）
+        :param interval: 两轮查询之间的间隔（秒），默认取配置 monitor.interval_seconds；
+                         启用放票日历时各线路按各自的放票窗口调整，每轮只查询到期的线路
+        :param cycles: 运行的轮数，0 表示不限
+        :return: 退出码
+        """
+        from notification import SubscriptionIndex
+        try:
+            index = SubscriptionIndex.from_file(path, self.config.get("notification", {}))
+        except Exception as e:
+            self.logger.error("订阅文件加载失败: %s", e, exc_info=True)
+            print(f"[!] 订阅文件加载失败: {e}")
+            return 1
+        routes = index.routes()
+        if not routes:
+            print("[!] 订阅文件中没有订阅")
+            return 1
+        self.logger.info("订阅监控: %d 个用户, %d 条订阅, %d 个线路/日期", len(index.managers), len(index), len(routes))
+        print(f"订阅监控: {len(index.managers)} 个用户, {len(index)} 条订阅, {len(routes)} 个线路/日期")
+
+        current = [index]
+        self._watch_subscriptions(path, current)
+        workers = max(1, min(len(routes), self.config.get("network", {}).get("sweep_workers", 4)))
+        done = 0
+        next_due = {}  # {(始发, 到达, 日期): 下次查询的 monotonic 时间}，未登记的任务立即查询
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="subscription") as pool:
+            while True:
+                # 订阅文件热加载后，下一轮按新的订阅查询
+                index = current[0]
+                routes = index.routes()
+                self._watch_routes(routes)
+                due = [key for key in routes if next_due.get(key, 0) <= time.monotonic()]
+                self._profile_begin()
+                futures = {key: pool.submit(lambda k: self.fetch(k[2], k[0], k[1]), key)
+                           for key in due}
+                now = datetime.now().strftime("%H:%M:%S")
+                print(f"\n[{now}] 本轮查询 {len(due)} 个线路/日期")
+                for key, future in futures.items():
+                    data = future.result()
+                    ok = isinstance(data, list)
+                    with self.metrics.time_phase("parse", f"{key[0]}->{key[1]}"):
+                        available = self._available_tickets(data, key[2]) if ok else []
+                    self._dispatch_key(key, ok, len(data) if ok else 0, available, index)
+                    self._publish_result(data, *key)
+                summary_interval = self.config.get("metrics", {}).get("summary_interval_seconds", 600)
+                if self.metrics.summary_due(summary_interval):
+                    self.logger.info("%s", self.metrics.summary_line())
+                self._profile_end()
+
+                done += 1
+                if self.profiler and not self.profiler.active:
+                    return 0
+                if cycles and done >= cycles:
+                    return 0
+                finished = time.monotonic()
+                for key in due:
+                    next_due[key] = finished + self._next_wait(key[0], key[1], interval)
+                pending = [next_due.get(key, 0) for key in index.routes()] or [finished + self._interval(interval)]
+                time.sleep(max(min(pending) - time.monotonic(), 0))
+
+    def _watch_subscriptions(self, path, current, on_swap=None):
+        """
+        监视订阅文件，修改后重建订阅索引（各用户的冷却计时沿用旧索引）
+        :param current: [当前索引]，新索引就地替换其中的元素
+        :param on_swap: 替换后的回调，参数为新索引
+        :return: 文件监视器；配置关闭热加载时为 None
+        """
+        conf = self.config.get("monitor", {})
+        if not conf.get("hot_reload", True):
+            return None
+
+        def reload(data):
+            from notification import SubscriptionIndex
+            try:
+                index = SubscriptionIndex.from_dict(data, self.config.get("notification", {}))
+            except (KeyError, ValueError, TypeError) as e:
+                self.logger.error("订阅文件无效，保持当前订阅: %s", e)
+                return
+            old = current[0]
+            index.carry_over(old)
+            added = set(index.routes()) - set(old.routes())
+            removed = set(old.routes()) - set(index.routes())
+            current[0] = index
+            if on_swap:
+                on_swap(index)
+            self.logger.info("订阅已重新加载: %d 个用户, %d 条订阅, 新增 %d / 移除 %d 个线路/日期",
+                             len(index.managers), len(index), len(added), len(removed))
+
+        return ConfigWatcher(path, reload, conf.get("reload_check_seconds", 2), logger=self.logger).start()
+
+    def _poll_key(self, key):
+        """工作进程查询一个任务：(是否成功, 车次数, 有票车次)"""
+        f_st, t_st, date = key
+        data = self.fetch(date, f_st, t_st)
+        if not isinstance(data, list):
+            return False, 0, []
+        with self.metrics.time_phase("parse", f"{f_st}->{t_st}"):
+            return True, len(data), self._available_tickets(data, date)
+
+    def run_worker(self, address, worker_id="0"):
+        """
+        分片工作进程：连接协调者，查询分配到的任务并上报结果（通知由协调者负责）
+        :param address: 协调者地址 HOST:PORT
+        :return: 退出码
+        """
+        from cluster import Worker
+        host, port = address.rsplit(":", 1)
+        worker = Worker(self._poll_key, host, int(port), worker_id, logger=self.logger)
+        print(f"工作进程 {worker_id} 已启动，协调者: {address}")
+        return worker.run()
+
+    def run_coordinator(self, address, jobs, interval=None, local_workers=0, index=None, subscriptions=None,
+                        target=None):
+        """
+        分片协调者：按一致性哈希把任务分配给工作进程，工作进程失联时自动重新分配；通知去重统一在此完成
+        :param address: 监听地址 HOST:PORT（远程工作进程需监听 0.0.0.0）
+        :param jobs: 任务列表 [(始发, 到达, 日期)]
+        :param local_workers: 在本机启动的工作进程数；本机工作进程平分 network.max_queries_per_second，
+                              总查询速率与单进程相同（远程工作进程使用各自主机的配置）
+        :param index: 订阅索引（订阅模式）
+        :param subscriptions: 订阅文件路径，修改后重新加载并重新分配任务
+        :param target: 目标车次列表（非订阅模式），只记录与通知这些车次
+        :return: 退出码
+        """
+        import subprocess
+        from cluster import Coordinator
+        host, port = address.rsplit(":", 1)
+
+        current = [index]
+        if target and self.notification_manager:
+            self.notification_manager.config.target_trains = target
+
+        def on_result(key, ok, rows, available):
+            if target:
+                available = [t for t in available if t.train_no in target]
+            if self.live_state:
+                # 工作进程只上报有票车次
+                if ok:
+                    self.live_state.update(key, available)
+                else:
+                    self.live_state.mark_failed(key)
+            self._dispatch_key(key, ok, rows, available, current[0])
+
+        coordinator = Coordinator(jobs, on_result, host, int(port), self._interval(interval), logger=self.logger).start()
+        self._coordinator, self._coordinator_interval = coordinator, interval
+        watcher = None
+        if index is not None and subscriptions:
+            watcher = self._watch_subscriptions(subscriptions, current,
+                                                lambda new_index: coordinator.update(jobs=new_index.routes()))
+        connect_host = "127.0.0.1" if host in ("0.0.0.0", "") else host
+        print(f"协调者已启动: {coordinator.address}，{len(jobs)} 个任务")
+        print(f"远程工作进程: python main.py --worker {connect_host}:{coordinator.port} --worker-id N")
+
+        processes = []
+        rate = self.config.get("network", {}).get("max_queries_per_second", 1.0)
+        for i in range(local_workers):
+            if getattr(sys, "frozen", False):
+                cmd = [sys.executable]
+            else:
+                cmd = [sys.executable, os.path.abspath(__file__)]
+            cmd += ["--worker", f"{connect_host}:{coordinator.port}", "--worker-id", str(i)]
+            if rate > 0:
+                # 本机工作进程共用同一出口，平分查询速率
+                cmd += ["--worker-qps", str(rate / local_workers)]
+            if self._cli_base_url:
+                cmd += ["--base-url", self._cli_base_url]
+            processes.append(subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        try:
+            while True:
+                time.sleep(max(self._interval(interval), 10))
+                status = coordinator.status()
+                self.logger.info("工作进程状态: %s", status)
+                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 工作进程 {len(status)} 个: "
+                      + ", ".join(f"{name}({s['jobs']} 任务)" for name, s in status.items()))
+                summary_interval = self.config.get("metrics", {}).get("summary_interval_seconds", 600)
+                if self.metrics.summary_due(summary_interval):
+                    self.logger.info("%s", self.metrics.summary_line())
+        finally:
+            if watcher:
+                watcher.stop()
+            coordinator.stop()
+            for proc in processes:
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+
+    def replay(self, paths, realtime=False, speed=1.0, send_notifications=False):
+        """
+        回放原始响应归档，经过与实时查询相同的 解析 -> 对比 -> 通知 流程
+        :param paths: 归档文件列表
+        :param realtime: 按记录间隔回放；否则尽可能快
+        :param speed: 实时回放的倍速
+        :param send_notifications: 是否真正发送通知（默认仅在内存中记录）
+        :return: 回放统计
+        """
+        from notification import MemoryNotification
+        memory = MemoryNotification()
+        replay_clock = [0.0]
+        if self.notification_manager:
+            if not send_notifications:
+                self.notification_manager.channels = [memory]
+            # 冷却判断使用记录时间，保证快速回放结果与当时一致
+            self.notification_manager.clock = lambda: replay_clock[0]
+
+        self.logger.info("开始回放: %s (%s)", paths, "实时" if realtime else "全速")
+        count, empty, prev_ts = 0, 0, None
+        started = time.perf_counter()
+        for rec in ResponseArchive.read(paths):
+            ts = rec.get("ts", 0.0)
+            if realtime and prev_ts is not None and ts > prev_ts:
+                time.sleep((ts - prev_ts) / max(speed, 1e-6))
+            prev_ts = ts
+            replay_clock[0] = ts
+
+            f_st, t_st, date = rec.get("from", ""), rec.get("to", ""), rec.get("date", "")
+            body = rec.get("body", "")
+            data = self._decode_response(rec.get("status", 200), lambda: json.loads(body), f"{f_st}->{t_st}")
+            if data:
+                self._process_result(data, f_st, t_st, date, record_history=False)
+            else:
+                empty += 1
+            count += 1
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            "records": count,
+            "empty_or_throttled": empty,
+            "notifications": len(memory.sent) if not send_notifications else self.metrics.notifications_sent.total(),
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(count / elapsed, 1) if elapsed > 0 else None,
+        }
+        self.logger.info("回放完成: %s", stats)
+        return stats
+
+    def start(self):
+        """
+        交互模式：显式状态机循环（输入 -> 监控 -> 输入 ...），重新查询时不递归调用
+        """
+        self.renderer = TerminalRenderer()
+        with KeyReader() as keys:
+            state, session = "input", None
+            while state != "quit":
+                if state == "input":
+                    session = self._prompt_session(keys)
+                    state = "monitor"
+                else:
+                    # 监控结束后会话数据随之释放，长时间多次重新查询内存保持平稳
+                    state = self._monitor_session(keys, *session)
+                    session = None
+        self.logger.info("用户退出程序")
+
+    def _prompt_session(self, keys):
+        """输入线路与目标车次"""
+        self.renderer.clear()
+        print("\n" + "="*65)
+        print("=== 12306 余票查询与监控助手 ver 1.2.1 design by BH7GUL ===")
+        print("="*65)
+
+        with keys.suspended():
+            f_st = input("1. 始发城市/站: ").strip()
+            t_st = input("2. 到达城市/站: ").strip()
+            date = input("3. 出发日期 (YYYY-MM-DD): ").strip()
+            t_in = input("4. 监控车次 (回车全部): ").strip()
+        target = t_in.split() if t_in else None
+        self.renderer.invalidate()
+        return f_st, t_st, date, target
+
+    def _monitor_session(self, keys, f_st, t_st, date, target):
+        """
+        监控一条线路直到用户重新查询或退出
+        :return: 下一个状态，"input" 或 "quit"
+        """
+        type_filter, sel_from, sel_to = None, None, None
+
+        self._set_target_trains(target, f_st, t_st, date)
+        self._watch_routes([(f_st, t_st, date)])
+
+        while True:
+            self._profile_begin()
+            data = self._poll(date, f_st, t_st)
+
+            # 站名匹配失败处理
+            if data == "STATION_NOT_FOUND":
+                self._profile_end()
+                print(f"\n[!] 错误：无法识别站名。请检查是否输入了简写或错别字。")
+                with keys.suspended():
+                    input("请按 [回车键] 重新开始查询...")
+                return "input"
+
+            now = datetime.now().strftime("%H:%M:%S")
+            # 增量渲染：只重绘与上一帧不同的单元格，不再清屏
+            self.renderer.begin()
+
+            mode_str = "官方定义" if self.config["dc_classification"]["default_mode"] == "official" else "智能识别(动集归普)"
+            self._emit(f"[{now}] {f_st} -> {t_st} ({date}) | 模式: {mode_str}")
+            self._emit(f"当前筛选: 类型[{type_filter or '全部'}] | 始发[{sel_from or '全部'}] | 到达[{sel_to or '全部'}]")
+            self._emit("-" * 110)
+            self._emit("[S]筛选车型  [F]筛选站点  [M]切换模式  [E]导出结果  [C]重置筛选  [R]重新查询  [Q]退出")
+
+            if data:
+                available = self._process_result(data, f_st, t_st, date, target, type_filter, sel_from, sel_to)
+                if not available:
+                    self._maybe_search_transfers(date, f_st, t_st)
             else:
                 self.logger.warning("查询返回空数据")
-                print("\n目前没有符合条件的列车。")
-
-            wait_sec = 180
-            for i in range(wait_sec, 0, -1):
-                print(f"\r{i}s 后刷新... (Enter立即刷新)", end="", flush=True)
-                if msvcrt.kbhit():
-                    key = msvcrt.getch().lower()
-                    if key == b'\r':
-                        self.logger.debug("用户手动触发刷新")
-                        break
-                    if key == b's':
-                        print("\n1.全部  2.高铁动车  3.普通车")
+                self._emit("\n目前没有符合条件的列车。")
+            self.renderer.flush()
+            self._profile_end()
+
+            # 阻塞等待按键或倒计时的下一秒，按键立即响应
+            deadline = time.monotonic() + self._next_wait(f_st, t_st)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                print(f"\r{math.ceil(remaining)}s 后刷新... (Enter立即刷新)", end="", flush=True)
+                key = keys.wait(remaining - math.ceil(remaining) + 1)
+                if key is None:
+                    continue
+                if key == ENTER:
+                    self.logger.debug("用户手动触发刷新")
+                    break
+                if key == 's':
+                    print("\n1.全部  2.高铁动车  3.普通车")
+                    with keys.suspended():
                         opt = input("选择(1/2/3): ").strip()
-                        type_filter = {"2": "高铁动车", "3": "普通车"}.get(opt)
-                        if type_filter:
-                            self.logger.debug(f"筛选车型: {type_filter}")
-                        break
-                    if key == b'f' and data:
-                        s_from = sorted(list(set(self.code_to_name.get(x.split('|')[6], x.split('|')[6]) for x in data)))
-                        s_to = sorted(list(set(self.code_to_name.get(x.split('|')[7], x.split('|')[7]) for x in data)))
-
-                        print("\n" + "-"*30)
-                        print(f"[始发站选项]: {s_from}")
-                        print(f"[到达站选项]: {s_to}")
-                        print('[提示]: 直接按回车表示"全部"，不进行该项筛选')
-                        print("-" * 30)
+                    type_filter = {"2": "高铁动车", "3": "普通车"}.get(opt)
+                    self.renderer.invalidate()
+                    if type_filter:
+                        self.logger.debug(f"筛选车型: {type_filter}")
+                    break
+                if key == 'f' and data:
+                    codes = [f[1:3] for f in map(lambda x: self.row_schema.decode(x, report=False), data) if f]
+                    s_from = sorted(set(self.code_to_name.get(f, f) for f, _ in codes))
+                    s_to = sorted(set(self.code_to_name.get(t, t) for _, t in codes))
 
+                    print("\n" + "-"*30)
+                    print(f"[始发站选项]: {s_from}")
+                    print(f"[到达站选项]: {s_to}")
+                    print('[提示]: 直接按回车表示"全部"，不进行该项筛选')
+                    print("-" * 30)
+
+                    with keys.suspended():
                         sel_from = input("输入精确始发站（按回车键跳过）: ").strip() or None
                         sel_to = input("输入精确到达站（按回车键跳过）: ").strip() or None
-                        self.logger.debug(f"筛选站点: 始发[{sel_from or '全部'}] 到达[{sel_to or '全部'}]")
-                        break
-                    if key == b'm':
-                        curr = self.config["dc_classification"]["default_mode"]
-                        self.config["dc_classification"]["default_mode"] = "smart" if curr == "official" else "official"
-                        self.save_config()
-                        new_mode = self.config["dc_classification"]["default_mode"]
-                        self.logger.info(f"切换DC识别模式: {curr} -> {new_mode}")
-                        break
-                    if key == b'c':
-                        type_filter, sel_from, sel_to = None, None, None
-                        self.logger.debug("重置所有筛选条件")
-                        break
-                    if key == b'e' and data:
-                        # 导出所有查询结果
-                        all_tickets = self.parse_and_print(data, target, type_filter, sel_from, sel_to, date, return_all=True)
-                        export_file = os.path.join(self.log_dir, f"tickets_{date}_{datetime.now().strftime('%H%M%S')}.json")
-                        self.export_to_json(all_tickets, export_file)
-                        print(f"\n[✓] 结果已导出到: {export_file}")
+                    self.renderer.invalidate()
+                    self.logger.debug(f"筛选站点: 始发[{sel_from or '全部'}] 到达[{sel_to or '全部'}]")
+                    break
+                if key == 'm':
+                    curr = self.config["dc_classification"]["default_mode"]
+                    self.config["dc_classification"]["default_mode"] = "smart" if curr == "official" else "official"
+                    self.save_config()
+                    new_mode = self.config["dc_classification"]["default_mode"]
+                    self.logger.info(f"切换DC识别模式: {curr} -> {new_mode}")
+                    break
+                if key == 'c':
+                    type_filter, sel_from, sel_to = None, None, None
+                    self.logger.debug("重置所有筛选条件")
+                    break
+                if key == 'e' and data:
+                    # 导出所有查询结果
+                    all_tickets = (t for _, t, _ in self._parse_rows(data, target, type_filter, sel_from, sel_to, date,
+                                                                     report_drift=False))
+                    export_file = os.path.join(self.log_dir, f"tickets_{date}_{datetime.now().strftime('%H%M%S')}.json")
+                    self.export_to_json(all_tickets, export_file)
+                    print(f"\n[✓] 结果已导出到: {export_file}")
+                    with keys.suspended():
                         input("按回车键继续...")
-                        break
-                    if key == b'r':
-                        self.logger.info("用户重新开始查询")
-                        return self.start()
-                    if key == b'q':
-                        self.logger.info("用户退出程序")
-                        sys.exit()
-                time.sleep(1)
+                    self.renderer.invalidate()
+                    break
+                if key == 'r':
+                    self.logger.info("用户重新开始查询")
+                    return "input"
+                if key == 'q':
+                    return "quit"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="12306 余票查询与监控助手")
+    headless = parser.add_argument_group("无交互模式（同时指定 --from/--to/--date 时启用）")
+    headless.add_argument("--from", dest="from_station", help="始发城市/站")
+    headless.add_argument("--to", dest="to_station", help="到达城市/站")
+    headless.add_argument("--date", help="出发日期 YYYY-MM-DD")
+    headless.add_argument("--until", metavar="YYYY-MM-DD", help="扫描模式：结束日期（含），与 --date 组成日期范围并发查询")
+    headless.add_argument("--weekdays", metavar="MASK", help="扫描模式：仅查询指定星期，如 67 表示周六、周日")
+    headless.add_argument("--trains", nargs="*", help="监控车次（默认全部）")
+    headless.add_argument("--interval", type=float, help="查询间隔秒数（默认取配置 monitor.interval_seconds，180）")
+    headless.add_argument("--cycles", type=int, default=0, help="运行周期数，0 表示不限")
+    parser.add_argument("--base-url", help="12306 接口地址（默认 https://kyfw.12306.cn，可指向本地模拟服务器）")
+    parser.add_argument("--expand-city", action="store_true",
+                        help="同城多站扩展查询：补充查询输入站结果未覆盖的同城车站并合并结果")
+    parser.add_argument("--transfer", nargs="*", metavar="HUB",
+                        help="直达无票时搜索经指定中转站的换乘方案（不指定则使用配置 transfer.hubs）")
+    parser.add_argument("--subscriptions", metavar="FILE",
+                        help="多用户订阅监控：按订阅文件查询并分别通知各用户（可配合 --interval/--cycles）")
+    cluster = parser.add_argument_group("分片监控")
+    cluster.add_argument("--coordinator", metavar="HOST:PORT",
+                         help="作为协调者运行，任务来自 --subscriptions 或 --from/--to/--date（可配合 --until）")
+    cluster.add_argument("--local-workers", type=int, default=0, metavar="N", help="协调者在本机启动的工作进程数")
+    cluster.add_argument("--worker", metavar="HOST:PORT", help="作为工作进程连接协调者")
+    cluster.add_argument("--worker-id", default="0", help="工作进程编号")
+    cluster.add_argument("--worker-qps", type=float, metavar="RATE",
+                         help="工作进程的查询速率上限（覆盖 network.max_queries_per_second；协调者启动本机工作进程时自动按进程数平分）")
+    parser.add_argument("--record", action="store_true", help="将原始查询响应追加到 logs/responses/*.jsonl.gz")
+    parser.add_argument("--api", metavar="[HOST:]PORT",
+                        help="启动本地 HTTP 接口（各线路最新结果、查询历史、运行状况、坐席变化 SSE 推送）")
+    parser.add_argument("--export", metavar="FILE",
+                        help="每次查询把所有车次逐行追加到 FILE（.jsonl 或 .csv，以 .gz 结尾时压缩）")
+    replay = parser.add_argument_group("回放")
+    replay.add_argument("--replay", nargs="+", metavar="ARCHIVE", help="回放原始响应归档文件")
+    replay.add_argument("--realtime", action="store_true", help="按记录时间间隔回放（默认全速）")
+    replay.add_argument("--speed", type=float, default=1.0, help="实时回放倍速")
+    replay.add_argument("--replay-notify", action="store_true", help="回放时真正发送通知（默认仅记录）")
+    replay.add_argument("--quiet", action="store_true", help="回放时不输出表格")
+    parser.add_argument("--profile", type=int, metavar="N", default=0,
+                        help="以 cProfile + tracemalloc 剖析 N 个查询周期，报告写入 logs 目录")
+    args = parser.parse_args(argv)
+    route_args = [args.from_station, args.to_station, args.date]
+    if any(route_args) and not all(route_args):
+        parser.error("无交互模式需要同时指定 --from、--to 和 --date")
+    if (args.until or args.weekdays) and not args.from_station:
+        parser.error("扫描模式需要同时指定 --from、--to 和 --date")
+    if args.trains and args.subscriptions:
+        parser.error("订阅模式下目标车次由订阅文件指定，不能同时使用 --trains")
+    if args.until:
+        try:
+            expand_dates(args.date, args.until)
+        except ValueError:
+            parser.error("日期格式应为 YYYY-MM-DD")
+    return args
 
 
 if __name__ == "__main__":
     if os.name == 'nt': os.system('')
-    app = TrainMonitor()
+    args = parse_args()
+    app = TrainMonitor(args.base_url, offline=bool(args.replay), record=args.record, export=args.export,
+                      api=args.api, worker=bool(args.worker))
+    if args.expand_city:
+        app.config["network"]["expand_city"] = True
+    if args.transfer is not None:
+        app.config["transfer"]["enabled"] = True
+        if args.transfer:
+            app.config["transfer"]["hubs"] = args.transfer
+    headless = bool(args.from_station)
+    if args.profile > 0:
+        from metrics import SessionProfiler
+        app.profiler = SessionProfiler(app.log_dir, args.profile, context={
+            "模式": "无交互" if headless else "交互",
+            "线路": f"{args.from_station} -> {args.to_station} ({args.date})" if headless else "交互输入",
+            "目标车次": args.trains or "全部",
+            "查询间隔": app._interval(args.interval),
+        })
+        app.logger.info("性能剖析已启用: %d 个周期", args.profile)
     try:
+        if args.replay:
+            real_stdout = sys.stdout
+            if args.quiet:
+                sys.stdout = open(os.devnull, "w", encoding="utf-8")
+            app._profile_begin()
+            try:
+                stats = app.replay(args.replay, args.realtime, args.speed, args.replay_notify)
+            finally:
+                app._profile_end()
+                if args.quiet:
+                    sys.stdout.close()
+                    sys.stdout = real_stdout
+            print(f"\n[回放完成] {stats}")
+            sys.exit(0)
+        if args.worker:
+            if args.worker_qps is not None:
+                app.config["network"]["max_queries_per_second"] = args.worker_qps
+                app.rate_limiter.configure(args.worker_qps)
+            sys.exit(app.run_worker(args.worker, args.worker_id))
+        if args.coordinator:
+            from notification import SubscriptionIndex
+            index = SubscriptionIndex.from_file(args.subscriptions, app.config.get("notification", {})) \
+                if args.subscriptions else None
+            if index is not None:
+                jobs = index.routes()
+            elif headless:
+                jobs = [(args.from_station, args.to_station, d)
+                        for d in expand_dates(args.date, args.until, args.weekdays)]
+            else:
+                print("[!] 协调者需要 --subscriptions 或 --from/--to/--date 指定任务")
+                sys.exit(1)
+            sys.exit(app.run_coordinator(args.coordinator, jobs, args.interval, args.local_workers,
+                                     index, args.subscriptions, args.trains or None))
+        if args.subscriptions:
+            sys.exit(app.run_subscriptions(args.subscriptions, args.interval, args.cycles))
+        if headless and (args.until or args.weekdays):
+            dates = expand_dates(args.date, args.until, args.weekdays)
+            if not dates:
+                print("[!] 日期范围内没有符合星期条件的日期")
+                sys.exit(1)
+            sys.exit(app.run_sweep(args.from_station, args.to_station, dates,
+                                   args.trains or None, args.interval, args.cycles))
+        if headless:
+            sys.exit(app.run_headless(args.from_station, args.to_station, args.date,
+                                      args.trains or None, args.interval, args.cycles))
         app.start()
     except KeyboardInterrupt:
         print("\n程序已退出")
@@ -0,0 +1,25 @@
+"""
+运行指标模块
+"""
+
+from .registry import MetricsRegistry, Counter, Histogram
+from .monitor_metrics import MonitorMetrics
+
+# 指标接口（http.server）与剖析器（cProfile/tracemalloc）在首次使用时才导入，缩短程序启动时间
+_LAZY = {
+    'MetricsServer': '.server',
+    'SessionProfiler': '.profiler',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['MetricsRegistry', 'Counter', 'Histogram', 'MonitorMetrics', 'MetricsServer', 'SessionProfiler']
@@ -0,0 +1,119 @@
+"""
+监控主循环使用的指标集合
+"""
+
+import time
+from typing import Dict, Optional
+
+from .registry import MetricsRegistry
+
+
+# 一个查询周期内的各阶段
+PHASES = ("rate_wait", "init_get", "query_get", "json_decode", "parse", "history_record", "notify")
+
+
+class MonitorMetrics:
+    """监控指标：分阶段耗时 + 请求/错误/限流/通知计数"""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        :param registry: 指标注册表，默认新建
+        """
+        self.registry = registry or MetricsRegistry()
+        self.phase_seconds = self.registry.histogram(
+            "phase_duration_seconds", "各阶段耗时（秒），按阶段与线路区分")
+        self.requests = self.registry.counter(
+            "requests_total", "发往 12306 的 HTTP 请求数")
+        self.errors = self.registry.counter(
+            "request_errors_total", "请求异常次数")
+        self.retries = self.registry.counter(
+            "http_retries_total", "连接失败、超时或 5xx 后的重试次数，按端点区分")
+        self.hedges = self.registry.counter(
+            "http_hedged_total", "超过近期耗时分位数后发出的对冲请求数")
+        self.hedge_wins = self.registry.counter(
+            "http_hedge_wins_total", "对冲请求先于原请求返回的次数")
+        self.deadlines = self.registry.counter(
+            "poll_deadline_exceeded_total", "超过单次查询截止时间而放弃的请求数")
+        self.throttles = self.registry.counter(
+            "throttled_total", "疑似被限流的响应次数（非 JSON 或 403/429）")
+        self.polls = self.registry.counter(
+            "polls_total", "完成的查询周期数")
+        self.notifications_sent = self.registry.counter(
+            "notifications_sent_total", "发送成功的通知数")
+        self.notifications_dropped = self.registry.counter(
+            "notifications_dropped_total", "发送失败或被丢弃的通知数，按渠道与原因（failed / rate_limited）区分")
+        self.cache_hits = self.registry.counter(
+            "shared_cache_hits_total", "命中跨进程共享缓存、未发起请求的查询数")
+        self.schema_drift = self.registry.counter(
+            "row_schema_drift_total", "格式与 row_schema 不符而跳过的查询结果行数，按原因区分")
+        self._last_summary = time.monotonic()
+
+    def time_phase(self, phase: str, route: str):
+        """
+        阶段计时上下文
+        :param phase: 阶段名，见 PHASES
+        :param route: 线路（"始发->到达"）
+        """
+        return self.phase_seconds.time(phase=phase, route=route)
+
+    def record_notifications(self, results: Dict[str, Dict[str, str]]):
+        """
+        统计通知结果
+        :param results: NotificationManager.notify_ticket_available 的返回值
+        """
+        for channel_results in results.values():
+            for channel, result in channel_results.items():
+                if result in ("成功", "已合并"):
+                    self.notifications_sent.inc(channel=channel)
+                elif result == "排队中":
+                    # 等待渠道限速额度，补发时再统计
+                    continue
+                elif result in ("限速丢弃", "过期丢弃"):
+                    self.notifications_dropped.inc(channel=channel, reason="rate_limited")
+                else:
+                    self.notifications_dropped.inc(channel=channel, reason="failed")
+
+    def summary_due(self, interval_seconds: float) -> bool:
+        """
+        是否到了输出汇总的时间（到期时重置计时）
+        :param interval_seconds: 汇总间隔，<=0 表示不输出
+        """
+        if interval_seconds <= 0:
+            return False
+        now = time.monotonic()
+        if now - self._last_summary < interval_seconds:
+            return False
+        self._last_summary = now
+        return True
+
+    def summary_line(self) -> str:
+        """生成一行汇总，用于写入 ticket_monitor.log"""
+        parts = [
+            f"polls={self.polls.total():.0f}",
+            f"requests={self.requests.total():.0f}",
+            f"errors={self.errors.total():.0f}",
+            f"retries={self.retries.total():.0f}",
+            f"hedged={self.hedges.total():.0f}",
+            f"deadline_exceeded={self.deadlines.total():.0f}",
+            f"throttled={self.throttles.total():.0f}",
+            f"cache_hits={self.cache_hits.total():.0f}",
+            f"schema_drift={self.schema_drift.total():.0f}",
+            f"notify_sent={self.notifications_sent.total():.0f}",
+            f"notify_dropped={self.notifications_dropped.total():.0f}",
+            f"notify_rate_limited={self.notifications_dropped.total(reason='rate_limited'):.0f}",
+        ]
+        # 各阶段合并所有线路
+        merged: Dict[str, Dict[str, float]] = {}
+        for key, s in self.phase_seconds.series().items():
+            phase = dict(key).get("phase", "")
+            m = merged.setdefault(phase, {"count": 0, "sum": 0.0, "max": 0.0, "p95": 0.0})
+            m["count"] += s["count"]
+            m["sum"] += s["sum"]
+            m["max"] = max(m["max"], s["max"])
+            m["p95"] = max(m["p95"], s["p95"])
+        for phase in PHASES:
+            m = merged.get(phase)
+            if m and m["count"]:
+                parts.append(f"{phase}: avg={m['sum'] / m['count'] * 1000:.1f}ms "
+                             f"p95<={m['p95'] * 1000:.0f}ms max={m['max'] * 1000:.1f}ms")
+        return "[指标汇总] " + " | ".join(parts)
@@ -0,0 +1,150 @@
+"""
+监控会话性能剖析（cProfile + tracemalloc）
+
+只在查询周期的工作阶段开启 cProfile（不包含等待刷新的时间），
+tracemalloc 在整个剖析期间持续记录。达到指定周期数后写出报告：
+- profile_<时间>.txt       按耗时排序的热点函数
+- profile_<时间>_alloc.txt 内存分配位置 Top N 及相对首个周期的增长
+- profile_<时间>.prof      原始 cProfile 数据，可用 snakeviz 等工具查看
+"""
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import platform
+import tracemalloc
+from datetime import datetime
+from typing import List, Optional
+
+
+class SessionProfiler:
+    """按周期计数的会话剖析器"""
+
+    def __init__(self, log_dir: str, cycles: int, top: int = 40, frames: int = 10, context: Optional[dict] = None):
+        """
+        :param log_dir: 报告输出目录
+        :param cycles: 剖析的查询周期数
+        :param top: 报告中列出的条目数
+        :param frames: tracemalloc 记录的调用栈深度
+        :param context: 写入报告头部的运行参数（用于复现）
+        """
+        self.log_dir = log_dir
+        self.cycles = max(1, cycles)
+        self.top = top
+        self.frames = frames
+        self.context = context or {}
+        self.completed_cycles = 0
+        self.report_files: List[str] = []
+        self._profile = cProfile.Profile()
+        self._baseline = None
+        self._started_at = None
+        self._in_cycle = False
+        self._finished = False
+
+    @property
+    def active(self) -> bool:
+        return not self._finished
+
+    def begin_cycle(self):
+        """开始一个查询周期"""
+        if self._finished or self._in_cycle:
+            return
+        if self._started_at is None:
+            self._started_at = time.time()
+            tracemalloc.start(self.frames)
+        self._in_cycle = True
+        self._profile.enable()
+
+    def end_cycle(self) -> bool:
+        """
+        结束一个查询周期
+        :return: 本次调用是否完成剖析并写出了报告
+        """
+        if not self._in_cycle:
+            return False
+        self._profile.disable()
+        self._in_cycle = False
+        self.completed_cycles += 1
+        if self.completed_cycles == 1:
+            self._baseline = tracemalloc.take_snapshot()
+        if self.completed_cycles >= self.cycles:
+            self.finish()
+            return True
+        return False
+
+    def finish(self):
+        """停止剖析并写出报告（可提前调用）"""
+        if self._finished:
+            return
+        if self._in_cycle:
+            self._profile.disable()
+            self._in_cycle = False
+        self._finished = True
+        if self._started_at is None:
+            return
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = datetime.fromtimestamp(self._started_at).strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.log_dir, f"profile_{stamp}")
+
+        self._profile.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(self._header())
+            f.write(self._function_report())
+        with open(base + "_alloc.txt", "w", encoding="utf-8") as f:
+            f.write(self._header())
+            f.write(self._allocation_report(snapshot))
+        self.report_files = [base + ".txt", base + "_alloc.txt", base + ".prof"]
+
+    def _header(self) -> str:
+        lines = [
+            "# CRTicketMonitor 性能剖析报告",
+            f"# 开始时间: {datetime.fromtimestamp(self._started_at).isoformat(timespec='seconds')}",
+            f"# 剖析周期: {self.completed_cycles}",
+            f"# Python: {sys.version.split()[0]}  系统: {platform.system()} {platform.release()}",
+            f"# 命令行: {' '.join(sys.argv)}",
+        ]
+        lines += [f"# {k}: {v}" for k, v in self.context.items()]
+        return "\n".join(lines) + "\n\n"
+
+    def _function_report(self) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.strip_dirs()
+        out.write("=== 按自身耗时排序 (tottime) ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+        out.write("\n=== 按累计耗时排序 (cumulative) ===\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        return out.getvalue()
+
+    def _allocation_report(self, snapshot) -> str:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        snapshot = snapshot.filter_traces(filters)
+        lines = ["=== 当前内存分配 Top (按行) ==="]
+        total = sum(s.size for s in snapshot.statistics("filename"))
+        lines.append(f"合计: {total / 1024:.1f} KiB")
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            lines.append(str(stat))
+
+        if self._baseline is not None and self.completed_cycles > 1:
+            lines.append("")
+            lines.append("=== 相对第 1 个周期结束时的增长 Top ===")
+            baseline = self._baseline.filter_traces(filters)
+            for stat in snapshot.compare_to(baseline, "lineno")[:self.top]:
+                lines.append(str(stat))
+
+        lines.append("")
+        lines.append("=== 最大分配位置调用栈 ===")
+        for stat in snapshot.statistics("traceback")[:3]:
+            lines.append(f"{stat.count} 个内存块, {stat.size / 1024:.1f} KiB")
+            lines.extend(stat.traceback.format())
+        return "\n".join(lines) + "\n"
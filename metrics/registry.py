@@ -0,0 +1,195 @@
+"""
+轻量指标注册表，输出 Prometheus 文本格式
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """单调递增计数器"""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def total(self, **labels) -> float:
+        """
+        所有标签组合的合计
+        :param labels: 只合计包含这些标签值的组合
+        """
+        wanted = set(_label_key(labels))
+        with self._lock:
+            return sum(v for k, v in self._values.items() if wanted.issubset(k))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    """单个标签组合的直方图数据"""
+    __slots__ = ("bucket_counts", "count", "sum", "max")
+
+    def __init__(self, n_buckets: int):
+        self.bucket_counts = [0] * (n_buckets + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram:
+    """分桶直方图"""
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.bucket_counts[idx] += 1
+            series.count += 1
+            series.sum += value
+            if value > series.max:
+                series.max = value
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文：with histogram.time(phase="parse"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        按分桶估算分位数（返回所在桶的上界）
+        :param q: 分位 0~1
+        :return: 估算值；无数据时为 None
+        """
+        series = self._series.get(_label_key(labels))
+        if series is None or series.count == 0:
+            return None
+        return self._quantile(series, q)
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> float:
+        target = q * series.count
+        cumulative = 0
+        for i, c in enumerate(series.bucket_counts):
+            cumulative += c
+            if cumulative >= target and c:
+                return self.buckets[i] if i < len(self.buckets) else series.max
+        return series.max
+
+    def series(self) -> Dict[LabelKey, Dict[str, float]]:
+        """
+        各标签组合的汇总
+        :return: {标签: {"count", "sum", "max", "p50", "p95"}}
+        """
+        with self._lock:
+            items = list(self._series.items())
+        return {
+            key: {"count": s.count, "sum": s.sum, "max": s.max,
+                  "p50": self._quantile(s, 0.5), "p95": self._quantile(s, 0.95)}
+            for key, s in items
+        }
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(s.bucket_counts), s.count, s.sum) for k, s in self._series.items())
+        for key, bucket_counts, count, total in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self, namespace: str = "crtm"):
+        """
+        :param namespace: 指标名前缀
+        """
+        self.namespace = namespace
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, buckets))
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for m in metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
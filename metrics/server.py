@@ -0,0 +1,58 @@
+"""
+本地 HTTP 指标接口（Prometheus 文本格式）
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .registry import MetricsRegistry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 不向终端输出访问日志
+        pass
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        """
+        :param registry: 指标注册表
+        :param host: 监听地址（默认仅本机）
+        :param port: 监听端口
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": self.registry})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
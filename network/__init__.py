@@ -0,0 +1,30 @@
+"""
+网络访问模块
+"""
+
+from .rate_limiter import RateLimiter
+from .shared_cache import SharedResultCache, default_cache_dir
+from .transport import (
+    Transport,
+    TransportResponse,
+    TransportError,
+    DeadlineExceeded,
+    RequestsTransport,
+    FakeTransport,
+    LatencyTracker,
+    HttpClient
+)
+
+__all__ = [
+    'RateLimiter',
+    'SharedResultCache',
+    'default_cache_dir',
+    'Transport',
+    'TransportResponse',
+    'TransportError',
+    'DeadlineExceeded',
+    'RequestsTransport',
+    'FakeTransport',
+    'LatencyTracker',
+    'HttpClient',
+]
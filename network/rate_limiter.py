@@ -0,0 +1,74 @@
+"""
+令牌桶限速器，多个查询线程共享同一速率上限
+"""
+
+import time
+import threading
+from typing import Callable, Optional
+
+
+class RateLimiter:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, burst: float = 1.0, clock: Optional[Callable[[], float]] = None):
+        """
+        :param rate: 每秒补充的令牌数（即平均请求速率），0 或负数表示不限速
+        :param burst: 桶容量，允许的瞬时突发请求数
+        :param clock: 单调时间函数（默认 time.monotonic）
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.clock = clock or time.monotonic
+        self._tokens = self.burst
+        self._updated = self.clock()
+        self._lock = threading.Lock()
+
+    def configure(self, rate: float, burst: Optional[float] = None):
+        """
+        运行中调整速率与桶容量（配置热加载时调用），已有令牌保留但不超过新容量
+        :param rate: 新的每秒令牌数
+        :param burst: 新的桶容量，None 表示不变
+        """
+        with self._lock:
+            self._refill(self.clock())
+            self.rate = rate
+            if burst is not None:
+                self.burst = max(1.0, burst)
+            self._tokens = min(self._tokens, self.burst)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        获取令牌，不足时阻塞等待
+        :param timeout: 最长等待秒数，None 表示不限
+        :return: 实际等待的秒数；在 timeout 内拿不到令牌时为 None（不等待，也不占用令牌）
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            if timeout is not None and waited + delay > timeout:
+                return None
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """非阻塞获取令牌"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
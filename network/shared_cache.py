@@ -0,0 +1,116 @@
+"""
+跨进程共享查询结果缓存
+
+同一主机上的多个实例共用一个缓存目录，每个 (始发代码, 到达代码, 日期) 对应一个 JSON 文件，
+保存最近一次的原始查询结果与时间戳。条目过期时，先拿到该条目文件锁的实例负责查询，
+其余实例阻塞在锁上，拿到锁后发现条目已被刷新即直接复用，不再重复请求。
+"""
+
+import os
+import json
+import time
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+CacheKey = Tuple[str, str, str]  # (from_code, to_code, date)
+
+
+def default_cache_dir() -> str:
+    """默认缓存目录（系统临时目录下，同一主机的所有实例共享）"""
+    return os.path.join(tempfile.gettempdir(), "CRTicketMonitor_cache")
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """独占文件锁（阻塞等待）"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    # LK_LOCK 最多重试 10 秒，超时抛出 OSError，继续等待
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+class SharedResultCache:
+    """跨进程共享的查询结果缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age_seconds: float = 60):
+        """
+        :param cache_dir: 缓存目录，默认 default_cache_dir()
+        :param max_age_seconds: 条目有效期（秒），应不大于各实例的查询间隔
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: CacheKey) -> str:
+        return os.path.join(self.cache_dir, "_".join(key) + ".json")
+
+    def _read_fresh(self, path: str) -> Optional[List[str]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("ts", 0) > self.max_age_seconds:
+            return None
+        return entry.get("result")
+
+    def _write(self, path: str, result: List[str]):
+        # 先写临时文件再替换，读取方不会看到写了一半的内容
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ts": time.time(), "result": result}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            # Windows 下目标文件正被读取时替换会失败，放弃本次写入即可
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def get_or_fetch(self, key: CacheKey, fetch: Callable[[], object]) -> Tuple[object, bool]:
+        """
+        读取缓存，过期时加锁查询并写回
+        :param key: (from_code, to_code, date)
+        :param fetch: 实际查询函数，返回列表时写入缓存（失败、限流等结果不缓存）
+        :return: (查询结果, 是否命中缓存)
+        """
+        path = self._path(key)
+        result = self._read_fresh(path)
+        if result is not None:
+            return result, True
+        with _file_lock(path + ".lock"):
+            # 等锁期间可能已有其他实例刷新
+            result = self._read_fresh(path)
+            if result is not None:
+                return result, True
+            result = fetch()
+            if isinstance(result, list):
+                self._write(path, result)
+            return result, False
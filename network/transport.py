@@ -0,0 +1,324 @@
+"""
+HTTP 传输层：可替换的传输实现，之上是截止时间、有限重试（指数退避 + 抖动）与对冲请求
+
+HttpClient 只依赖 Transport 接口；RequestsTransport 基于 requests（所有线程共用一个连接池），
+FakeTransport 按预设的响应与延迟确定性地返回，不联网，供基准与测试使用。
+"""
+
+import json
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+
+class TransportError(Exception):
+    """连接失败、读取超时等传输层错误（可重试）"""
+
+
+class DeadlineExceeded(Exception):
+    """本次查询的截止时间已到，不再重试"""
+
+
+@dataclass
+class TransportResponse:
+    """传输层响应"""
+    status_code: int
+    text: str
+    elapsed: float = 0.0  # 秒
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class Transport(ABC):
+    """HTTP 传输抽象基类"""
+
+    @abstractmethod
+    def get(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> TransportResponse:
+        """
+        发送一次 GET 请求
+        :param timeout: 本次请求的超时（秒）
+        :return: 响应（任何状态码）
+        :raises TransportError: 连接失败或超时
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    """基于 requests 的传输：所有线程共用一个会话，连接池大小按并发查询数设置"""
+
+    def __init__(self, pool_size: int = 10):
+        """
+        :param pool_size: 每个主机保持的最大连接数，应不小于同时进行的请求数（含对冲请求）
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        self._exceptions = requests.RequestException
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> TransportResponse:
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        except self._exceptions as e:
+            raise TransportError(str(e)) from e
+        return TransportResponse(response.status_code, response.text, response.elapsed.total_seconds())
+
+    def close(self):
+        self.session.close()
+
+
+FakeRoute = Union[str, Tuple[int, str], Callable[[str], Tuple[int, str]]]
+
+
+class FakeTransport(Transport):
+    """
+    确定性的模拟传输：按 URL 路径返回预设响应，延迟与失败只取决于调用序号
+    延迟超过请求超时时，等待到超时后抛出 TransportError，与真实的读取超时一致
+    """
+
+    def __init__(self, routes: Dict[str, FakeRoute], latency: Union[float, Callable[[int], float]] = 0.0,
+                 fail_calls: Iterable[int] = ()):
+        """
+        :param routes: {URL 路径: 响应}，响应为文本（状态码 200）、(状态码, 文本) 或 以 URL 为参数返回二者的函数
+        :param latency: 固定延迟（秒），或 以调用序号（从 0 开始）为参数返回延迟的函数
+        :param fail_calls: 抛出连接错误的调用序号
+        """
+        self.routes = routes
+        self.latency = latency if callable(latency) else (lambda n, value=latency: value)
+        self.fail_calls = set(fail_calls)
+        self.calls: List[Tuple[int, str]] = []  # [(调用序号, URL)]
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]], timeout: float) -> TransportResponse:
+        with self._lock:
+            n = len(self.calls)
+            self.calls.append((n, url))
+        delay = self.latency(n)
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TransportError(f"读取超时 ({timeout:.2f}s): {url}")
+        if delay > 0:
+            time.sleep(delay)
+        if n in self.fail_calls:
+            raise TransportError(f"连接被重置: {url}")
+        route = self.routes.get(urlsplit(url).path)
+        if route is None:
+            return TransportResponse(404, "", delay)
+        if callable(route):
+            route = route(url)
+        status, text = (200, route) if isinstance(route, str) else route
+        return TransportResponse(status, text, delay)
+
+
+class LatencyTracker:
+    """按端点记录最近若干次成功请求的耗时，用于计算对冲阈值"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, endpoint: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        :return: 耗时的 q 分位数（秒）；样本不足 min_samples 时为 None
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class HttpClient:
+    """在传输层之上实现截止时间、有限重试与对冲请求，线程安全"""
+
+    RETRY_STATUS = frozenset((500, 502, 503, 504))
+
+    def __init__(self, transport: Transport, retries: int = 2, backoff: float = 0.5, max_backoff: float = 4.0,
+                 jitter: float = 0.5, hedge: bool = False, hedge_quantile: float = 0.95, hedge_min_samples: int = 20,
+                 hedge_workers: int = 8, hedge_permit: Optional[Callable[[], bool]] = None,
+                 retry_permit: Optional[Callable[[Optional[float]], bool]] = None,
+                 on_event: Optional[Callable[[str, str], None]] = None, rng: Optional[random.Random] = None,
+                 clock: Optional[Callable[[], float]] = None, sleep: Optional[Callable[[float], None]] = None):
+        """
+        :param transport: 传输实现
+        :param retries: 连接错误、超时或 5xx 时的最大重试次数（403/429 等限流响应不重试）
+        :param backoff: 第一次重试前的等待（秒），之后每次翻倍，不超过 max_backoff
+        :param jitter: 等待时间随机缩短的最大比例（0~1），避免多个线程同时重试
+        :param hedge: 启用对冲请求：请求耗时超过该端点近期的 hedge_quantile 分位数仍未返回时，再发一次，取先返回者
+        :param hedge_min_samples: 样本数达到该值后才启用对冲
+        :param hedge_workers: 对冲请求使用的线程数
+        :param hedge_permit: 发出对冲请求前调用，返回 False 时不发（如共享限速器的 try_acquire）
+        :param retry_permit: 每次重试前调用，参数为距截止时间的秒数（None 表示不限），可阻塞等待；
+                             返回 False 时不再重试（如共享限速器的 acquire，使重试与首次请求受同一速率上限约束）
+        :param on_event: 事件回调 (事件, 端点路径)，事件为 retry / hedge / hedge_win / deadline
+        :param rng: 抖动使用的随机数生成器（基准中传入固定种子）
+        """
+        self.transport = transport
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_workers = hedge_workers
+        self.hedge_permit = hedge_permit
+        self.retry_permit = retry_permit
+        self.on_event = on_event
+        self.rng = rng or random.Random()
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.latency = LatencyTracker()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._retired = False
+
+    def _event(self, kind: str, endpoint: str):
+        if self.on_event:
+            self.on_event(kind, endpoint)
+
+    def _deadline_exceeded(self, endpoint: str, url: str) -> DeadlineExceeded:
+        self._event("deadline", endpoint)
+        return DeadlineExceeded(f"已到截止时间: {url}")
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0,
+            deadline: Optional[float] = None) -> TransportResponse:
+        """
+        发送 GET 请求，失败时在截止时间内按退避重试
+        :param timeout: 单次尝试的超时（秒），不超过距截止时间的剩余时间
+        :param deadline: 截止时间（clock() 的时间点），None 表示不限
+        :return: 响应；重试用尽时返回最后一次的 5xx 响应
+        :raises TransportError: 重试用尽仍连接失败或超时
+        :raises DeadlineExceeded: 截止时间已到
+        """
+        with self._lock:
+            self._active += 1
+        try:
+            return self._get(url, headers, timeout, deadline)
+        finally:
+            with self._lock:
+                self._active -= 1
+                close = self._retired and self._active == 0
+            if close:
+                self.close()
+
+    def _get(self, url: str, headers: Optional[Dict[str, str]], timeout: float,
+             deadline: Optional[float]) -> TransportResponse:
+        endpoint = urlsplit(url).path
+        attempt = 0
+        while True:
+            per_try = timeout
+            if deadline is not None:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    raise self._deadline_exceeded(endpoint, url)
+                per_try = min(timeout, remaining)
+            response, error = None, None
+            try:
+                response = self._attempt(endpoint, url, headers, per_try)
+                if response.status_code not in self.RETRY_STATUS:
+                    return response
+            except TransportError as e:
+                error = e
+            if attempt >= self.retries:
+                if response is not None:
+                    return response
+                raise error
+            attempt += 1
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * (1 - self.jitter * self.rng.random())
+            if deadline is not None and self.clock() + delay >= deadline:
+                if response is not None:
+                    return response
+                raise self._deadline_exceeded(endpoint, url)
+            self._event("retry", endpoint)
+            self.sleep(delay)
+            if self.retry_permit is not None:
+                remaining = None if deadline is None else deadline - self.clock()
+                if (remaining is not None and remaining <= 0) or not self.retry_permit(remaining):
+                    if response is not None:
+                        return response
+                    raise self._deadline_exceeded(endpoint, url)
+
+    def _timed_get(self, endpoint: str, url: str, headers: Optional[Dict[str, str]], timeout: float) -> TransportResponse:
+        start = self.clock()
+        response = self.transport.get(url, headers, timeout)
+        self.latency.add(endpoint, self.clock() - start)
+        return response
+
+    def _attempt(self, endpoint: str, url: str, headers: Optional[Dict[str, str]], timeout: float) -> TransportResponse:
+        """一次尝试；启用对冲且第一次请求超过阈值时，同一次尝试内再发一个请求"""
+        threshold = None
+        if self.hedge:
+            threshold = self.latency.quantile(endpoint, self.hedge_quantile, self.hedge_min_samples)
+        if threshold is None or threshold >= timeout:
+            return self._timed_get(endpoint, url, headers, timeout)
+
+        executor = self._hedge_executor()
+        start = self.clock()
+        primary = executor.submit(self._timed_get, endpoint, url, headers, timeout)
+        pending = {primary}
+        done, _ = wait(pending, timeout=threshold)
+        hedged = None
+        if not done and (self.hedge_permit is None or self.hedge_permit()):
+            self._event("hedge", endpoint)
+            hedged = executor.submit(self._timed_get, endpoint, url, headers, max(timeout - threshold, 0.001))
+            pending.add(hedged)
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(start + timeout - self.clock(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                try:
+                    response = future.result()
+                except TransportError as e:
+                    error = e
+                    continue
+                if future is hedged:
+                    self._event("hedge_win", endpoint)
+                # 未完成的请求继续在后台运行，结果丢弃
+                return response
+        raise error or TransportError(f"读取超时 ({timeout:.2f}s): {url}")
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="http-hedge")
+            return self._executor
+
+    def retire(self):
+        """不再使用：进行中的请求全部结束后关闭（配置热加载替换客户端时调用）"""
+        with self._lock:
+            self._retired = True
+            close = self._active == 0
+        if close:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.transport.close()
@@ -2,24 +2,74 @@
 通知系统模块
 """
 
-from .base import TicketInfo, NotificationChannel, NotificationConfig
-from .manager import NotificationManager
-from .channels import (
-    NativeWindowsNotification,
-    WindowsDesktopNotification,
-    WeChatWorkNotification,
-    FeishuNotification,
-    DingTalkNotification
+from .base import (
+    TicketInfo,
+    NotificationChannel,
+    NotificationConfig,
+    SEAT_TYPES,
+    SEAT_NONE,
+    SEAT_SOLD_OUT,
+    SEAT_PLENTY,
+    SEAT_NOT_ON_SALE,
+    NO_SEATS,
+    encode_seat,
+    encode_seats,
+    decode_seat
 )
+from .manager import NotificationManager
+from .throttle import ChannelThrottle, PRIORITY_HIGH, PRIORITY_LOW
+
+# 通知渠道、渠道注册表与订阅在首次使用时才导入，缩短程序启动时间
+_LAZY = {
+    'NativeWindowsNotification': '.channels',
+    'MemoryNotification': '.channels',
+    'WindowsDesktopNotification': '.channels',
+    'WeChatWorkNotification': '.channels',
+    'FeishuNotification': '.channels',
+    'DingTalkNotification': '.channels',
+    'CHANNEL_TYPES': '.registry',
+    'build_channel': '.registry',
+    'build_channels': '.registry',
+    'Subscription': '.subscriptions',
+    'SubscriptionIndex': '.subscriptions',
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     'TicketInfo',
     'NotificationChannel',
     'NotificationConfig',
+    'SEAT_TYPES',
+    'SEAT_NONE',
+    'SEAT_SOLD_OUT',
+    'SEAT_PLENTY',
+    'SEAT_NOT_ON_SALE',
+    'NO_SEATS',
+    'encode_seat',
+    'encode_seats',
+    'decode_seat',
     'NotificationManager',
+    'ChannelThrottle',
+    'PRIORITY_HIGH',
+    'PRIORITY_LOW',
     'NativeWindowsNotification',
+    'MemoryNotification',
     'WindowsDesktopNotification',
     'WeChatWorkNotification',
     'FeishuNotification',
     'DingTalkNotification',
+    'CHANNEL_TYPES',
+    'build_channel',
+    'build_channels',
+    'Subscription',
+    'SubscriptionIndex',
 ]
@@ -3,24 +3,120 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 import json
+import sys
 
 
-@dataclass
+# 坐席固定顺序（与查询结果表格的坐席列一致）
+SEAT_TYPES = ('商/特', '一等座', '二等座', '一等/软卧', '二等/硬卧', '软座', '硬座', '无座')
+
+# 余票编码：正数为具体张数，其余为以下标记
+SEAT_NONE = -1       # "--"：无此坐席
+SEAT_SOLD_OUT = 0    # "无"
+SEAT_PLENTY = -2     # "有"（及其他非数字标记），计数时按 99 张
+SEAT_NOT_ON_SALE = -3  # "*"：尚未起售，与 "有" 一样算有票（计数时按 99 张），单独编码以便原样输出
+NO_SEATS = (SEAT_NONE,) * len(SEAT_TYPES)
+
+_SEAT_CODES = {"": SEAT_NONE, "--": SEAT_NONE, "无": SEAT_SOLD_OUT, "0": SEAT_SOLD_OUT, "有": SEAT_PLENTY,
+               "*": SEAT_NOT_ON_SALE}
+_SEAT_TEXTS = {SEAT_NONE: "--", SEAT_SOLD_OUT: "无", SEAT_PLENTY: "有", SEAT_NOT_ON_SALE: "*"}
+
+
+def encode_seat(text: str) -> int:
+    """余票文本 -> 编码"""
+    code = _SEAT_CODES.get(text)
+    if code is None:
+        code = int(text) if text.isdigit() else SEAT_PLENTY
+    return code
+
+
+def encode_seats(texts: Iterable[str]) -> Tuple[int, ...]:
+    """按坐席顺序编码一组余票文本"""
+    return tuple(map(encode_seat, texts))
+
+
+def decode_seat(code: int) -> str:
+    """编码 -> 余票文本"""
+    text = _SEAT_TEXTS.get(code)
+    return str(code) if text is None else text
+
+
+def _is_available(code: int) -> bool:
+    return code > 0 or code == SEAT_PLENTY or code == SEAT_NOT_ON_SALE
+
+
+@dataclass(slots=True)
 class TicketInfo:
-    """车票信息数据类"""
+    """
+    车票信息数据类
+    坐席余票以编码元组保存（见 encode_seat），字典形式的 available_seats 只在通知、导出时生成
+    未设为 frozen：frozen 的 __init__ 逐字段经 object.__setattr__ 赋值，每行构造慢约 3 倍（解析每轮每行都要构造）；
+    实例创建后不再修改（需要改动时用 dataclasses.replace 生成副本），需要可哈希的标识时使用 ticket_key()
+    """
     train_no: str          # 车次号
     from_station: str      # 始发站
     to_station: str        # 到达站
     date: str              # 出发日期
     departure_time: str    # 开车时间
     duration: str          # 历时
-    available_seats: Dict[str, str]  # {坐席类型: 余票数量}
+    seats: Tuple[int, ...] = NO_SEATS               # 余票编码，顺序同 seat_labels
+    seat_labels: Tuple[str, ...] = field(default=SEAT_TYPES, repr=False)  # 坐席名称（中转方案等使用自定义名称）
+
+    @property
+    def available_seats(self) -> Dict[str, str]:
+        """有票的坐席 {坐席类型: 余票数量}"""
+        return {label: decode_seat(code) for label, code in zip(self.seat_labels, self.seats) if _is_available(code)}
+
+    @property
+    def has_seats(self) -> bool:
+        return any(_is_available(code) for code in self.seats)
+
+    @property
+    def total_tickets(self) -> int:
+        """有票坐席的余票合计（"有"、"*" 按 99 张计）"""
+        return sum(code if code > 0 else 99 for code in self.seats if _is_available(code))
+
+    def filter_seats(self, names) -> Optional["TicketInfo"]:
+        """
+        只保留指定坐席
+        :param names: 坐席名称集合
+        :return: 过滤后的车票；指定坐席均无票时为 None
+        """
+        seats = tuple(code if label in names else SEAT_NONE for label, code in zip(self.seat_labels, self.seats))
+        if not any(_is_available(code) for code in seats):
+            return None
+        return replace(self, seats=seats)
+
+    @classmethod
+    def from_seat_dict(cls, train_no: str, from_station: str, to_station: str, date: str,
+                       departure_time: str, duration: str, available_seats: Dict[str, str]) -> "TicketInfo":
+        """由 {坐席类型: 余票数量} 构造（坐席名称不在 SEAT_TYPES 中时按原名称保存）"""
+        if all(name in SEAT_TYPES for name in available_seats):
+            seats = tuple(encode_seat(available_seats.get(name, "--")) for name in SEAT_TYPES)
+            labels = SEAT_TYPES
+        else:
+            seats = encode_seats(available_seats.values())
+            labels = tuple(sys.intern(name) for name in available_seats)
+        return cls(train_no, from_station, to_station, date, departure_time, duration, seats, labels)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TicketInfo":
+        """to_dict() 的逆操作"""
+        return cls.from_seat_dict(data["train_no"], data["from_station"], data["to_station"], data["date"],
+                                  data["departure_time"], data["duration"], data.get("available_seats") or {})
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "train_no": self.train_no,
+            "from_station": self.from_station,
+            "to_station": self.to_station,
+            "date": self.date,
+            "departure_time": self.departure_time,
+            "duration": self.duration,
+            "available_seats": self.available_seats,
+        }
 
     def to_json(self) -> str:
         return json.dumps(self.to_dict(), ensure_ascii=False)
@@ -36,9 +132,20 @@ class NotificationConfig:
     target_trains: Optional[List[str]] = None  # 目标车次列表
 
 
+TicketKey = Tuple[str, str, str, str]  # (上车站, 下车站, 日期, 车次)
+
+
+def ticket_key(ticket: TicketInfo) -> TicketKey:
+    """区分同一车次在不同线路、日期上的通知（冷却、是否新发现、限速队列去重）"""
+    return (ticket.from_station, ticket.to_station, ticket.date, ticket.train_no)
+
+
 class NotificationChannel(ABC):
     """通知渠道抽象基类"""
 
+    # 平台每分钟允许的消息数，None 表示不限（超出时由 NotificationManager 按优先级排队、合并或丢弃）
+    max_per_minute: Optional[int] = None
+
     @abstractmethod
     def send(self, title: str, message: str, ticket_info: Optional[TicketInfo] = None) -> bool:
         """
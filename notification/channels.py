@@ -57,6 +57,24 @@ $toast = $notifier.Show($null, $null, "{safe_title}", "{safe_message}")
         return True  # Windows 系统自带，始终可用
 
 
+class MemoryNotification(NotificationChannel):
+    """内存通知渠道：只记录不发送（用于回放、测试与基准）"""
+
+    def __init__(self):
+        self.sent = []  # [(title, message, ticket_info)]
+
+    @property
+    def name(self) -> str:
+        return "内存记录"
+
+    def send(self, title: str, message: str, ticket_info: Optional[TicketInfo] = None) -> bool:
+        self.sent.append((title, message, ticket_info))
+        return True
+
+    def is_available(self) -> bool:
+        return True
+
+
 class WindowsDesktopNotification(NotificationChannel):
     """Windows 桌面通知 (使用 win10toast)"""
 
@@ -99,8 +117,13 @@ class WindowsDesktopNotification(NotificationChannel):
 class WeChatWorkNotification(NotificationChannel):
     """企业微信机器人通知"""
 
-    def __init__(self, webhook_url: str):
+    # 机器人每分钟最多 20 条消息
+    max_per_minute = 20
+
+    def __init__(self, webhook_url: str, max_per_minute: Optional[int] = None):
         self.webhook_url = webhook_url
+        if max_per_minute is not None:
+            self.max_per_minute = max_per_minute
 
     @property
     def name(self) -> str:
@@ -130,8 +153,13 @@ class WeChatWorkNotification(NotificationChannel):
 class FeishuNotification(NotificationChannel):
     """飞书机器人通知"""
 
-    def __init__(self, webhook_url: str):
+    # 机器人每分钟最多 20 条消息
+    max_per_minute = 20
+
+    def __init__(self, webhook_url: str, max_per_minute: Optional[int] = None):
         self.webhook_url = webhook_url
+        if max_per_minute is not None:
+            self.max_per_minute = max_per_minute
 
     @property
     def name(self) -> str:
@@ -166,9 +194,14 @@ class FeishuNotification(NotificationChannel):
 class DingTalkNotification(NotificationChannel):
     """钉钉机器人通知"""
 
-    def __init__(self, webhook_url: str, secret: Optional[str] = None):
+    # 机器人每分钟最多 20 条消息
+    max_per_minute = 20
+
+    def __init__(self, webhook_url: str, secret: Optional[str] = None, max_per_minute: Optional[int] = None):
         self.webhook_url = webhook_url
         self.secret = secret
+        if max_per_minute is not None:
+            self.max_per_minute = max_per_minute
 
     @property
     def name(self) -> str:
@@ -3,21 +3,25 @@
 """
 
 import time
-from typing import Dict, List
-from .base import NotificationChannel, TicketInfo, NotificationConfig
-
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, List, Optional
+from .base import NotificationChannel, TicketInfo, NotificationConfig, TicketKey, ticket_key
+from .throttle import ChannelThrottle, PendingMessage, PRIORITY_HIGH, PRIORITY_LOW
 
 class NotificationManager:
     """通知管理器"""
 
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, clock: Optional[Callable[[], float]] = None):
         """
         初始化通知管理器
         :param config: 通知配置字典
+        :param clock: 时间函数（默认 time.time），回放时可替换为记录中的时间以保证结果可复现
         """
+        self.clock = clock or time.time
         self.channels: List[NotificationChannel] = []
-        self.last_notified: Dict[str, float] = {}  # {train_no: timestamp}
-        self.monitored_trains: set = set()  # 新增：已发现的有票车次
+        # 冷却计时与已发现车次按 (上车站, 下车站, 日期, 车次) 区分，同一车次在不同线路或日期有票互不影响
+        self.last_notified: Dict[TicketKey, float] = {}  # {ticket_key: timestamp}
+        self.monitored_trains: set = set()  # 新增：已发现的有票车次（ticket_key）
         # 只传递 NotificationConfig 定义的参数
         self.config = NotificationConfig(**{
             'enabled': config.get('enabled', True),
@@ -25,6 +29,9 @@ class NotificationManager:
             'only_target_trains': config.get('only_target_trains', False),
             'min_tickets': config.get('min_tickets', 1)
         })
+        # 渠道限速（见 throttle.py），按渠道名称保存，渠道重建后沿用发送记录与队列
+        self.rate_limit: Dict = dict(config.get('rate_limit') or {})
+        self.throttles: Dict[str, ChannelThrottle] = {}
 
     def register_channel(self, channel: NotificationChannel):
         """
@@ -43,20 +50,76 @@ class NotificationManager:
             return {}
 
         # 识别新发现的车次
-        current_trains = {ticket.train_no for ticket in tickets}
+        current_trains = {ticket_key(ticket) for ticket in tickets}
         new_trains = current_trains - self.monitored_trains
 
-        results = {}
+        messages = []
         for ticket in tickets:
             # 判断是否为新票（新票强制通知）
-            is_new = ticket.train_no in new_trains
+            is_new = ticket_key(ticket) in new_trains
             if self._should_notify(ticket, force_notify=is_new):
-                results[ticket.train_no] = self._send_notification(ticket, is_new_ticket=is_new)
+                messages.append(self._build_message(ticket, is_new_ticket=is_new))
 
         # 更新监控车次集合
         self.monitored_trains.update(current_trains)
 
-        return results
+        self._start_cooldown(ticket_key(m.ticket) for m in messages)
+        return self._dispatch(messages)
+
+    def flush(self) -> Dict[str, Dict[str, str]]:
+        """
+        补发各渠道队列中等待限速额度的通知（本轮没有新通知时调用）
+        :return: 通知结果 {train_no: {channel_name: result}}
+        """
+        if not self.has_pending():
+            return {}
+        return self._dispatch([])
+
+    def has_pending(self) -> bool:
+        """是否有通知在等待限速额度"""
+        return any(throttle.pending for throttle in self.throttles.values())
+
+    def notify_across_dates(self, tickets: List[TicketInfo]) -> Dict[str, Dict[str, str]]:
+        """
+        多日期扫描的通知：同一车次在多个日期有票时只发送一条，日期合并显示
+        冷却与新发现按 (车次, 日期) 判断：已通知过的车次在新的日期有票时同样视为新票，消息中注明新增日期
+        :param tickets: 各日期有票的车次列表
+        :return: 通知结果 {train_no: {channel_name: result}}
+        """
+        if not self.config.enabled:
+            return {}
+
+        by_train: Dict[str, List[TicketInfo]] = {}
+        for ticket in sorted(tickets, key=lambda t: t.date):
+            same = by_train.setdefault(ticket.train_no, [])
+            if all(t.date != ticket.date for t in same):
+                same.append(ticket)
+
+        messages, notified = [], []
+        for train_no, items in by_train.items():
+            new_dates = [t.date for t in items if ticket_key(t) not in self.monitored_trains]
+            due = [t for t in items if self._should_notify(t, force_notify=ticket_key(t) not in self.monitored_trains)]
+            if not due:
+                continue
+            # 坐席信息取最早的待通知日期，日期列出所有有票日期
+            ticket = due[0]
+            if len(items) > 1:
+                ticket = replace(ticket, date=", ".join(t.date for t in items))
+            message = self._build_message(ticket, is_new_ticket=bool(new_dates))
+            if new_dates and len(items) > 1:
+                message.message += f"\n新增日期: {', '.join(new_dates)}"
+            messages.append(message)
+            notified.extend(ticket_key(t) for t in items)
+
+        self.monitored_trains.update(ticket_key(t) for items in by_train.values() for t in items)
+        self._start_cooldown(notified)
+        return self._dispatch(messages)
+
+    def _start_cooldown(self, keys: Iterable[TicketKey]):
+        """记录通知时间；排队等待限速额度的通知之后补发，不受冷却时间影响"""
+        now = self.clock()
+        for key in keys:
+            self.last_notified[key] = now
 
     def _should_notify(self, ticket: TicketInfo, force_notify: bool = False) -> bool:
         """
@@ -72,42 +135,113 @@ class NotificationManager:
 
         # 冷却时间检查（新票忽略）
         if not force_notify:
-            last_time = self.last_notified.get(ticket.train_no, 0)
-            if time.time() - last_time < self.config.cooldown_seconds:
+            last_time = self.last_notified.get(ticket_key(ticket), 0)
+            if self.clock() - last_time < self.config.cooldown_seconds:
                 return False
 
         # 最小余票数量检查
-        total_tickets = sum(int(v) if v.isdigit() else 99 for v in ticket.available_seats.values())
-        if total_tickets < self.config.min_tickets:
+        if ticket.total_tickets < self.config.min_tickets:
             return False
 
         return True
 
-    def _send_notification(self, ticket: TicketInfo, is_new_ticket: bool = False) -> Dict[str, str]:
+    def _priority(self, ticket: TicketInfo, is_new_ticket: bool) -> int:
+        """新发现有票与目标车次优先，冷却结束后的重复提醒在后"""
+        if is_new_ticket or (self.config.target_trains and ticket.train_no in self.config.target_trains):
+            return PRIORITY_HIGH
+        return PRIORITY_LOW
+
+    def _build_message(self, ticket: TicketInfo, is_new_ticket: bool = False) -> PendingMessage:
         """
-        发送通知到所有可用渠道
+        生成一条通知
         :param ticket: 车票信息
         :param is_new_ticket: 是否为新发现有票的车次
-        :return: 各渠道发送结果 {channel_name: result}
         """
         if is_new_ticket:
             title = f"【新发现有票】{ticket.train_no} 有票啦！"
         else:
             title = f"【CRTicketMonitor】{ticket.train_no} 有票啦！"
-        message = self._format_ticket_message(ticket)
+        return PendingMessage(self._priority(ticket, is_new_ticket), title,
+                              self._format_ticket_message(ticket), ticket, self.clock())
+
+    def _throttle(self, channel: NotificationChannel) -> Optional[ChannelThrottle]:
+        """渠道的限速器；渠道没有消息数上限或未启用限速时为 None"""
+        limit = getattr(channel, "max_per_minute", None)
+        if not limit or not self.rate_limit.get("enabled", True):
+            return None
+        max_pending = self.rate_limit.get("max_pending", 20)
+        max_age = self.rate_limit.get("max_age_seconds", 120)
+        throttle = self.throttles.get(channel.name)
+        if throttle is None:
+            throttle = self.throttles[channel.name] = ChannelThrottle(limit, max_pending, max_age, self.clock)
+        else:
+            throttle.configure(limit, max_pending, max_age)
+        return throttle
+
+    def _dispatch(self, messages: List[PendingMessage]) -> Dict[str, Dict[str, str]]:
+        """
+        发送通知到所有可用渠道，限速渠道按优先级安排（排队、合并或丢弃）
+        :param messages: 本轮的通知
+        :return: 各车次在各渠道的结果 {train_no: {channel_name: result}}
+        """
+        results: Dict[str, Dict[str, str]] = {}
+        owners: Dict[str, TicketKey] = {}  # {车次号: 首个使用该车次号作为结果键的 ticket_key}
+
+        def entry(ticket: TicketInfo) -> Dict[str, str]:
+            # 结果按车次号返回；同一次发送中同一车次有多个日期或上下车站时，其余的加上日期或线路区分
+            name, key = ticket.train_no, ticket_key(ticket)
+            owner = owners.setdefault(name, key)
+            if owner != key:
+                if owner[:2] == key[:2]:
+                    name = f"{ticket.train_no} ({ticket.date})"
+                else:
+                    name = f"{ticket.train_no} ({ticket.from_station}->{ticket.to_station} {ticket.date})"
+            return results.setdefault(name, {})
 
-        results = {}
         for channel in self.channels:
-            if channel.is_available():
-                try:
-                    success = channel.send(title, message, ticket)
-                    results[channel.name] = "成功" if success else "失败"
-                except Exception as e:
-                    results[channel.name] = f"异常: {e}"
-
-        self.last_notified[ticket.train_no] = time.time()
+            if not channel.is_available():
+                continue
+            throttle = self._throttle(channel)
+            if throttle is None:
+                for item in messages:
+                    entry(item.ticket)[channel.name] = self._send(channel, item)
+                continue
+
+            plan = throttle.plan(messages)
+            for item in plan.send:
+                throttle.record_send()
+                entry(item.ticket)[channel.name] = self._send(channel, item)
+            if plan.coalesce:
+                throttle.record_send()
+                result = self._send(channel, self._digest(plan.coalesce))
+                for item in plan.coalesce:
+                    entry(item.ticket)[channel.name] = "已合并" if result == "成功" else result
+            for item in plan.queued:
+                entry(item.ticket)[channel.name] = "排队中"
+            for item in plan.dropped:
+                entry(item.ticket)[channel.name] = "限速丢弃"
+            for item in plan.expired:
+                entry(item.ticket)[channel.name] = "过期丢弃"
+
         return results
 
+    def _send(self, channel: NotificationChannel, item: PendingMessage) -> str:
+        try:
+            success = channel.send(item.title, item.message, item.ticket)
+            return "成功" if success else "失败"
+        except Exception as e:
+            return f"异常: {e}"
+
+    def _digest(self, items: List[PendingMessage]) -> PendingMessage:
+        """将多条低优先级通知合并为一条汇总消息"""
+        lines = []
+        for item in items:
+            t = item.ticket
+            seats = ", ".join(f"{k}: {v}" for k, v in t.available_seats.items())
+            lines.append(f"  - {t.train_no} {t.date} {t.from_station}→{t.to_station} {t.departure_time}（{seats}）")
+        title = f"【CRTicketMonitor】{len(items)} 个车次仍有票"
+        return PendingMessage(PRIORITY_LOW, title, "\n".join(lines), None, self.clock())
+
     def _format_ticket_message(self, ticket: TicketInfo) -> str:
         """
         格式化车票信息为通知消息
@@ -132,3 +266,10 @@ class NotificationManager:
     def get_monitored_count(self) -> int:
         """获取当前监控的车次数量"""
         return len(self.monitored_trains)
+
+    def throttle_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        各限速渠道的状态
+        :return: {channel_name: {"budget", "queued", "dropped", "expired", "coalesced"}}
+        """
+        return {name: throttle.stats() for name, throttle in self.throttles.items()}
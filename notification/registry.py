@@ -0,0 +1,44 @@
+"""
+通知渠道注册表：按配置创建通知渠道实例
+"""
+
+from typing import Dict, List, Type
+
+from .base import NotificationChannel
+from .channels import (
+    NativeWindowsNotification,
+    MemoryNotification,
+    WindowsDesktopNotification,
+    WeChatWorkNotification,
+    FeishuNotification,
+    DingTalkNotification
+)
+
+
+# 配置中的渠道类型 -> 渠道类
+CHANNEL_TYPES: Dict[str, Type[NotificationChannel]] = {
+    "windows": NativeWindowsNotification,
+    "windows_desktop": WindowsDesktopNotification,
+    "wechat_work": WeChatWorkNotification,
+    "feishu": FeishuNotification,
+    "dingtalk": DingTalkNotification,
+    "memory": MemoryNotification,
+}
+
+
+def build_channel(spec: Dict) -> NotificationChannel:
+    """
+    按配置创建通知渠道
+    :param spec: {"type": 渠道类型, 其余为构造参数}，如 {"type": "feishu", "webhook_url": "..."}
+    :return: 通知渠道实例
+    """
+    params = dict(spec)
+    channel_type = params.pop("type", None)
+    if channel_type not in CHANNEL_TYPES:
+        raise ValueError(f"未知的通知渠道类型: {channel_type}（可用: {', '.join(CHANNEL_TYPES)}）")
+    return CHANNEL_TYPES[channel_type](**params)
+
+
+def build_channels(specs: List[Dict]) -> List[NotificationChannel]:
+    """按配置列表创建通知渠道"""
+    return [build_channel(spec) for spec in specs]
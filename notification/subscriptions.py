@@ -0,0 +1,172 @@
+"""
+多用户订阅：按 (线路, 日期) 建立倒排索引，一次查询分发给所有相关订阅
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .base import TicketInfo
+from .manager import NotificationManager
+from .registry import build_channels
+
+
+RouteKey = Tuple[str, str, str]  # (始发, 到达, 日期)
+
+
+@dataclass
+class Subscription:
+    """一条订阅"""
+    user: str
+    from_station: str
+    to_station: str
+    date: str
+    trains: Set[str] = field(default_factory=set)  # 为空表示全部车次
+    seats: Set[str] = field(default_factory=set)   # 为空表示全部坐席
+
+    @property
+    def key(self) -> RouteKey:
+        return (self.from_station, self.to_station, self.date)
+
+    def match(self, ticket: TicketInfo) -> Optional[TicketInfo]:
+        """
+        按订阅条件过滤车票
+        :return: 符合条件的车票（仅保留订阅的坐席）；不符合时为 None
+        """
+        if self.trains and ticket.train_no not in self.trains:
+            return None
+        if not self.seats:
+            return ticket
+        return ticket.filter_seats(self.seats)
+
+
+class SubscriptionIndex:
+    """
+    订阅倒排索引，每个用户拥有独立的通知管理器（渠道、冷却互不影响）
+    同一用户的不同 (线路, 日期) 共用渠道与限速额度，冷却与新车次判断按线路、日期、车次分别记录
+    """
+
+    def __init__(self, default_notification: Optional[Dict] = None):
+        """
+        :param default_notification: 用户未单独配置时使用的通知参数（cooldown_seconds、min_tickets 等）
+        """
+        self.default_notification = default_notification or {}
+        self.managers: Dict[str, NotificationManager] = {}
+        self._index: Dict[RouteKey, List[Subscription]] = {}
+
+    def add_user(self, user: str, channels: List, notification: Optional[Dict] = None):
+        """
+        注册用户及其通知渠道
+        :param channels: 通知渠道实例列表
+        :param notification: 该用户的通知参数，覆盖默认值
+        """
+        config = dict(self.default_notification)
+        config.update(notification or {})
+        manager = NotificationManager(config)
+        for channel in channels:
+            manager.register_channel(channel)
+        self.managers[user] = manager
+
+    def add(self, subscription: Subscription):
+        if subscription.user not in self.managers:
+            raise ValueError(f"订阅引用了未注册的用户: {subscription.user}")
+        self._index.setdefault(subscription.key, []).append(subscription)
+
+    def remove_user(self, user: str):
+        """移除用户及其全部订阅"""
+        self.managers.pop(user, None)
+        for key in list(self._index):
+            subs = [s for s in self._index[key] if s.user != user]
+            if subs:
+                self._index[key] = subs
+            else:
+                del self._index[key]
+
+    def carry_over(self, previous: "SubscriptionIndex"):
+        """
+        沿用旧索引中同名用户的通知状态（冷却计时、已发现车次、渠道限速记录），订阅文件热加载时使用
+        :param previous: 被替换的索引
+        """
+        for user, manager in self.managers.items():
+            old = previous.managers.get(user)
+            if old is not None:
+                manager.last_notified = old.last_notified
+                manager.monitored_trains = old.monitored_trains
+                manager.throttles = old.throttles
+
+    def routes(self) -> List[RouteKey]:
+        """需要查询的 (线路, 日期)，每个只查询一次"""
+        return list(self._index)
+
+    def subscriptions(self, key: RouteKey) -> List[Subscription]:
+        return self._index.get(key, [])
+
+    def __len__(self) -> int:
+        return sum(len(subs) for subs in self._index.values())
+
+    def dispatch(self, key: RouteKey, tickets: Iterable[TicketInfo]) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """
+        将一次查询的有票车次分发给该 (线路, 日期) 的订阅
+        :param tickets: 有票的车次列表
+        :return: 通知结果 {user: {train_no: {channel_name: result}}}（同一车次有多组上下车站时见 NotificationManager）
+        """
+        subs = self._index.get(key)
+        if not subs:
+            return {}
+        # 同城扩展查询时同一车次可能有多组上下车站，按 (车次, 上车站, 下车站) 区分
+        tickets = {(ticket.train_no, ticket.from_station, ticket.to_station): ticket for ticket in tickets}
+        # 同一用户的多条订阅命中同一车次时，坐席取各订阅的并集（任一订阅不限坐席则不限）
+        per_user: Dict[str, Dict[Tuple[str, str, str], Optional[Set[str]]]] = {}
+        for sub in subs:
+            seats = per_user.setdefault(sub.user, {})
+            for train, ticket in tickets.items():
+                if sub.match(ticket) is None:
+                    continue
+                if not sub.seats or (train in seats and seats[train] is None):
+                    seats[train] = None
+                else:
+                    seats[train] = seats.get(train, set()) | sub.seats
+
+        results = {}
+        for user, seats in per_user.items():
+            matched = {}
+            for train, names in seats.items():
+                hit = tickets[train] if names is None else tickets[train].filter_seats(names)
+                if hit is not None:
+                    matched[train] = hit
+            if matched:
+                sent = self.managers[user].notify_ticket_available(list(matched.values()))
+            else:
+                # 补发等待渠道限速额度的通知
+                sent = self.managers[user].flush()
+            if sent:
+                results[user] = sent
+        return results
+
+    @classmethod
+    def from_file(cls, path: str, default_notification: Optional[Dict] = None) -> "SubscriptionIndex":
+        """
+        从 JSON 文件加载订阅
+        格式: {"users": {用户: {"channels": [{"type": ..., ...}], "notification": {...}}},
+               "subscriptions": [{"user", "from", "to", "date", "trains": [...], "seats": [...]}]}
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls.from_dict(data, default_notification)
+
+    @classmethod
+    def from_dict(cls, data: Dict, default_notification: Optional[Dict] = None) -> "SubscriptionIndex":
+        """由订阅文件的内容构造（格式见 from_file）"""
+        index = cls(default_notification)
+        for user, conf in data.get("users", {}).items():
+            index.add_user(user, build_channels(conf.get("channels", [])), conf.get("notification"))
+        for item in data.get("subscriptions", []):
+            index.add(Subscription(
+                user=item["user"],
+                from_station=item["from"],
+                to_station=item["to"],
+                date=item["date"],
+                trains=set(item.get("trains") or []),
+                seats=set(item.get("seats") or []),
+            ))
+        return index
@@ -0,0 +1,147 @@
+"""
+通知渠道限速：企业微信、飞书、钉钉等机器人每分钟约 20 条消息，超出部分会被平台静默丢弃
+
+每个限速渠道前有一个按优先级排序的待发队列：
+- 高优先级（新发现有票、目标车次）优先占用额度，额度不足时排队，下次发送时补发
+- 低优先级（冷却结束后的重复提醒）在额度不足时合并为一条汇总消息，仍不足时丢弃
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, List, Optional
+
+from .base import TicketInfo, TicketKey, ticket_key
+
+# 优先级（数值越小越优先）
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+
+# 限速窗口（秒）：平台按分钟统计
+WINDOW_SECONDS = 60.0
+
+
+@dataclass
+class PendingMessage:
+    """一条待发送的通知"""
+    priority: int
+    title: str
+    message: str
+    ticket: Optional[TicketInfo]  # 合并的汇总消息为 None
+    created: float  # 生成时间（clock() 的时间点）
+
+
+@dataclass
+class ThrottlePlan:
+    """一次发送的安排"""
+    send: List[PendingMessage] = field(default_factory=list)      # 逐条发送
+    coalesce: List[PendingMessage] = field(default_factory=list)  # 合并为一条汇总消息发送
+    queued: List[PendingMessage] = field(default_factory=list)    # 留在队列中等待额度
+    dropped: List[PendingMessage] = field(default_factory=list)   # 额度不足丢弃
+    expired: List[PendingMessage] = field(default_factory=list)   # 排队超过 max_age_seconds 丢弃
+
+
+class ChannelThrottle:
+    """
+    单个渠道的限速器与优先级队列，非线程安全（由 NotificationManager 在发送时串行调用）
+    按滑动窗口计数：任意 60 秒内的发送次数不超过 max_per_minute，与平台的统计方式一致，
+    令牌桶（network.RateLimiter）在桶满时允许的突发会超过平台上限
+    """
+
+    def __init__(self, max_per_minute: float, max_pending: int = 20, max_age_seconds: float = 120,
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        :param max_per_minute: 每分钟最多发送的消息数
+        :param max_pending: 排队等待额度的高优先级通知上限，超出时丢弃最晚的
+        :param max_age_seconds: 排队超过该时长的通知已过时，丢弃
+        :param clock: 时间函数（默认 time.time），与 NotificationManager 使用同一个
+        """
+        self.max_per_minute = max_per_minute
+        self.max_pending = max_pending
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock or time.time
+        self.pending: List[PendingMessage] = []
+        self.dropped = 0
+        self.expired = 0
+        self.coalesced = 0
+        self._sent: Deque[float] = deque()
+
+    def configure(self, max_per_minute: float, max_pending: Optional[int] = None,
+                  max_age_seconds: Optional[float] = None):
+        """运行中调整限速参数（配置热加载时调用），发送记录与队列保留"""
+        self.max_per_minute = max_per_minute
+        if max_pending is not None:
+            self.max_pending = max_pending
+        if max_age_seconds is not None:
+            self.max_age_seconds = max_age_seconds
+
+    def budget(self) -> int:
+        """当前窗口内还可发送的消息数"""
+        now = self.clock()
+        while self._sent and now - self._sent[0] >= WINDOW_SECONDS:
+            self._sent.popleft()
+        return max(0, int(self.max_per_minute) - len(self._sent))
+
+    def record_send(self):
+        """记录一次发送（无论成功与否都计入平台额度）"""
+        self._sent.append(self.clock())
+
+    def plan(self, messages: List[PendingMessage]) -> ThrottlePlan:
+        """
+        安排本次要发送的通知：队列中的与新加入的一起按优先级、生成时间排序
+        同一线路、日期的同一车次只保留最新的一条，优先级取二者中较高的
+        :param messages: 新的通知
+        :return: 发送安排；调用方逐条发送 send、合并发送 coalesce，每次发送后调用 record_send
+        """
+        now = self.clock()
+        result = ThrottlePlan()
+        latest: Dict[TicketKey, PendingMessage] = {}
+        for item in self.pending + list(messages):
+            key = ticket_key(item.ticket)
+            previous = latest.get(key)
+            if previous is not None and previous.priority < item.priority:
+                # 同一条通知会提交给多个渠道，不修改原对象
+                item = replace(item, priority=previous.priority)
+            latest[key] = item
+        self.pending = []
+
+        candidates = []
+        for item in latest.values():
+            if now - item.created > self.max_age_seconds:
+                result.expired.append(item)
+            else:
+                candidates.append(item)
+        candidates.sort(key=lambda m: (m.priority, m.created))
+
+        budget = self.budget()
+        high = [m for m in candidates if m.priority == PRIORITY_HIGH]
+        low = [m for m in candidates if m.priority != PRIORITY_HIGH]
+        result.send = high[:budget]
+        budget -= len(result.send)
+        waiting = high[len(result.send):]
+        result.queued = waiting[:self.max_pending]
+        result.dropped = waiting[self.max_pending:]
+        if budget >= len(low):
+            result.send += low
+        elif budget > 0:
+            # 留一条额度给汇总消息
+            result.send += low[:budget - 1]
+            result.coalesce = low[budget - 1:]
+        else:
+            result.dropped += low
+
+        self.pending = result.queued
+        self.dropped += len(result.dropped)
+        self.expired += len(result.expired)
+        self.coalesced += len(result.coalesce)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """队列长度与累计丢弃、合并数"""
+        return {
+            "budget": self.budget(),
+            "queued": len(self.pending),
+            "dropped": self.dropped,
+            "expired": self.expired,
+            "coalesced": self.coalesced,
+        }
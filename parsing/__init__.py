@@ -0,0 +1,25 @@
+"""
+查询结果解析模块
+"""
+
+from .row_schema import (
+    RowSchema,
+    ROW_FIELDS,
+    DEFAULT_FIELDS,
+    DEFAULT_FIELD_COUNT,
+    DRIFT_FIELD_COUNT,
+    DRIFT_TOO_SHORT,
+    DRIFT_SEAT_VALUE,
+    TOLERATED_DRIFT
+)
+
+__all__ = [
+    'RowSchema',
+    'ROW_FIELDS',
+    'DEFAULT_FIELDS',
+    'DEFAULT_FIELD_COUNT',
+    'DRIFT_FIELD_COUNT',
+    'DRIFT_TOO_SHORT',
+    'DRIFT_SEAT_VALUE',
+    'TOLERATED_DRIFT',
+]
@@ -0,0 +1,120 @@
+"""
+查询结果行解码：按字段定义（名称、下标、类型）预编译提取器
+"""
+
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 表格使用的字段，解码结果按此顺序排列；坐席顺序与 notification.SEAT_TYPES 一致
+BASE_FIELDS = ("train_no", "from_code", "to_code", "depart", "arrive", "duration")
+SEAT_FIELDS = ("商/特", "一等座", "二等座", "一等/软卧", "二等/硬卧", "软座", "硬座", "无座")
+ROW_FIELDS = BASE_FIELDS + SEAT_FIELDS
+
+FIELD_TYPES = ("str", "seat")
+
+# 当前 12306 leftTicket/query 返回的行格式
+DEFAULT_FIELD_COUNT = 57
+DEFAULT_FIELDS: List[Dict] = [
+    {"name": "train_no", "index": 3, "type": "str"},
+    {"name": "from_code", "index": 6, "type": "str"},
+    {"name": "to_code", "index": 7, "type": "str"},
+    {"name": "depart", "index": 8, "type": "str"},
+    {"name": "arrive", "index": 9, "type": "str"},
+    {"name": "duration", "index": 10, "type": "str"},
+    {"name": "商/特", "index": 32, "type": "seat"},
+    {"name": "一等座", "index": 31, "type": "seat"},
+    {"name": "二等座", "index": 30, "type": "seat"},
+    {"name": "一等/软卧", "index": 23, "type": "seat"},
+    {"name": "二等/硬卧", "index": 28, "type": "seat"},
+    {"name": "软座", "index": 24, "type": "seat"},
+    {"name": "硬座", "index": 29, "type": "seat"},
+    {"name": "无座", "index": 26, "type": "seat"},
+]
+
+# 合法的坐席取值 -> 显示文本（空值显示为 "--"）；常见张数预先放入，更大的数字另行判断
+_SEAT_VALUES = {"": "--", "--": "--", "有": "有", "无": "无", "*": "*"}
+_SEAT_VALUES.update((str(n), str(n)) for n in range(1000))
+
+# 格式漂移原因：字段数与 field_count 不符（仍按下标解码）、字段不足（跳过）、坐席取值无效（跳过）
+DRIFT_FIELD_COUNT = "field_count"
+DRIFT_TOO_SHORT = "too_short"
+DRIFT_SEAT_VALUE = "seat_value"
+# 只计数、不跳过该行的原因
+TOLERATED_DRIFT = frozenset((DRIFT_FIELD_COUNT,))
+
+
+class RowSchema:
+    """编译后的行解码器"""
+
+    def __init__(self, fields: Iterable[Dict], field_count: int = 0,
+                 on_drift: Optional[Callable[[str], None]] = None):
+        """
+        :param fields: 字段定义 [{"name": ..., "index": ..., "type": "str" | "seat"}]，需覆盖 ROW_FIELDS
+        :param field_count: 每行应有的字段数，0 表示不校验；不符时只计数，字段足够且坐席取值有效的行照常解码
+        :param on_drift: 行格式不符时的回调，参数为原因（DRIFT_*）
+        """
+        by_name = {}
+        for field in fields:
+            name, index, kind = field.get("name"), field.get("index"), field.get("type", "str")
+            if name not in ROW_FIELDS:
+                raise ValueError(f"未知字段: {name}")
+            if not isinstance(index, int) or index < 0:
+                raise ValueError(f"字段 {name} 的下标无效: {index}")
+            if kind not in FIELD_TYPES or (kind == "seat") != (name in SEAT_FIELDS):
+                raise ValueError(f"字段 {name} 的类型无效: {kind}")
+            by_name[name] = index
+        missing = [name for name in ROW_FIELDS if name not in by_name]
+        if missing:
+            raise ValueError(f"缺少字段: {', '.join(missing)}")
+
+        indexes = [by_name[name] for name in ROW_FIELDS]
+        self.field_count = field_count
+        self.on_drift = on_drift
+        self.drift: Dict[str, int] = {}
+        self._max_index = max(indexes)
+        if field_count and field_count <= self._max_index:
+            raise ValueError(f"字段数 {field_count} 小于最大下标 {self._max_index}")
+        # 只拆分到最大下标为止，其后的字段留在最后一段不再拆分
+        self._maxsplit = self._max_index + 1
+        self._base = itemgetter(*indexes[:len(BASE_FIELDS)])
+        self._seats = itemgetter(*indexes[len(BASE_FIELDS):])
+        self._separators = field_count - 1
+
+    @classmethod
+    def from_config(cls, conf: Dict, on_drift: Optional[Callable[[str], None]] = None) -> "RowSchema":
+        """
+        由配置 row_schema 段构造
+        :param conf: {"field_count": ..., "fields": [...]}，缺省时使用当前 12306 格式
+        """
+        return cls(conf.get("fields") or DEFAULT_FIELDS, conf.get("field_count", DEFAULT_FIELD_COUNT), on_drift)
+
+    def _report(self, reason: str):
+        self.drift[reason] = self.drift.get(reason, 0) + 1
+        if self.on_drift:
+            self.on_drift(reason)
+
+    def decode(self, item: str, report: bool = True) -> Optional[Tuple[str, ...]]:
+        """
+        解码一行
+        :param item: 原始行（"|" 分隔）
+        :param report: 是否统计格式漂移（同一行重复解码时关闭）
+        :return: 按 ROW_FIELDS 顺序的字段元组（空坐席为 "--"）；字段不足或坐席取值无效时为 None
+        """
+        # 末尾新增字段等无害变化不影响按下标取值，字段偏移由坐席取值校验发现
+        if report and self._separators > 0 and item.count("|") != self._separators:
+            self._report(DRIFT_FIELD_COUNT)
+        d = item.split("|", self._maxsplit)
+        if len(d) <= self._max_index:
+            if report:
+                self._report(DRIFT_TOO_SHORT)
+            return None
+        seats = tuple(map(_SEAT_VALUES.get, self._seats(d)))
+        if None in seats:
+            seats = tuple(_SEAT_VALUES.get(v) or (v if v.isdigit() else None) for v in self._seats(d))
+            if None in seats:
+                # 取到的不是坐席数据，说明下标已偏移，宁可丢弃也不错标坐席
+                if report:
+                    self._report(DRIFT_SEAT_VALUE)
+                return None
+        return self._base(d) + seats
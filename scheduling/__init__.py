@@ -0,0 +1,7 @@
+"""
+查询调度模块
+"""
+
+from .release_calendar import ReleaseCalendar, ReleaseWindow, parse_time_of_day
+
+__all__ = ['ReleaseCalendar', 'ReleaseWindow', 'parse_time_of_day']
@@ -0,0 +1,130 @@
+"""
+放票日历：按车站或线路配置每天的放票（起售、退票集中）时间，
+放票前预热连接，放票窗口内对相关线路短间隔查询，窗口结束后恢复正常间隔
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 查询间隔的下限（秒），防止配置错误时空转
+MIN_WAIT = 0.05
+
+
+def parse_time_of_day(text: str) -> int:
+    """
+    "HH:MM" 或 "HH:MM:SS" -> 当天的秒数
+    :raises ValueError: 格式无效
+    """
+    parts = str(text).split(":")
+    if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+        raise ValueError(f"放票时间格式应为 HH:MM[:SS]: {text!r}")
+    h, m, s = (int(p) for p in parts + ["0"] * (3 - len(parts)))
+    if h > 23 or m > 59 or s > 59:
+        raise ValueError(f"放票时间无效: {text!r}")
+    return h * 3600 + m * 60 + s
+
+
+@dataclass(frozen=True)
+class ReleaseWindow:
+    """一个每日放票窗口"""
+    start: int                      # 当天的秒数
+    duration: float                 # 窗口长度（秒）
+    interval: float                 # 窗口内的查询间隔（秒）
+    station: Optional[str] = None   # 按出发站匹配
+    route: Optional[Tuple[str, str]] = None  # 按线路匹配；二者都未指定时匹配所有线路
+
+    def matches(self, from_station: str, to_station: str) -> bool:
+        if self.route is not None:
+            return self.route == (from_station, to_station)
+        if self.station is not None:
+            return self.station == from_station
+        return True
+
+    def _start_on(self, day: datetime) -> datetime:
+        return day.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=self.start)
+
+    def active(self, now: datetime) -> bool:
+        """now 是否在窗口内（含前一天开始、跨过零点的窗口）"""
+        for day in (now, now - timedelta(days=1)):
+            start = self._start_on(day)
+            if start <= now < start + timedelta(seconds=self.duration):
+                return True
+        return False
+
+    def next_start(self, now: datetime) -> datetime:
+        """now 之后（不含）最近一次窗口开始时间"""
+        start = self._start_on(now)
+        return start if start > now else start + timedelta(days=1)
+
+
+class ReleaseCalendar:
+    """放票日历"""
+
+    def __init__(self, windows: Iterable[ReleaseWindow], prewarm_seconds: float = 20):
+        """
+        :param windows: 放票窗口
+        :param prewarm_seconds: 窗口开始前多少秒预热连接
+        """
+        self.windows: List[ReleaseWindow] = list(windows)
+        self.prewarm_seconds = prewarm_seconds
+
+    @classmethod
+    def from_config(cls, conf: Dict) -> "ReleaseCalendar":
+        """
+        由配置 release_calendar 段构造
+        :param conf: {"prewarm_seconds", "burst_interval_seconds", "burst_duration_seconds",
+                      "windows": [{"time": "HH:MM", "station" 或 "route": "始发->到达",
+                                   "interval_seconds", "duration_seconds"}]}，窗口未指定的参数取段内默认值
+        :raises ValueError: 配置无效
+        """
+        interval = conf.get("burst_interval_seconds", 5)
+        duration = conf.get("burst_duration_seconds", 180)
+        windows = []
+        for item in conf.get("windows", []):
+            route = None
+            if item.get("route"):
+                parts = [p.strip() for p in item["route"].split("->")]
+                if len(parts) != 2 or not all(parts):
+                    raise ValueError(f"线路格式应为 始发->到达: {item['route']!r}")
+                route = (parts[0], parts[1])
+            window = ReleaseWindow(parse_time_of_day(item.get("time", "")),
+                                   item.get("duration_seconds", duration),
+                                   item.get("interval_seconds", interval),
+                                   item.get("station") or None, route)
+            if not window.duration > 0 or not window.interval > 0:
+                raise ValueError(f"放票窗口的时长与查询间隔应大于 0: {item}")
+            windows.append(window)
+        return cls(windows, conf.get("prewarm_seconds", 20))
+
+    def active_window(self, from_station: str, to_station: str, now: datetime) -> Optional[ReleaseWindow]:
+        """线路当前所在的放票窗口（多个时取查询间隔最短的）"""
+        active = [w for w in self.windows if w.matches(from_station, to_station) and w.active(now)]
+        return min(active, key=lambda w: w.interval) if active else None
+
+    def next_wait(self, from_station: str, to_station: str, interval: float, now: datetime) -> float:
+        """
+        距该线路下一次查询的秒数：窗口内用窗口的查询间隔，且不晚于下一个窗口的开始时间
+        :param interval: 正常查询间隔（秒）
+        """
+        window = self.active_window(from_station, to_station, now)
+        wait = window.interval if window else interval
+        for w in self.windows:
+            if w.matches(from_station, to_station):
+                wait = min(wait, (w.next_start(now) - now).total_seconds())
+        return max(wait, MIN_WAIT)
+
+    def next_prewarm(self, routes: Iterable[Tuple[str, str]], now: datetime) -> Optional[datetime]:
+        """
+        下一次预热时间：监控的线路中最近一个窗口开始前 prewarm_seconds
+        :param routes: 正在监控的线路 [(始发, 到达)]
+        :return: now 之后（不含）的预热时间；没有相关窗口时为 None
+        """
+        lead = timedelta(seconds=self.prewarm_seconds)
+        times = []
+        for w in self.windows:
+            if any(w.matches(f, t) for f, t in routes):
+                at = w.next_start(now + lead) - lead
+                times.append(at)
+        return min(times) if times else None
@@ -0,0 +1,7 @@
+"""
+中转换乘搜索模块
+"""
+
+from .search import Leg, Itinerary, join_legs, rank_itineraries
+
+__all__ = ['Leg', 'Itinerary', 'join_legs', 'rank_itineraries']
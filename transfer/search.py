@@ -0,0 +1,132 @@
+"""
+中转换乘方案搜索
+
+第一程（始发 -> 中转站）按到达时间排序，第二程（中转站 -> 到达）按出发时间排序，
+对每个中转站用双指针在 [到达 + 最短换乘, 到达 + 最长换乘] 窗口内配对，
+整体复杂度为 O(n log n + 结果数)，无需两两比较。
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from notification import TicketInfo
+
+
+def _minutes(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _clock_text(minutes: int) -> str:
+    """时刻文本，跨天时标注 (+n)"""
+    days, rest = divmod(minutes, 1440)
+    return _hhmm(rest) + (f"(+{days})" if days else "")
+
+
+@dataclass
+class Leg:
+    """一程车次（时间为相对查询日期零点的分钟数）"""
+    train_no: str
+    from_station: str
+    to_station: str
+    depart: int
+    arrive: int
+    seats: Dict[str, str]
+
+    @classmethod
+    def from_ticket(cls, ticket: TicketInfo, day_offset: int = 0) -> "Leg":
+        """
+        由查询结果中的车票构造
+        :param day_offset: 车票日期相对查询日期的天数（次日换乘时为 1）
+        """
+        depart = _minutes(ticket.departure_time) + day_offset * 1440
+        return cls(ticket.train_no, ticket.from_station, ticket.to_station,
+                   depart, depart + _minutes(ticket.duration), dict(ticket.available_seats))
+
+    @property
+    def departure_text(self) -> str:
+        return _clock_text(self.depart)
+
+    @property
+    def arrival_text(self) -> str:
+        return _clock_text(self.arrive)
+
+
+@dataclass
+class Itinerary:
+    """中转方案"""
+    first: Leg
+    second: Leg
+
+    @property
+    def layover(self) -> int:
+        return self.second.depart - self.first.arrive
+
+    @property
+    def total(self) -> int:
+        return self.second.arrive - self.first.depart
+
+    def to_ticket(self, date: str, from_station: str, to_station: str) -> TicketInfo:
+        """转换为 TicketInfo，沿用现有的通知流程"""
+        seats = {}
+        for leg in (self.first, self.second):
+            for seat, value in leg.seats.items():
+                seats[f"{leg.train_no} {leg.from_station}→{leg.to_station} {seat}"] = value
+        return TicketInfo.from_seat_dict(
+            train_no=f"{self.first.train_no}→{self.second.train_no}",
+            from_station=from_station,
+            to_station=to_station,
+            date=date,
+            departure_time=self.first.departure_text,
+            duration=_hhmm(self.total),
+            available_seats=seats
+        )
+
+
+def join_legs(first_legs: Iterable[Leg], second_legs: Iterable[Leg],
+              min_layover: int = 20, max_layover: int = 180) -> List[Itinerary]:
+    """
+    按换乘站做排序合并连接
+    :param first_legs: 第一程（始发 -> 中转站）
+    :param second_legs: 第二程（中转站 -> 到达）
+    :param min_layover: 最短换乘时间（分钟）
+    :param max_layover: 最长换乘时间（分钟）
+    :return: 满足换乘时间约束的方案
+    """
+    arrivals: Dict[str, List[Leg]] = {}
+    departures: Dict[str, List[Leg]] = {}
+    for leg in first_legs:
+        arrivals.setdefault(leg.to_station, []).append(leg)
+    for leg in second_legs:
+        departures.setdefault(leg.from_station, []).append(leg)
+
+    itineraries = []
+    for station, firsts in arrivals.items():
+        seconds = departures.get(station)
+        if not seconds:
+            continue
+        firsts.sort(key=lambda leg: leg.arrive)
+        seconds.sort(key=lambda leg: leg.depart)
+        depart_times = [leg.depart for leg in seconds]
+        # 到达时间递增，窗口下界只会右移
+        low = 0
+        for first in firsts:
+            earliest = first.arrive + min_layover
+            latest = first.arrive + max_layover
+            low = bisect_left(depart_times, earliest, low)
+            j = low
+            while j < len(seconds) and depart_times[j] <= latest:
+                if seconds[j].train_no != first.train_no:
+                    itineraries.append(Itinerary(first, seconds[j]))
+                j += 1
+    return itineraries
+
+
+def rank_itineraries(itineraries: List[Itinerary], limit: int = 10) -> List[Itinerary]:
+    """按 到达时间、总历时、换乘时间 排序，取前 limit 个"""
+    return sorted(itineraries, key=lambda it: (it.second.arrive, it.total, it.layover))[:limit]